@@ -17,38 +17,73 @@ def active_context():
 
 
 CONTEXT_CONFIG_DIR = os.path.expanduser(os.path.join(GLOBAL_CONFIG_DIR, 'context_config'))
-ACTIVE_CONTEXT_CONFIG_PATH = os.path.join(CONTEXT_CONFIG_DIR, active_context())
+
+
+def get_active_context_config_path():
+    return os.path.join(CONTEXT_CONFIG_DIR, active_context())
+
 
 _UNSET = object()
 _ENV_VAR_FORMAT = ENV_VAR_PREFIX + '{section}_{option}'
 
 
 class AzConfig(object):
+    """Configuration read from the config files and overridden by AZURE_* environment variables.
+
+    The files and the environment are merged into a flat dictionary the first time a value is
+    requested, so that subsequent lookups don't touch the parser or the environment. Call `reload`
+    after modifying `config_parser` or the environment.
+    """
     _BOOLEAN_STATES = {'1': True, 'yes': True, 'true': True, 'on': True,
                        '0': False, 'no': False, 'false': False, 'off': False}
 
-    def __init__(self):
+    def __init__(self, config_files_loader=None):
         self.config_parser = configparser.SafeConfigParser()
+        self._config_files_loader = config_files_loader
+        self._values = None
 
     @staticmethod
     def env_var_name(section, option):
         return _ENV_VAR_FORMAT.format(section=section.upper(),
                                       option=option.upper())
 
+    @property
+    def values(self):
+        if self._values is None:
+            self._values = self._build_values()
+        return self._values
+
+    def reload(self):
+        self._values = None
+
+    def _build_values(self):
+        if self._config_files_loader:
+            self.config_parser.read(self._config_files_loader())
+            self._config_files_loader = None
+        values = {}
+        for section in self.config_parser.sections():
+            for option in self.config_parser.options(section):
+                try:
+                    value = self.config_parser.get(section, option)
+                except configparser.InterpolationError:
+                    value = self.config_parser.get(section, option, raw=True)
+                values[AzConfig.env_var_name(section, option)] = value
+        values.update((name, value) for name, value in os.environ.items()
+                      if name.startswith(ENV_VAR_PREFIX))
+        return values
+
     def has_option(self, section, option):
-        if AzConfig.env_var_name(section, option) in os.environ:
-            return True
-        return self.config_parser.has_option(section, option)
+        return AzConfig.env_var_name(section, option) in self.values
 
     def get(self, section, option, fallback=_UNSET):
         try:
-            env = AzConfig.env_var_name(section, option)
-            return os.environ[env] if env in os.environ else self.config_parser.get(section, option)
-        except (configparser.NoSectionError, configparser.NoOptionError):
-            if fallback is _UNSET:
-                raise
-            else:
+            return self.values[AzConfig.env_var_name(section, option)]
+        except KeyError:
+            if fallback is not _UNSET:
                 return fallback
+            if self.config_parser.has_section(section):
+                raise configparser.NoOptionError(option, section)
+            raise configparser.NoSectionError(section)
 
     def getint(self, section, option, fallback=_UNSET):
         return int(self.get(section, option, fallback))
@@ -63,5 +98,4 @@ class AzConfig(object):
         return AzConfig._BOOLEAN_STATES[val.lower()]  # pylint: disable=E1101
 
 
-az_config = AzConfig()
-az_config.config_parser.read([GLOBAL_CONFIG_PATH, ACTIVE_CONTEXT_CONFIG_PATH])
+az_config = AzConfig(lambda: [GLOBAL_CONFIG_PATH, get_active_context_config_path()])
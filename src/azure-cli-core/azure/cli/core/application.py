@@ -8,12 +8,14 @@ import sys
 import os
 import uuid
 import argparse
+import logging
+from six.moves import reprlib
 from azure.cli.core.parser import AzCliCommandParser, enable_autocomplete
 from azure.cli.core._output import CommandResultItem
 import azure.cli.core.extensions
 import azure.cli.core._help as _help
 import azure.cli.core.azlogging as azlogging
-from azure.cli.core._util import todict, truncate_text, CLIError, read_file_content
+from azure.cli.core._util import todict, CLIError, read_file_content
 from azure.cli.core._config import az_config
 
 import azure.cli.core.telemetry as telemetry
@@ -22,6 +24,32 @@ logger = azlogging.get_az_logger(__name__)
 
 ARGCOMPLETE_ENV_NAME = '_ARGCOMPLETE'
 
+# ARM accepts up to 20 requests in a batch request
+MAX_BATCH_SIZE = 20
+
+
+class _EventDataRepr(reprlib.Repr):
+    '''Bounded representation of event data for debug logging, so that large payloads such
+    as the command table are not stringified in full.
+    '''
+
+    def __init__(self):
+        reprlib.Repr.__init__(self)
+        self.maxlevel = 3
+        self.maxdict = 5
+        self.maxlist = 5
+        self.maxstring = 100
+        self.maxother = 100
+
+    def repr1(self, x, level):
+        # dict subclasses (OrderedDict, CommandTable) would otherwise fall back to the full repr
+        if isinstance(x, dict) and not type(x) is dict:  # pylint: disable=unidiomatic-typecheck
+            return self.repr_dict(x, level)
+        return reprlib.Repr.repr1(self, x, level)
+
+
+_event_data_repr = _EventDataRepr().repr
+
 
 class Configuration(object):  # pylint: disable=too-few-public-methods
     """The configuration object tracks session specific data such
@@ -52,14 +80,18 @@ class Application(object):
     COMMAND_TABLE_PARAMS_LOADED = 'CommandTableParams.Loaded'
 
     def __init__(self, config=None):
-        self._event_handlers = defaultdict(lambda: [])
+        # Handlers are kept in tuples which are rebuilt on register/remove, so raising an event
+        # doesn't need to copy the handler list in case a handler modifies it.
+        self._event_handlers = defaultdict(tuple)
         self.session = {
             'headers': {
                 'x-ms-client-request-id': str(uuid.uuid1())
             },
             'command': 'unknown',
             'completer_active': ARGCOMPLETE_ENV_NAME in os.environ,
-            'query_active': False
+            'query_active': False,
+            'defer_long_running_operations': False,
+            'batch_get_requests': False
         }
 
         # Register presence of and handlers for global parameters
@@ -123,34 +155,48 @@ class Application(object):
         args = self.parser.parse_args(argv)
 
         self.raise_event(self.COMMAND_PARSER_PARSED, command=args.command, args=args)
-        results = []
-        for expanded_arg in _explode_list_args(args):
-            self.session['command'] = expanded_arg.command
-            try:
-                _validate_arguments(expanded_arg)
-            except CLIError:
-                raise
-            except:  # pylint: disable=bare-except
-                err = sys.exc_info()[1]
-                getattr(expanded_arg, '_parser', self.parser).validation_error(str(err))
-
-            # Consider - we are using any args that start with an underscore (_) as 'private'
-            # arguments and remove them from the arguments that we pass to the actual function.
-            # This does not feel quite right.
-            params = dict([(key, value)
-                           for key, value in expanded_arg.__dict__.items()
-                           if not key.startswith('_')])
-            params.pop('subcommand', None)
-            params.pop('func', None)
-            params.pop('command', None)
-
-            telemetry.set_command_details(expanded_arg.command,
-                                          self.configuration.output_format,
-                                          [p for p in unexpanded_argv if p.startswith('-')])
-
-            result = expanded_arg.func(params)
-            result = todict(result)
-            results.append(result)
+        max_parallel_set = getattr(args, '_max_parallel', None) is not None or \
+            az_config.has_option('core', 'max_parallel')
+        max_parallel = getattr(args, '_max_parallel', None) or \
+            az_config.getint('core', 'max_parallel', fallback=1)
+        iterated_names = [name for name, value in vars(args).items()
+                          if isinstance(value, IterateValue)]
+        expanded_args = list(_explode_list_args(args)) \
+            if command_table[args.command].explode_list_args else [args]
+        # when the command runs for many values, the long running operations it starts are
+        # waited for together once all of them have been started
+        self.session['defer_long_running_operations'] = len(expanded_args) > 1
+        # and the GET requests of show commands are sent together in batch requests
+        if len(expanded_args) > 1 and args.command.split()[-1] == 'show' and \
+                az_config.getboolean('core', 'batch_requests', fallback=True):
+            self.session['batch_get_requests'] = True
+            if not max_parallel_set:
+                # enough requests are sent at once to fill a batch
+                max_parallel = min(len(expanded_args), MAX_BATCH_SIZE)
+        if _prompts_for_confirmation(command_table[args.command], args):
+            # the confirmation is prompted for one value at a time
+            max_parallel = 1
+        # the command is set once, rather than from the threads the handler runs on
+        self.session['command'] = args.command
+        try:
+            if len(expanded_args) > 1:
+                outcomes = self._execute_all(expanded_args, unexpanded_argv, max_parallel)
+            else:
+                results = [self._execute_expanded_arg(expanded_args[0], unexpanded_argv)]
+        finally:
+            self.session['defer_long_running_operations'] = False
+            self.session['batch_get_requests'] = False
+
+        if len(expanded_args) > 1:
+            from azure.cli.core.commands import lro_scheduler
+            # the operations started for the other values are waited for before the failures
+            # are reported
+            waited = iter(lro_scheduler.wait_all([result for result, ex in outcomes
+                                                  if ex is None]))
+            outcomes = [next(waited) if ex is None else (None, ex) for _, ex in outcomes]
+            Application._raise_failures(expanded_args, outcomes, iterated_names)
+            results = [result for result, _ in outcomes]
+        results = [todict(result) for result in results]
 
         if len(results) == 1:
             results = results[0]
@@ -163,12 +209,77 @@ class Application(object):
                                  table_transformer=command_table[args.command].table_transformer,
                                  is_query_active=self.session['query_active'])
 
+    def _execute_expanded_arg(self, expanded_arg, unexpanded_argv):
+        try:
+            _validate_arguments(expanded_arg)
+        except CLIError:
+            raise
+        except:  # pylint: disable=bare-except
+            err = sys.exc_info()[1]
+            getattr(expanded_arg, '_parser', self.parser).validation_error(str(err))
+
+        # Consider - we are using any args that start with an underscore (_) as 'private'
+        # arguments and remove them from the arguments that we pass to the actual function.
+        # This does not feel quite right.
+        params = dict([(key, value)
+                       for key, value in expanded_arg.__dict__.items()
+                       if not key.startswith('_')])
+        params.pop('subcommand', None)
+        params.pop('func', None)
+        params.pop('command', None)
+
+        telemetry.set_command_details(expanded_arg.command,
+                                      self.configuration.output_format,
+                                      [p for p in unexpanded_argv if p.startswith('-')])
+
+        return expanded_arg.func(params)
+
+    def _execute_all(self, expanded_args, unexpanded_argv, max_parallel):
+        '''Execute the handler for each of the expanded arguments, on a pool of threads when
+        max_parallel is above 1. Return a (result, exception) pair for each of the arguments, in
+        order; failures don't stop the remaining executions.
+        '''
+        def _execute(expanded_arg):
+            try:
+                return self._execute_expanded_arg(expanded_arg, unexpanded_argv), None
+            except (Exception, SystemExit) as ex:  # pylint: disable=broad-except
+                return None, ex
+
+        if max_parallel <= 1:
+            return [_execute(expanded_arg) for expanded_arg in expanded_args]
+
+        from multiprocessing.pool import ThreadPool
+
+        logger.debug("Executing '%s' for %d values with up to %d in parallel",
+                     expanded_args[0].command, len(expanded_args), max_parallel)
+        pool = ThreadPool(min(max_parallel, len(expanded_args)))
+        try:
+            return pool.map(_execute, expanded_args)
+        finally:
+            pool.close()
+
+    @staticmethod
+    def _raise_failures(expanded_args, outcomes, iterated_names):
+        failures = [(expanded_arg, ex) for expanded_arg, (_, ex) in zip(expanded_args, outcomes)
+                    if ex is not None]
+        for _, ex in failures:
+            # argument validation errors exit with the usage message already printed
+            if isinstance(ex, SystemExit):
+                raise ex
+        if failures:
+            details = ['{}: {}'.format(' '.join('{}={}'.format(name, getattr(failed_arg, name))
+                                                for name in iterated_names), ex)
+                       for failed_arg, ex in failures]
+            raise CLIError('{} of {} operations failed:\n{}'.format(
+                len(failures), len(expanded_args), '\n'.join(details)))
+
     def raise_event(self, name, **kwargs):
         '''Raise the event `name`.
         '''
-        data = truncate_text(str(kwargs), width=500)
-        logger.debug("Application event '%s' with event data %s", name, data)
-        for func in list(self._event_handlers[name]):  # Make copy in case handler modifies the list
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Application event '%s' with event data %s",
+                         name, _event_data_repr(kwargs))
+        for func in self._event_handlers.get(name, ()):
             func(**kwargs)
 
     def register(self, name, handler):
@@ -180,7 +291,7 @@ class Application(object):
           name: name of the event raised
           event_data: `dict` with event specific data.
         '''
-        self._event_handlers[name].append(handler)
+        self._event_handlers[name] += (handler,)
         logger.debug("Registered application event handler '%s' at %s", name, handler)
 
     def remove(self, name, handler):
@@ -192,7 +303,9 @@ class Application(object):
           name: name of the event raised
           event_data: `dict` with event specific data.
         '''
-        self._event_handlers[name].remove(handler)
+        handlers = list(self._event_handlers[name])
+        handlers.remove(handler)
+        self._event_handlers[name] = tuple(handlers)
         logger.debug("Removed application event handler '%s' at %s", name, handler)
 
     @staticmethod
@@ -260,6 +373,13 @@ def _validate_arguments(args, **_):
         pass
 
 
+def _prompts_for_confirmation(command, args):
+    from azure.cli.core.commands import FORCE_PARAM_NAME
+    return bool(getattr(command, 'confirmation', None)) and \
+        not getattr(args, FORCE_PARAM_NAME, False) and \
+        not az_config.getboolean('core', 'disable_confirm_prompt', fallback=False)
+
+
 def _explode_list_args(args):
     '''Iterate through each attribute member of args and create a copy with
     the IterateValues 'flattened' to only contain a single value
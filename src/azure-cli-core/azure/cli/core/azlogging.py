@@ -3,12 +3,15 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import atexit
 import os
 import platform
 import logging
+import threading
 from logging.handlers import RotatingFileHandler
 
 import colorama
+from six.moves import queue
 
 from azure.cli.core._environment import get_config_dir
 from azure.cli.core._config import az_config
@@ -114,6 +117,49 @@ class CustomStreamHandler(logging.StreamHandler):
         return msg
 
 
+class AsyncFileHandler(logging.Handler):
+    """Hands log records to a background thread which writes them to the target handler, so
+    that commands don't wait on the log file. Pending records are written out at exit.
+    """
+
+    _STOP = object()
+
+    def __init__(self, target):
+        logging.Handler.__init__(self)
+        self.target = target
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._write_records, name='az-log-writer')
+        self._thread.daemon = True
+        self._thread.start()
+        atexit.register(self.close)
+
+    def emit(self, record):
+        try:
+            # Render the message now as the arguments may change before the writer gets to it
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+            self._queue.put_nowait(record)
+        except Exception:  # pylint: disable=broad-except
+            self.handleError(record)
+
+    def _write_records(self):
+        while True:
+            record = self._queue.get()
+            if record is self._STOP:
+                break
+            self.target.handle(record)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        self.target.close()
+        logging.Handler.close(self)
+
+
 def _init_console_handlers(root_logger, az_logger, log_level_config):
     root_logger.addHandler(CustomStreamHandler(log_level_config['root'],
                                                CONSOLE_LOG_FORMAT['root']))
@@ -135,8 +181,10 @@ def _init_logfile_handlers(root_logger, az_logger):
     lfmt = logging.Formatter('%(process)d : %(asctime)s : %(levelname)s : %(name)s : %(message)s')
     logfile_handler.setFormatter(lfmt)
     logfile_handler.setLevel(logging.DEBUG)
-    root_logger.addHandler(logfile_handler)
-    az_logger.addHandler(logfile_handler)
+    async_handler = AsyncFileHandler(logfile_handler)
+    async_handler.setLevel(logging.DEBUG)
+    root_logger.addHandler(async_handler)
+    az_logger.addHandler(async_handler)
 
 
 def configure_logging(argv):
@@ -145,15 +193,17 @@ def configure_logging(argv):
 
     root_logger = logging.getLogger()
     az_logger = logging.getLogger('az')
-    # Set the levels of the loggers to lowest level.
-    # Handlers can override by choosing a higher level.
-    root_logger.setLevel(logging.DEBUG)
-    az_logger.setLevel(logging.DEBUG)
     az_logger.propagate = False
 
     if len(root_logger.handlers) and len(az_logger.handlers):
         # loggers already configured
         return
+    # Set the levels of the loggers to the lowest level any of their handlers accepts.
+    # Records no handler would emit are then discarded early, and logger.isEnabledFor can be used
+    # to skip building expensive log messages.
+    file_log_level = logging.DEBUG if ENABLE_LOG_FILE else logging.CRITICAL
+    root_logger.setLevel(min(log_level_config['root'], file_log_level))
+    az_logger.setLevel(min(log_level_config['az'], file_log_level))
     _init_console_handlers(root_logger, az_logger, log_level_config)
     _init_logfile_handlers(root_logger, az_logger)
     if ENABLE_LOG_FILE:
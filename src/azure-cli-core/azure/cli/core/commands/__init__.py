@@ -7,7 +7,10 @@ from __future__ import print_function
 
 import json
 import pkgutil
+import random
 import re
+import sys
+import threading
 import time
 import timeit
 import traceback
@@ -83,35 +86,126 @@ class CliCommandArgument(object):
         self.type.settings[name] = value
 
 
+class AdaptivePollingDelay(object):  # pylint: disable=too-few-public-methods
+    """Delay between the status requests a poller sends for a long running operation.
+
+    A 'Retry-After' header from the service is honored. Otherwise the delay starts short, so that
+    quick operations complete without waiting a full default interval, and backs off exponentially
+    with jitter up to max_interval seconds.
+    """
+
+    def __init__(self, poller, initial_interval=2.0, max_interval=30.0, factor=2.0,
+                 rate_limiter=None):
+        self.poller = poller
+        self.max_interval = max_interval
+        self.factor = factor
+        self.rate_limiter = rate_limiter
+        self.status_requests = 0
+        self._next_interval = initial_interval
+
+    def _retry_after(self):
+        response = getattr(self.poller, '_response', None)
+        try:
+            return float(response.headers['retry-after'])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
+
+    def __call__(self):
+        if getattr(self.poller, '_response', None) is None:
+            return
+        delay = self._retry_after()
+        if delay is None:
+            interval = min(self._next_interval, self.max_interval)
+            self._next_interval = interval * self.factor
+            delay = random.uniform(interval / 2.0, interval)
+        self.status_requests += 1
+        time.sleep(delay)
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+
+class PollRateLimiter(object):  # pylint: disable=too-few-public-methods
+    """Spaces out the status requests sent by all the pollers of the process, so that waiting
+    for many operations at once doesn't exceed max_per_sec requests per second.
+    """
+
+    def __init__(self, max_per_sec):
+        self._interval = 1.0 / max_per_sec
+        self._next_slot = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = timeit.default_timer()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
 class LongRunningOperation(object):  # pylint: disable=too-few-public-methods
 
-    def __init__(self, start_msg='', finish_msg='', poller_done_interval_ms=1000.0):
+    def __init__(self, start_msg='', finish_msg='', poller_done_interval_ms=1000.0,
+                 max_poll_interval_sec=30.0):
         self.start_msg = start_msg
         self.finish_msg = finish_msg
         self.poller_done_interval_ms = poller_done_interval_ms
+        self.max_poll_interval_sec = max_poll_interval_sec
+
+    @staticmethod
+    def _get_correlation_id(poller):
+        # pylint: disable=protected-access
+        response = getattr(poller, '_response', None)
+        if response is None:
+            return None
+        try:
+            return json.loads(response.__dict__['_content'])['properties']['correlationId']
+        except:  # pylint: disable=bare-except
+            return response.headers.get('x-ms-correlation-request-id')
+
+    @staticmethod
+    def _get_correlation_message(poller):
+        correlation_id = LongRunningOperation._get_correlation_id(poller)
+        return 'Correlation ID: {}'.format(correlation_id) if correlation_id else ''
 
-    def _delay(self):
-        time.sleep(self.poller_done_interval_ms / 1000.0)
+    def _use_adaptive_polling(self, poller):
+        if not hasattr(poller, '_delay'):
+            return None
+        polling_delay = AdaptivePollingDelay(poller, max_interval=self.max_poll_interval_sec,
+                                             rate_limiter=lro_scheduler.rate_limiter)
+        poller._delay = polling_delay  # pylint: disable=protected-access
+        return polling_delay
 
     def __call__(self, poller):
-        from msrest.exceptions import ClientException
         logger.info("Starting long running operation '%s'", self.start_msg)
+        start_time = timeit.default_timer()
+        polling_delay = self._use_adaptive_polling(poller)
+
+        done = threading.Event()
+        try:
+            poller.add_done_callback(lambda _: done.set())
+        except (AttributeError, ValueError):
+            # no callback support, or the operation has already completed
+            done.set()
+
         correlation_message = ''
         while not poller.done():
-            try:
-                # pylint: disable=protected-access
-                correlation_id = json.loads(
-                    poller._response.__dict__['_content'])['properties']['correlationId']
-
-                correlation_message = 'Correlation ID: {}'.format(correlation_id)
-            except:  # pylint: disable=bare-except
-                pass
+            if not correlation_message:
+                correlation_message = LongRunningOperation._get_correlation_message(poller)
 
             try:
-                self._delay()
+                done.wait(self.poller_done_interval_ms / 1000.0)
             except KeyboardInterrupt:
                 logger.error('Long running operation wait cancelled.  %s', correlation_message)
                 raise
+        logger.debug("Long running operation '%s' finished in %.3f seconds after %s status "
+                     "requests. %s", self.start_msg, timeit.default_timer() - start_time,
+                     polling_delay.status_requests if polling_delay else 'unknown',
+                     correlation_message)
+        return self._get_result(poller, correlation_message)
+
+    def _get_result(self, poller, correlation_message):
+        from msrest.exceptions import ClientException
         try:
             result = poller.result()
         except ClientException as client_exception:
@@ -138,6 +232,141 @@ class LongRunningOperation(object):  # pylint: disable=too-few-public-methods
         return result
 
 
+class DeferredLongRunningOperation(object):  # pylint: disable=too-few-public-methods
+    """A long running operation started by a command whose wait is left to the
+    LongRunningOperationScheduler. `then` is applied to the result of the operation.
+    """
+
+    def __init__(self, operation, poller, then=None):
+        self.operation = operation
+        self.poller = poller
+        self.then = then
+
+    def result(self):
+        result = self.operation._get_result(  # pylint: disable=protected-access
+            self.poller, LongRunningOperation._get_correlation_message(self.poller))
+        return self.then(result) if self.then else result
+
+
+class LongRunningOperationScheduler(object):
+    """Waits for the long running operations of the process.
+
+    When a command runs for many values (e.g. --ids), the operations it starts are deferred and
+    waited for together from a single loop with a consolidated progress display, instead of one
+    after the other. The status requests of all the pollers share a rate limit of
+    `[core] max_polls_per_sec` requests per second (0 for no limit).
+    """
+    DEFAULT_MAX_POLLS_PER_SEC = 10
+
+    def __init__(self, progress_interval_sec=5.0):
+        self.progress_interval_sec = progress_interval_sec
+        self._rate_limiter = None
+        self._rate_limiter_loaded = False
+
+    @property
+    def rate_limiter(self):
+        if not self._rate_limiter_loaded:
+            max_polls_per_sec = az_config.getfloat('core', 'max_polls_per_sec',
+                                                   fallback=self.DEFAULT_MAX_POLLS_PER_SEC)
+            self._rate_limiter = PollRateLimiter(max_polls_per_sec) \
+                if max_polls_per_sec > 0 else None
+            self._rate_limiter_loaded = True
+        return self._rate_limiter
+
+    @staticmethod
+    def defer_enabled():
+        return APPLICATION.session.get('defer_long_running_operations', False)
+
+    def wait(self, operation, poller, then=None):
+        """Wait for the operation, or defer the wait if the application waits for the operations
+        of the command together.
+        """
+        if not self.defer_enabled():
+            result = operation(poller)
+            return then(result) if then else result
+        return self.defer(operation, poller, then)
+
+    @staticmethod
+    def defer(operation, poller, then=None):
+        """Leave the wait for the operation to `wait_all`."""
+        logger.info("Starting long running operation '%s'", operation.start_msg)
+        operation._use_adaptive_polling(poller)  # pylint: disable=protected-access
+        return DeferredLongRunningOperation(operation, poller, then)
+
+    def wait_all(self, items):
+        """Wait for all the deferred operations in items. Return a (result, exception) pair for
+        each of the items, in order; items that are not deferred operations are their own result.
+        """
+        deferred = [item for item in items if isinstance(item, DeferredLongRunningOperation)]
+        if deferred:
+            self._wait_for_pollers([item.poller for item in deferred])
+
+        outcomes = []
+        for item in items:
+            if not isinstance(item, DeferredLongRunningOperation):
+                outcomes.append((item, None))
+                continue
+            try:
+                outcomes.append((item.result(), None))
+            except Exception as ex:  # pylint: disable=broad-except
+                outcomes.append((None, ex))
+        return outcomes
+
+    def _wait_for_pollers(self, pollers):
+        completed = threading.Condition()
+
+        def _notify(_):
+            with completed:
+                completed.notify()
+
+        for poller in pollers:
+            try:
+                poller.add_done_callback(_notify)
+            except (AttributeError, ValueError):
+                pass
+
+        start_time = timeit.default_timer()
+        last_report = start_time
+        try:
+            with completed:
+                while True:
+                    remaining = sum(1 for poller in pollers if not poller.done())
+                    if not remaining:
+                        break
+                    now = timeit.default_timer()
+                    if now - last_report >= self.progress_interval_sec:
+                        self._report_progress(len(pollers) - remaining, len(pollers))
+                        last_report = now
+                    # the done callbacks wake the loop up; the timeout bounds the wait in case
+                    # a poller completed before its callback was added
+                    completed.wait(1.0)
+        except KeyboardInterrupt:
+            logger.error('Long running operation wait cancelled.')
+            raise
+        finally:
+            self._clear_progress()
+        logger.debug('%d long running operations finished in %.3f seconds', len(pollers),
+                     timeit.default_timer() - start_time)
+
+    @staticmethod
+    def _report_progress(done_count, total):
+        message = '{} of {} long running operations completed'.format(done_count, total)
+        if sys.stderr.isatty():
+            sys.stderr.write('\r' + message)
+            sys.stderr.flush()
+        else:
+            logger.info(message)
+
+    @staticmethod
+    def _clear_progress():
+        if sys.stderr.isatty():
+            sys.stderr.write('\r\033[K')
+            sys.stderr.flush()
+
+
+lro_scheduler = LongRunningOperationScheduler()
+
+
 # pylint: disable=too-few-public-methods
 class DeploymentOutputLongRunningOperation(LongRunningOperation):
     def __call__(self, result):
@@ -185,6 +414,11 @@ class CliCommand(object):  # pylint:disable=too-many-instance-attributes
         self.arguments = {}
         self.arguments_loader = arguments_loader
         self.table_transformer = table_transformer
+        # whether the handler runs once for each value of list arguments such as --ids, or
+        # receives the lists
+        self.explode_list_args = True
+        # the confirmation the handler prompts for, unless --force is given
+        self.confirmation = None
 
     @staticmethod
     def _should_load_description():
@@ -328,7 +562,7 @@ def create_command(module_name, name, operation,
 
             # otherwise handle based on return type of results
             if isinstance(result, AzureOperationPoller):
-                return LongRunningOperation('Starting {}'.format(name))(result)
+                return lro_scheduler.wait(LongRunningOperation('Starting {}'.format(name)), result)
             elif isinstance(result, Paged):
                 return list(result)
             else:
@@ -364,6 +598,7 @@ def create_command(module_name, name, operation,
 
     cmd = CliCommand(name, _execute_command, table_transformer=table_transformer,
                      arguments_loader=arguments_loader, description_loader=description_loader)
+    cmd.confirmation = confirmation
     if confirmation:
         cmd.add_argument(FORCE_PARAM_NAME,
                          action='store_true',
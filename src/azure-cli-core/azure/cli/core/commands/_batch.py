@@ -0,0 +1,145 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Coalescing of concurrent Azure Resource Manager GET requests into batch requests.
+
+While the application runs a show command for many resources (--ids), the GET requests the
+command sends from its threads are collected for a short time and sent to the ARM batch endpoint
+together, up to MAX_BATCH_SIZE at once. Every caller gets back a response built from its part of
+the batch response, so the SDK deserializes it as if it had been sent on its own.
+"""
+
+import json
+import threading
+import timeit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import azure.cli.core.azlogging as azlogging
+from azure.cli.core.application import APPLICATION, MAX_BATCH_SIZE
+
+logger = azlogging.get_az_logger(__name__)
+
+BATCH_API_VERSION = '2015-11-01'
+BATCH_LINGER_SEC = 0.05
+
+
+class _PendingRequest(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self, request, headers, config):
+        self.request = request
+        self.headers = headers
+        self.config = config
+        self.response = None
+        self.exception = None
+        self.done = threading.Event()
+
+
+class BatchCollector(object):
+    """Collects the requests submitted from many threads into batches. The first request of a
+    batch waits up to `linger` seconds for others to join, then sends the batch with `send_batch`.
+    """
+
+    def __init__(self, send_batch, max_size=MAX_BATCH_SIZE, linger=BATCH_LINGER_SEC):
+        self.send_batch = send_batch
+        self.max_size = max_size
+        self.linger = linger
+        self._open_batch = None
+        self._condition = threading.Condition()
+
+    def submit(self, pending):
+        with self._condition:
+            leader = self._open_batch is None or len(self._open_batch) >= self.max_size
+            if leader:
+                self._open_batch = []
+            batch = self._open_batch
+            batch.append(pending)
+            if len(batch) >= self.max_size:
+                self._condition.notify_all()
+            if leader:
+                deadline = timeit.default_timer() + self.linger
+                while len(batch) < self.max_size:
+                    remaining = deadline - timeit.default_timer()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._open_batch is batch:
+                    self._open_batch = None
+
+        if leader:
+            try:
+                self.send_batch(batch)
+            except Exception as ex:  # pylint: disable=broad-except
+                for item in batch:
+                    if not item.done.is_set():
+                        item.exception = ex
+                        item.done.set()
+
+        pending.done.wait()
+        if pending.exception:
+            raise pending.exception
+        return pending.response
+
+
+def _build_response(request, result):
+    response = requests.Response()
+    response.status_code = int(result.get('httpStatusCode', 500))
+    response.headers = CaseInsensitiveDict(result.get('headers') or {})
+    content = result.get('content')
+    response._content = json.dumps(content).encode('utf-8') if content is not None else b''  # pylint: disable=protected-access
+    response.url = request.url
+    response.reason = ''
+    return response
+
+
+def _send_batch(service_client, send, batch):
+    if len(batch) == 1:
+        item = batch[0]
+        item.response = send(item.request, item.headers, **item.config)
+        item.done.set()
+        return
+
+    batch_request = service_client.post('/batch', {'api-version': BATCH_API_VERSION})
+    body = {'requests': [{'httpMethod': 'GET', 'url': item.request.url} for item in batch]}
+    batch_response = send(batch_request, {'Content-Type': 'application/json'}, body)
+    try:
+        results = batch_response.json()['responses'] if batch_response.status_code == 200 \
+            else None
+    except (KeyError, ValueError):
+        results = None
+
+    if results is None or len(results) != len(batch):
+        logger.debug('Batch request failed with status %s, sending %d requests one by one',
+                     batch_response.status_code, len(batch))
+        for item in batch:
+            try:
+                item.response = send(item.request, item.headers, **item.config)
+            except Exception as ex:  # pylint: disable=broad-except
+                item.exception = ex
+            item.done.set()
+        return
+
+    logger.debug('Sent %d requests in one batch request', len(batch))
+    for item, result in zip(batch, results):
+        item.response = _build_response(item.request, result)
+        item.done.set()
+
+
+def enable_batching(client):
+    """Send the GET requests of a management client through the batch collector while the
+    application batches requests.
+    """
+    service_client = client._client  # pylint: disable=protected-access
+    send = service_client.send
+    collector = BatchCollector(lambda batch: _send_batch(service_client, send, batch))
+
+    def _send(request, headers=None, content=None, **config):
+        if content is not None or request.method != 'GET' or \
+                not APPLICATION.session.get('batch_get_requests', False):
+            return send(request, headers, content, **config)
+        return collector.submit(_PendingRequest(request, headers, config))
+
+    service_client.send = _send
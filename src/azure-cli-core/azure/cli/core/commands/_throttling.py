@@ -0,0 +1,155 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Client side throttling of Azure Resource Manager requests.
+
+ARM limits the number of reads and writes per subscription and hour, and reports the remaining
+quota in the 'x-ms-ratelimit-remaining-subscription-reads/writes' response headers. Requests to a
+subscription take a token from the subscription's read or write bucket. The buckets never hold
+more tokens than the quota ARM reports as remaining, and refill at the hourly quota rate, so the
+requests are spaced out once the quota runs low instead of being rejected with 429.
+"""
+
+import atexit
+import re
+import threading
+import time
+import timeit
+
+import azure.cli.core.azlogging as azlogging
+
+logger = azlogging.get_az_logger(__name__)
+
+ARM_READS_PER_HOUR = 12000
+ARM_WRITES_PER_HOUR = 1200
+REMAINING_READS_HEADER = 'x-ms-ratelimit-remaining-subscription-reads'
+REMAINING_WRITES_HEADER = 'x-ms-ratelimit-remaining-subscription-writes'
+THROTTLED_STATUS_CODES = (429, 503)
+READ_METHODS = ('GET', 'HEAD')
+
+_subscription_regex = re.compile(r'/subscriptions/([^/?]+)', re.IGNORECASE)
+
+
+class TokenBucket(object):
+    """Thread-safe token bucket refilled at `rate` tokens per second up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = timeit.default_timer()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = timeit.default_timer()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Take a token, sleeping until one is available. Return the number of seconds slept."""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def limit(self, remaining):
+        """Hold no more tokens than `remaining`."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, remaining)
+
+
+class ThrottlingStats(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self.requests = 0
+        self.throttled_responses = 0
+        self.wait_seconds = 0.0
+        self.lowest_remaining = {REMAINING_READS_HEADER: None, REMAINING_WRITES_HEADER: None}
+        self._lock = threading.Lock()
+
+    def record_request(self, wait):
+        with self._lock:
+            self.requests += 1
+            self.wait_seconds += wait
+
+    def record_response(self, throttled_responses, remaining):
+        with self._lock:
+            self.throttled_responses += throttled_responses
+            for header, value in remaining.items():
+                lowest = self.lowest_remaining[header]
+                self.lowest_remaining[header] = value if lowest is None else min(lowest, value)
+
+    def report(self):
+        if not self.requests:
+            return
+        logger.debug('ARM throttling: %d requests, %d throttled responses retried, %.3f seconds '
+                     'waited for quota, lowest remaining reads %s, writes %s',
+                     self.requests, self.throttled_responses, self.wait_seconds,
+                     self.lowest_remaining[REMAINING_READS_HEADER],
+                     self.lowest_remaining[REMAINING_WRITES_HEADER])
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+stats = ThrottlingStats()
+atexit.register(stats.report)
+
+
+def _get_bucket(subscription_id, is_read):
+    key = (subscription_id.lower(), is_read)
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            quota = ARM_READS_PER_HOUR if is_read else ARM_WRITES_PER_HOUR
+            bucket = _buckets[key] = TokenBucket(quota / 3600.0, quota)
+        return bucket
+
+
+def _parse_request(request):
+    match = _subscription_regex.search(request.url or '')
+    return (match.group(1) if match else None), request.method.upper() in READ_METHODS
+
+
+def before_request(adapter, request, *args, **kwargs):  # pylint: disable=unused-argument
+    subscription_id, is_read = _parse_request(request)
+    wait = _get_bucket(subscription_id, is_read).acquire() if subscription_id else 0
+    stats.record_request(wait)
+
+
+def after_response(adapter, request, response, *args, **kwargs):  # pylint: disable=unused-argument
+    result = kwargs['result']
+    retries = getattr(response, 'retries', None)
+    throttled_responses = sum(1 for attempt in getattr(retries, 'history', None) or ()
+                              if attempt.status in THROTTLED_STATUS_CODES)
+
+    remaining = {}
+    subscription_id, is_read = _parse_request(request)
+    header = REMAINING_READS_HEADER if is_read else REMAINING_WRITES_HEADER
+    try:
+        remaining[header] = int(result.headers[header])
+    except (KeyError, TypeError, ValueError):
+        pass
+    if subscription_id and header in remaining:
+        _get_bucket(subscription_id, is_read).limit(remaining[header])
+    stats.record_response(throttled_responses, remaining)
+    return result
+
+
+def enable_throttling(client):
+    """Add the throttling stage to the pipeline of a management client, and retry throttled
+    requests after the interval given by their 'Retry-After' header.
+    """
+    service_client = client._client  # pylint: disable=protected-access
+    service_client.add_hook('request', before_request)
+    service_client.add_hook('response', after_response, precall=False)
+
+    retry = client.config.retry_policy.policy
+    retry.status_forcelist = sorted(set(retry.status_forcelist or []).union(
+        THROTTLED_STATUS_CODES))
+    retry.respect_retry_after_header = True
@@ -4,12 +4,17 @@
 # --------------------------------------------------------------------------------------------
 
 import argparse
+import copy
+import inspect
 import re
 import json
 from six import string_types
 
 from azure.cli.core.commands import (CliCommand,
+                                     CliCommandArgument,
+                                     LongRunningOperation,
                                      get_op_handler,
+                                     lro_scheduler,
                                      command_table as main_command_table,
                                      command_module_map as main_command_module_map)
 from azure.cli.core.commands._introspection import extract_args_from_signature
@@ -180,6 +185,14 @@ def add_id_parameters(command_table):
                              type=ResourceId,
                              validator=required_values_validator,
                              arg_group=group_name)
+        command.add_argument('max_parallel',
+                             '--max-parallel',
+                             dest='_max_parallel',
+                             metavar='N',
+                             type=int,
+                             help='Maximum number of resource IDs to process in parallel. '
+                                  'Defaults to the [core] max_parallel configuration or 1.',
+                             arg_group=group_name)
 
     for command in command_table.values():
         command_loaded_handler(command)
@@ -205,12 +218,52 @@ def _get_child(parent, collection_name, item_name, collection_key):
         return result
 
 
+_CURRENT_ETAG = '_CURRENT_ETAG'
+
+
+def _get_if_match_etag(if_match, original):
+    if if_match != _CURRENT_ETAG:
+        return if_match
+    etag = getattr(original, 'etag', None)
+    if not etag:
+        raise CLIError('the resource has no ETag, specify one with --if-match ETAG')
+    return etag
+
+
+def _get_patch(original, updated):
+    """Return a copy of the updated model without the unchanged properties, which the
+    serializer leaves out of the request. Required properties are kept.
+    """
+    validation = getattr(updated, '_validation', {})
+    patch = copy.copy(updated)
+    for key, value in vars(updated).items():
+        if validation.get(key, {}).get('required'):
+            continue
+        if todict(value) == todict(getattr(original, key, None)):
+            setattr(patch, key, None)
+    return patch
+
+
+def _clears_property(original, updated):
+    """Return whether a property set in the original is removed or set to null in the updated
+    model. The serializer leaves null properties out of a PATCH, so these need a PUT.
+    """
+    if isinstance(original, dict) and isinstance(updated, dict):
+        return any(_clears_property(value, updated[key]) if updated.get(key) is not None
+                   else value is not None for key, value in original.items())
+    return False
+
+
 # pylint: disable=too-many-arguments
 def cli_generic_update_command(module_name, name, getter_op, setter_op, factory=None,
                                setter_arg_name='parameters', table_transformer=None,
                                child_collection_prop_name=None, child_collection_key='name',
                                child_arg_name='item_name', custom_function_op=None,
-                               no_wait_param=None, transform=None):
+                               no_wait_param=None, transform=None, patcher_op=None):
+    """Register a command which gets a resource, applies --set/--add/--remove to it and sets
+    it back. `patcher_op`, for resources that support PATCH, is an operation with the signature
+    of the setter which is sent only the changed properties.
+    """
     if not isinstance(getter_op, string_types):
         raise ValueError("Getter operation must be a string. Got '{}'".format(getter_op))
     if not isinstance(setter_op, string_types):
@@ -218,6 +271,8 @@ def cli_generic_update_command(module_name, name, getter_op, setter_op, factory=
     if custom_function_op and not isinstance(custom_function_op, string_types):
         raise ValueError("Custom function operation must be a string. Got '{}'".format(
             custom_function_op))
+    if patcher_op and not isinstance(patcher_op, string_types):
+        raise ValueError("Patcher operation must be a string. Got '{}'".format(patcher_op))
 
     def get_arguments_loader():
         return dict(extract_args_from_signature(get_op_handler(getter_op)))
@@ -239,12 +294,20 @@ def cli_generic_update_command(module_name, name, getter_op, setter_op, factory=
         arguments.pop('parent', None)
         arguments.pop('expand', None)  # possibly inherited from the getter
         arguments.pop(setter_arg_name, None)
+        # the ETag is sent in a header, which only some setters accept
+        if _accepts_custom_headers(get_op_handler(setter_op)):
+            arguments['if_match'] = CliCommandArgument(
+                'if_match', options_list=('--if-match',), nargs='?', const=_CURRENT_ETAG,
+                metavar='ETAG', arg_group='Generic Update',
+                help='Update only if the resource has not changed since it had this ETag. '
+                'Without a value, the ETag the resource had when it was read is used.')
         return arguments
 
     def handler(args):  # pylint: disable=too-many-branches,too-many-statements
         from msrestazure.azure_operation import AzureOperationPoller
 
         ordered_arguments = args.pop('ordered_arguments') if 'ordered_arguments' in args else []
+        if_match = args.pop('if_match', None)
 
         try:
             client = factory() if factory else None
@@ -265,8 +328,10 @@ def cli_generic_update_command(module_name, name, getter_op, setter_op, factory=
         else:
             parent = None
             instance = getter(client, **getterargs) if client else getter(**getterargs)
+        original = copy.deepcopy(parent if child_collection_prop_name else instance)
 
         # pass instance to the custom_function, if provided
+        custom_func_args = {}
         if custom_function_op:
             custom_function = get_op_handler(custom_function_op)
             custom_func_args = {k: v for k, v in args.items() if k in function_arguments_loader()}
@@ -284,28 +349,63 @@ def cli_generic_update_command(module_name, name, getter_op, setter_op, factory=
         for key, val in args.items():
             ordered_arguments.append((key, val))
 
+        # the objects found for a path are remembered while applying all the expressions
+        resolver = PropertyResolver(instance)
         for arg in ordered_arguments:
             arg_type, arg_values = arg
             if arg_type == '--set':
                 try:
                     for expression in arg_values:
-                        set_properties(instance, expression)
+                        set_properties(instance, expression, resolver)
                 except ValueError:
                     raise CLIError('invalid syntax: {}'.format(set_usage))
             elif arg_type == '--add':
                 try:
-                    add_properties(instance, arg_values)
+                    add_properties(instance, arg_values, resolver)
                 except ValueError:
                     raise CLIError('invalid syntax: {}'.format(add_usage))
             elif arg_type == '--remove':
                 try:
-                    remove_properties(instance, arg_values)
+                    remove_properties(instance, arg_values, resolver)
                 except ValueError:
                     raise CLIError('invalid syntax: {}'.format(remove_usage))
 
+        def _finish(result):
+            if child_collection_prop_name:
+                result = _get_child(
+                    result,
+                    child_collection_prop_name,
+                    args.get(child_arg_name),
+                    child_collection_key
+                )
+
+            # apply results transform if specified
+            if transform:
+                return transform(result)
+
+            return result
+
         # Done... update the instance!
-        getterargs[setter_arg_name] = parent if child_collection_prop_name else instance
-        setter = get_op_handler(setter_op)
+        updated = parent if child_collection_prop_name else instance
+        # an update which asks for changes that are already in place is skipped, while one
+        # which asks for none still sets the resource as it is
+        changes_requested = any(arg_type in ('--set', '--add', '--remove')
+                                for arg_type, _ in ordered_arguments) or \
+            any(v not in (None, False, []) for v in custom_func_args.values())
+        if changes_requested and todict(updated) == todict(original):
+            logger.info('No changes to %s, skipping the update.', name)
+            return _finish(updated)
+
+        # a property which is cleared is only sent by the setter
+        use_patch = patcher_op and not _clears_property(todict(original), todict(updated))
+        if use_patch and if_match:
+            # the ETag can only be sent by a patcher which accepts headers
+            use_patch = _accepts_custom_headers(get_op_handler(patcher_op))
+        setter = get_op_handler(patcher_op if use_patch else setter_op)
+        getterargs[setter_arg_name] = _get_patch(original, updated) if use_patch else updated
+        if if_match:
+            etag = _get_if_match_etag(if_match, original)
+            getterargs['custom_headers'] = {'If-Match': etag}
         no_wait = no_wait_param and setterargs.get(no_wait_param, None)
         if no_wait:
             getterargs[no_wait_param] = True
@@ -315,20 +415,10 @@ def cli_generic_update_command(module_name, name, getter_op, setter_op, factory=
         if no_wait:
             return None
 
-        result = opres.result() if isinstance(opres, AzureOperationPoller) else opres
-        if child_collection_prop_name:
-            result = _get_child(
-                result,
-                child_collection_prop_name,
-                args.get(child_arg_name),
-                child_collection_key
-            )
-
-        # apply results transform if specified
-        if transform:
-            return transform(result)
-
-        return result
+        if isinstance(opres, AzureOperationPoller):
+            return lro_scheduler.wait(LongRunningOperation('Updating {}'.format(name)), opres,
+                                      then=_finish)
+        return _finish(opres)
 
     class OrderedArgsAction(argparse.Action):  # pylint:disable=too-few-public-methods
 
@@ -356,6 +446,9 @@ def cli_generic_update_command(module_name, name, getter_op, setter_op, factory=
     main_command_module_map[name] = module_name
 
 
+_WAIT_INITIAL_INTERVAL = 2
+
+
 def cli_generic_wait_command(module_name, name, getter_op, factory=None):
 
     if not isinstance(getter_op, string_types):
@@ -378,8 +471,9 @@ def cli_generic_wait_command(module_name, name, getter_op, factory=None):
                 provisioning_state = getattr(properties, 'provisioning_state', None)
         return provisioning_state
 
-    def handler(args):
+    def handler(args):  # pylint: disable=too-many-statements
         from msrest.exceptions import ClientException
+        from jmespath import compile as compile_jmespath
         import time
         try:
             client = factory() if factory else None
@@ -390,9 +484,11 @@ def cli_generic_wait_command(module_name, name, getter_op, factory=None):
                       if key in get_arguments_loader()}
 
         getter = get_op_handler(getter_op)
+        use_etag = _accepts_custom_headers(getter)
 
         timeout = args.pop('timeout')
         interval = args.pop('interval')
+        wait_for_any = args.pop('any')
         wait_for_created = args.pop('created')
         wait_for_deleted = args.pop('deleted')
         wait_for_updated = args.pop('updated')
@@ -402,40 +498,72 @@ def cli_generic_wait_command(module_name, name, getter_op, factory=None):
                     wait_for_exists, custom_condition]):
             raise CLIError(
                 "incorrect usage: --created | --updated | --deleted | --exists | --custom JMESPATH")  # pylint: disable=line-too-long
-
-        for _ in range(0, timeout, interval):
+        custom_query = compile_jmespath(custom_condition) if custom_condition else None
+
+        # with --ids the command receives a list of values for each part of the resource ids
+        list_args = {key: val for key, val in getterargs.items() if isinstance(val, IterateValue)}
+        targets = [dict(getterargs, **dict(zip(list_args.keys(), values)))
+                   for values in zip(*list_args.values())] if list_args else [getterargs]
+        etags = [None] * len(targets)
+
+        def condition_met(index):
+            kwargs = targets[index]
+            if etags[index]:
+                kwargs = dict(kwargs, custom_headers={'If-None-Match': etags[index]})
             try:
-                instance = getter(client, **getterargs) if client else getter(**getterargs)
+                instance = getter(client, **kwargs) if client else getter(**kwargs)
                 if wait_for_exists:
-                    return
+                    return True
                 provisioning_state = get_provisioning_state(instance)
                 # until we have any needs to wait for 'Failed', let us bail out on this
                 if provisioning_state == 'Failed':
                     raise CLIError('The operation failed')
                 if wait_for_created or wait_for_updated:
                     if provisioning_state == 'Succeeded':
-                        return
-                if custom_condition and bool(verify_property(instance, custom_condition)):
-                    return
+                        return True
+                if custom_query and bool(custom_query.search(todict(instance))):
+                    return True
+                if use_etag:
+                    etags[index] = getattr(instance, 'etag', None)
             except ClientException as ex:
-                if getattr(ex, 'status_code', None) == 404:
+                status_code = getattr(ex, 'status_code', None)
+                if status_code == 304:
+                    # not modified since the last poll, so the condition still isn't met
+                    return False
+                if status_code == 404:
                     if wait_for_deleted:
-                        return
+                        return True
                     if not any([wait_for_created, wait_for_exists, custom_condition]):
                         raise
                 else:
                     raise
-
-            time.sleep(interval)
-
-        return CLIError('Wait operation timed-out after {} seconds'.format(timeout))
+            return False
+
+        deadline = time.time() + timeout
+        delay = min(_WAIT_INITIAL_INTERVAL, interval)
+        pending = list(range(len(targets)))
+        while True:
+            pending = [index for index in pending if not condition_met(index)]
+            if not pending or (wait_for_any and len(pending) < len(targets)):
+                return
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise CLIError('Wait operation timed-out after {} seconds'.format(timeout))
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, interval)
 
     cmd = CliCommand(name, handler, arguments_loader=arguments_loader)
+    # all the resources given with --ids are waited for from a single polling loop
+    cmd.explode_list_args = False
     group_name = 'Wait Condition'
     cmd.add_argument('timeout', '--timeout', default=3600, arg_group=group_name, type=int,
                      help='maximum wait in seconds')
     cmd.add_argument('interval', '--interval', default=30, arg_group=group_name, type=int,
-                     help='polling interval in seconds')
+                     help='maximum polling interval in seconds. Polling starts more frequently '
+                          'and backs off to this interval')
+    cmd.add_argument('any', '--any', action='store_true', arg_group=group_name,
+                     help='with --ids, wait till any of the resources satisfies the condition '
+                          'instead of all of them')
     cmd.add_argument('deleted', '--deleted', action='store_true', arg_group=group_name,
                      help='wait till deleted')
     cmd.add_argument('created', '--created', action='store_true', arg_group=group_name,
@@ -452,6 +580,14 @@ def cli_generic_wait_command(module_name, name, getter_op, factory=None):
     main_command_module_map[name] = module_name
 
 
+def _accepts_custom_headers(operation):
+    try:
+        parameters = inspect.signature(operation).parameters
+    except AttributeError:
+        parameters = inspect.getargspec(operation).args  # pylint: disable=deprecated-method
+    return 'custom_headers' in parameters
+
+
 def verify_property(instance, condition):
     from jmespath import compile as compile_jmespath
     result = todict(instance)
@@ -463,7 +599,7 @@ def verify_property(instance, condition):
 index_or_filter_regex = re.compile(r'\[(.*)\]')
 
 
-def set_properties(instance, expression):
+def set_properties(instance, expression, resolver=None):
     key, value = expression.rsplit('=', 1)
 
     try:
@@ -471,15 +607,16 @@ def set_properties(instance, expression):
     except:  # pylint:disable=bare-except
         pass
 
+    resolver = resolver or PropertyResolver(instance)
     # name should be the raw casing as it could refer to a property OR a dictionary key
     name, path = _get_name_path(key)
     parent_name = path[-1] if path else 'root'
-    root = instance
-    instance = _find_property(instance, path)
+    instance = resolver.find(path)
     if instance is None:
-        parent = _find_property(root, path[:-1])
+        parent = resolver.find(path[:-1])
         set_properties(parent, '{}={{}}'.format(parent_name))
-        instance = _find_property(root, path)
+        resolver.invalidate(parent)
+        instance = resolver.find(path)
 
     match = index_or_filter_regex.match(name)
     index_value = int(match.group(1)) if match else None
@@ -497,24 +634,28 @@ def set_properties(instance, expression):
                 logger.warning(
                     "Property '%s' not found on %s. Update may be ignored.", name, parent_name)
             setattr(instance, name, value)
+        resolver.invalidate(instance)
     except IndexError:
         raise CLIError('index {} doesn\'t exist on {}'.format(index_value, name))
     except (AttributeError, KeyError):
         show_options(instance, name, key.split('.'))
 
 
-def add_properties(instance, argument_values):
+def add_properties(instance, argument_values, resolver=None):
+    resolver = resolver or PropertyResolver(instance)
     # The first argument indicates the path to the collection to add to.
     list_attribute_path = _get_internal_path(argument_values.pop(0))
-    list_to_add_to = _find_property(instance, list_attribute_path)
+    list_to_add_to = resolver.find(list_attribute_path)
 
     if list_to_add_to is None:
-        parent = _find_property(instance, list_attribute_path[:-1])
+        parent = resolver.find(list_attribute_path[:-1])
         set_properties(parent, '{}=[]'.format(list_attribute_path[-1]))
-        list_to_add_to = _find_property(instance, list_attribute_path)
+        resolver.invalidate(parent)
+        list_to_add_to = resolver.find(list_attribute_path)
 
     if not isinstance(list_to_add_to, list):
         raise ValueError
+    resolver.invalidate(list_to_add_to)
 
     dict_entry = {}
     for argument in argument_values:
@@ -542,7 +683,8 @@ def add_properties(instance, argument_values):
         list_to_add_to.append(dict_entry)
 
 
-def remove_properties(instance, argument_values):
+def remove_properties(instance, argument_values, resolver=None):
+    resolver = resolver or PropertyResolver(instance)
     # The first argument indicates the path to the collection to add to.
     argument_values = argument_values if isinstance(argument_values, list) else [argument_values]
 
@@ -554,8 +696,9 @@ def remove_properties(instance, argument_values):
         pass
 
     if not list_index:
-        _find_property(instance, list_attribute_path)
-        parent_to_remove_from = _find_property(instance, list_attribute_path[:-1])
+        resolver.find(list_attribute_path)
+        parent_to_remove_from = resolver.find(list_attribute_path[:-1])
+        resolver.invalidate(parent_to_remove_from)
         if isinstance(parent_to_remove_from, dict):
             del parent_to_remove_from[list_attribute_path[-1]]
         elif hasattr(parent_to_remove_from, make_snake_case(list_attribute_path[-1])):
@@ -563,7 +706,8 @@ def remove_properties(instance, argument_values):
         else:
             raise ValueError
     else:
-        list_to_remove_from = _find_property(instance, list_attribute_path)
+        list_to_remove_from = resolver.find(list_attribute_path)
+        resolver.invalidate(list_to_remove_from)
         try:
             list_to_remove_from.pop(int(list_index))
         except IndexError:
@@ -608,17 +752,100 @@ def make_camel_case(s):
 internal_path_regex = re.compile(r'(\[.*?\])|([^.]+)')
 
 
+_MAX_COMPILED_PATHS = 1024
+_compiled_paths = {}
+_compiled_steps = {}
+
+
+def _cache(cache, key, value):
+    if len(cache) >= _MAX_COMPILED_PATHS:
+        cache.clear()
+    cache[key] = value
+    return value
+
+
 def _get_internal_path(path):
+    try:
+        return list(_compiled_paths[path])
+    except KeyError:
+        pass
     # to handle indexing in the same way as other dot qualifiers,
     # we split paths like foo[0][1] into foo.[0].[1]
-    path = path.replace('.[', '[').replace('[', '.[')
-    path_segment_pairs = internal_path_regex.findall(path)
+    normalized_path = path.replace('.[', '[').replace('[', '.[')
+    path_segment_pairs = internal_path_regex.findall(normalized_path)
     final_paths = []
     for regex_result in path_segment_pairs:
         # the regex matches two capture group, one of which will be None
         segment = regex_result[0] or regex_result[1]
         final_paths.append(segment)
-    return final_paths
+    return list(_cache(_compiled_paths, path, tuple(final_paths)))
+
+
+class _PathStep(object):  # pylint: disable=too-few-public-methods
+    """A step of a property path: an attribute or dictionary key, a list index ([0]) or a list
+    filter ([key=value]).
+    """
+
+    def __init__(self, part):
+        self.part = part
+        self.snake_name = make_snake_case(part)
+        index = index_or_filter_regex.match(part)
+        self.is_index = index is not None
+        self.is_filter = self.is_index and '=' in index.group(1)
+        self.selector = index.group(1) if index else None
+
+
+def _compile_step(part):
+    step = _compiled_steps.get(part)
+    if step is None:
+        step = _cache(_compiled_steps, part, _PathStep(part))
+    return step
+
+
+class PropertyResolver(object):
+    """Finds the objects at property paths of an instance. The objects found on the way are
+    remembered, so paths sharing a prefix don't walk it again. Call `invalidate` with an
+    object after modifying it.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._found = {}
+        # paths found from each object, paths filtering each list, and the parent of each object
+        self._children = {}
+        self._filters = {}
+        self._parents = {}
+
+    def find(self, path):
+        path = tuple(path)
+        instance, start = self.root, 0
+        for end in range(len(path), 0, -1):
+            if path[:end] in self._found:
+                instance, start = self._found[path[:end]], end
+                break
+        for end in range(start, len(path)):
+            parent = instance
+            instance = _update_instance(parent, path[end], path)
+            key = path[:end + 1]
+            self._found[key] = instance
+            self._children.setdefault(id(parent), []).append(key)
+            if _compile_step(path[end]).is_filter:
+                self._filters.setdefault(id(parent), []).append(key)
+            self._parents[id(instance)] = parent
+        return instance
+
+    def invalidate(self, modified):
+        """Forget the paths found from the modified object, and the paths which filter the list
+        containing it.
+        """
+        stale = list(self._children.pop(id(modified), []))
+        parent = self._parents.get(id(modified))
+        if isinstance(parent, list):
+            stale.extend(self._filters.pop(id(parent), []))
+        while stale:
+            key = stale.pop()
+            if key in self._found:
+                stale.extend(self._children.pop(id(self._found.pop(key)), []))
 
 
 def _get_name_path(path):
@@ -627,21 +854,22 @@ def _get_name_path(path):
 
 
 def _update_instance(instance, part, path):
+    step = _compile_step(part)
     try:  # pylint: disable=too-many-nested-blocks
-        index = index_or_filter_regex.match(part)
-        if index:
+        if step.is_index:
             # indexing on anything but a list is not allowed
             if not isinstance(instance, list):
                 show_options(instance, part, path)
 
-            if '=' in index.group(1):
-                key, value = index.group(1).split('=')
+            if step.is_filter:
+                key, value = step.selector.split('=')
+                snake_key = _compile_step(key).snake_name
                 matches = []
                 for x in instance:
                     if isinstance(x, dict) and x.get(key, None) == value:
                         matches.append(x)
                     elif not isinstance(x, dict):
-                        key = make_snake_case(key)
+                        key = snake_key
                         if hasattr(x, key) and getattr(x, key, None) == value:
                             matches.append(x)
                 if len(matches) == 1:
@@ -655,7 +883,7 @@ def _update_instance(instance, part, path):
                         value, key, path[-2]))
             else:
                 try:
-                    index_value = int(index.group(1))
+                    index_value = int(step.selector)
                     instance = instance[index_value]
                 except IndexError:
                     raise CLIError('index {} doesn\'t exist on {}'.format(
@@ -663,13 +891,7 @@ def _update_instance(instance, part, path):
         elif isinstance(instance, dict):
             instance = instance[part]
         else:
-            instance = getattr(instance, make_snake_case(part))
+            instance = getattr(instance, step.snake_name)
     except (AttributeError, KeyError):
         show_options(instance, part, path)
     return instance
-
-
-def _find_property(instance, path):
-    for part in path:
-        instance = _update_instance(instance, part, path)
-    return instance
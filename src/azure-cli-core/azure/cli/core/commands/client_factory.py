@@ -3,18 +3,32 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import threading
+
 from azure.cli.core import __version__ as core_version
 from azure.cli.core._profile import Profile, CLOUD
 import azure.cli.core._debug as _debug
 import azure.cli.core.azlogging as azlogging
+from azure.cli.core._config import az_config
 from azure.cli.core._util import CLIError
 from azure.cli.core.application import APPLICATION
+from azure.cli.core.commands._batch import enable_batching
+from azure.cli.core.commands._throttling import enable_throttling
 from azure.storage._error import _ERROR_STORAGE_MISSING_INFO
+from msrest.pipeline import ClientHTTPAdapter
 
 logger = azlogging.get_az_logger(__name__)
 
 UA_AGENT = "AZURECLI/{}".format(core_version)
 
+DEFAULT_CONNECTION_POOL_SIZE = 10
+
+# Management clients are reused for the lifetime of the process, keyed by client type,
+# subscription, api version and account. All of them share one pool of keep-alive connections.
+_client_cache = {}
+_client_cache_lock = threading.Lock()
+_shared_adapter = None
+
 
 def get_mgmt_service_client(client_type, subscription_id=None, api_version=None):
     client, _ = _get_mgmt_service_client(client_type, subscription_id=subscription_id,
@@ -30,25 +44,96 @@ def configure_common_settings(client):
     client = _debug.allow_debug_connection(client)
 
     client.config.add_user_agent(UA_AGENT)
+    enable_throttling(client)
+    # the session headers are added to the requests sent together in a batch request too
+    _add_session_headers(client)
+    enable_batching(client)
 
-    for header, value in APPLICATION.session['headers'].items():
-        # We are working with the autorest team to expose the add_header
-        # functionality of the generated client to avoid having to access
-        # private members
-        client._client.add_header(header, value)  # pylint: disable=protected-access
-
-    command_name_suffix = ';completer-request' if APPLICATION.session['completer_active'] else ''
-    client._client.add_header('CommandName',  # pylint: disable=protected-access
-                              "{}{}".format(APPLICATION.session['command'], command_name_suffix))
     client.config.generate_client_request_id = \
         'x-ms-client-request-id' not in APPLICATION.session['headers']
 
 
+def _get_session_headers():
+    headers = dict(APPLICATION.session['headers'])
+    command_name_suffix = ';completer-request' if APPLICATION.session['completer_active'] else ''
+    headers['CommandName'] = "{}{}".format(APPLICATION.session['command'], command_name_suffix)
+    return headers
+
+
+def _add_session_headers(client):
+    # The headers are added to each request as it is sent, rather than to the client, which is
+    # reused by the commands of the process and shared by the threads of a command.
+    service_client = client._client  # pylint: disable=protected-access
+    send = service_client.send
+
+    def _send(request, headers=None, content=None, **config):
+        request_headers = _get_session_headers()
+        request_headers.update(headers or {})
+        return send(request, request_headers, content, **config)
+
+    service_client.send = _send
+
+
+def _get_shared_adapter():
+    global _shared_adapter  # pylint: disable=global-statement
+    if _shared_adapter is None:
+        from requests.adapters import HTTPAdapter
+        pool_size = az_config.getint('core', 'connection_pool_size',
+                                     fallback=DEFAULT_CONNECTION_POOL_SIZE)
+        _shared_adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    return _shared_adapter
+
+
+class _SharedPoolAdapter(ClientHTTPAdapter):
+    """The adapter of a cached management client.
+
+    It draws its connections from the pool shared by all the clients. msrest sends every request
+    from a new session and closes it, which closes the adapters mounted on the session; closing
+    this adapter leaves the shared connections open. msrest also sets the retry policy of the
+    adapter before each request; this adapter always uses the policy of the client's
+    configuration, so that the threads sending requests through it don't race.
+    """
+
+    def __init__(self, config, client_hooks):
+        self._config = config
+        super(_SharedPoolAdapter, self).__init__(config)
+        self._client_hooks = client_hooks
+
+    def init_poolmanager(self, *args, **kwargs):  # pylint: disable=unused-argument
+        self.poolmanager = _get_shared_adapter().poolmanager
+
+    @property
+    def max_retries(self):
+        return self._config.retry_policy()
+
+    @max_retries.setter
+    def max_retries(self, value):
+        pass
+
+    def close(self):
+        pass
+
+
+def _use_shared_connection_pool(client):
+    service_client = client._client  # pylint: disable=protected-access
+    # the hooks added to the client's adapter are kept
+    service_client._adapter = _SharedPoolAdapter(  # pylint: disable=protected-access
+        client.config, service_client._adapter._client_hooks)  # pylint: disable=protected-access
+
+
 def _get_mgmt_service_client(client_type, subscription_bound=True, subscription_id=None,
                              api_version=None):
     logger.debug('Getting management service client client_type=%s', client_type.__name__)
     profile = Profile()
-    cred, subscription_id, _ = profile.get_login_credentials(subscription_id=subscription_id)
+    account = profile.get_subscription(subscription_id)
+    cache_key = (client_type, subscription_bound, account['id'], api_version,
+                 account['user']['name'], CLOUD.endpoints.resource_manager)
+    with _client_cache_lock:
+        cached = _client_cache.get(cache_key)
+    if cached:
+        return cached
+
+    cred, subscription_id, _ = profile.get_login_credentials(subscription_id=account['id'])
     client_kwargs = {'base_url': CLOUD.endpoints.resource_manager}
     if api_version:
         client_kwargs['api_version'] = api_version
@@ -58,8 +143,10 @@ def _get_mgmt_service_client(client_type, subscription_bound=True, subscription_
         client = client_type(cred, **client_kwargs)
 
     configure_common_settings(client)
+    _use_shared_connection_pool(client)
 
-    return (client, subscription_id)
+    with _client_cache_lock:
+        return _client_cache.setdefault(cache_key, (client, subscription_id))
 
 
 def get_data_service_client(service_type, account_name, account_key, connection_string=None,  # pylint: disable=too-many-arguments
@@ -53,9 +53,11 @@ def call_once(factory_func):
     factory_func.executed = False
     factory_func.cached_result = None
 
+    @wraps(factory_func)
     def _wrapped(*args, **kwargs):
         if not factory_func.executed:
             factory_func.cached_result = factory_func(*args, **kwargs)
+            factory_func.executed = True
 
         return factory_func.cached_result
     return _wrapped
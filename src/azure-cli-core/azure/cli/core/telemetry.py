@@ -10,6 +10,7 @@ import os
 import platform
 import re
 import sys
+import time
 import traceback
 import uuid
 from functools import wraps
@@ -20,6 +21,8 @@ import azure.cli.core.telemetry_upload as telemetry_core
 PRODUCT_NAME = 'azurecli'
 TELEMETRY_VERSION = '0.0.1.4'
 AZURE_CLI_PREFIX = 'Context.Default.AzureCLI.'
+HOST_PROPERTIES_CACHE_FILE_NAME = 'telemetry.cache'
+HOST_PROPERTIES_CACHE_MAX_AGE = 24 * 60 * 60
 
 decorators.is_diagnostics_mode = telemetry_core.in_diagnostic_mode
 
@@ -86,6 +89,7 @@ class TelemetrySession(object):  # pylint: disable=too-many-instance-attributes
         return _remove_symbols(payload)
 
     def _get_base_properties(self):
+        host = _get_host_properties()
         return {
             'Reserved.ChannelUsed': 'AI',
             'Reserved.EventId': str(uuid.uuid4()),
@@ -104,11 +108,11 @@ class TelemetrySession(object):  # pylint: disable=too-many-instance-attributes
             'Context.Default.VS.Core.ExeName': PRODUCT_NAME,
             'Context.Default.VS.Core.ExeVersion': '{}@{}'.format(
                 self.product_version, self.module_version),
-            'Context.Default.VS.Core.MacAddressHash': _get_hash_mac_address(),
-            'Context.Default.VS.Core.Machine.Id': _get_hash_machine_id(),
-            'Context.Default.VS.Core.OS.Type': platform.system().lower(),  # eg. darwin, windows
-            'Context.Default.VS.Core.OS.Version': platform.version().lower(),  # eg. 10.0.14942
-            'Context.Default.VS.Core.User.Id': _get_installation_id(),
+            'Context.Default.VS.Core.MacAddressHash': host.get('mac_address_hash'),
+            'Context.Default.VS.Core.Machine.Id': host.get('machine_id'),
+            'Context.Default.VS.Core.OS.Type': host.get('os_type'),  # eg. darwin, windows
+            'Context.Default.VS.Core.OS.Version': host.get('os_version'),  # eg. 10.0.14942
+            'Context.Default.VS.Core.User.Id': host.get('installation_id'),
             'Context.Default.VS.Core.User.IsMicrosoftInternal': 'False',
             'Context.Default.VS.Core.User.IsOptedIn': 'True',
             'Context.Default.VS.Core.TelemetryApi.ProductVersion': '{}@{}'.format(
@@ -136,7 +140,8 @@ class TelemetrySession(object):  # pylint: disable=too-many-instance-attributes
                                    lambda: self.application.session['headers'][
                                        'x-ms-client-request-id'])
         self.set_custom_properties(result, 'CoreVersion', _get_core_version)
-        self.set_custom_properties(result, 'InstallationId', _get_installation_id)
+        self.set_custom_properties(result, 'InstallationId',
+                                   lambda: _get_host_properties().get('installation_id'))
         self.set_custom_properties(result, 'ShellType', _get_shell_type)
         self.set_custom_properties(result, 'UserAzureId', _get_user_azure_id)
         self.set_custom_properties(result, 'UserAzureSubscriptionId', _get_azure_subscription_id)
@@ -145,8 +150,7 @@ class TelemetrySession(object):  # pylint: disable=too-many-instance-attributes
                                                                        fallback='unknown'))
         self.set_custom_properties(result, 'EnvironmentVariables', _get_env_string)
         self.set_custom_properties(result, 'Locale',
-                                   lambda: '{},{}'.format(locale.getdefaultlocale()[0],
-                                                          locale.getdefaultlocale()[1]))
+                                   lambda: '{},{}'.format(*locale.getdefaultlocale()))
         self.set_custom_properties(result, 'StartTime', str(self.start_time))
         self.set_custom_properties(result, 'EndTime', str(self.end_time))
         self.set_custom_properties(result, 'OutputType', self.output_type)
@@ -205,8 +209,10 @@ def conclude():
 
     payload = _session.generate_payload()
     if payload:
-        import subprocess
-        subprocess.Popen([sys.executable, os.path.realpath(telemetry_core.__file__), payload])
+        if _get_azure_cli_config().getboolean('telemetry', 'enable_spool', fallback=False):
+            _spool_payload(payload)
+        else:
+            _start_uploader(payload)
 
 
 @decorators.suppress_all_exceptions(raise_in_diagnostics=True)
@@ -270,12 +276,83 @@ def _get_azure_cli_config():
 
 # internal utility functions
 
+def _get_telemetry_dir():
+    from azure.cli.core._environment import get_config_dir
+    return os.path.join(get_config_dir(), 'telemetry')
+
+
+def _spool_payload(payload):
+    config = _get_azure_cli_config()
+    spool_dir = _get_telemetry_dir()
+    telemetry_core.spool(spool_dir, payload,
+                         max_size=config.getint('telemetry', 'spool_max_size',
+                                                fallback=telemetry_core.DEFAULT_SPOOL_MAX_SIZE))
+    interval = config.getint('telemetry', 'spool_upload_interval',
+                             fallback=telemetry_core.DEFAULT_SPOOL_UPLOAD_INTERVAL)
+    if telemetry_core.should_upload_spool(spool_dir, interval):
+        _start_uploader(telemetry_core.SPOOL_ARG, spool_dir)
+
+
+def _start_uploader(*args):
+    import subprocess
+    subprocess.Popen([sys.executable, os.path.realpath(telemetry_core.__file__)] + list(args))
+
+
 @decorators.suppress_all_exceptions(fallback_return=None)
 def _get_core_version():
     from azure.cli.core import __version__ as core_version
     return core_version
 
 
+@decorators.call_once
+def _get_host_properties():
+    return _get_cached_host_properties(
+        os.path.join(_get_telemetry_dir(), HOST_PROPERTIES_CACHE_FILE_NAME))
+
+
+def _get_cached_host_properties(cache_path):
+    # The host and installation properties don't change between commands. Computing them involves
+    # querying the MAC address and loading the profile, so they are cached in a file which is
+    # invalidated on reboot, on upgrade, or after HOST_PROPERTIES_CACHE_MAX_AGE seconds.
+    cache_key = {'boot_id': _get_boot_id(), 'core_version': _get_core_version()}
+    try:
+        with open(cache_path, 'r') as cache_file:
+            cached = json.load(cache_file)
+        if cached['key'] == cache_key and \
+                time.time() - cached['timestamp'] < HOST_PROPERTIES_CACHE_MAX_AGE:
+            return cached['properties']
+    except (OSError, IOError, ValueError, KeyError, TypeError):
+        pass
+
+    properties = {
+        'mac_address_hash': _get_hash_mac_address(),
+        'machine_id': _get_hash_machine_id(),
+        'os_type': platform.system().lower(),
+        'os_version': platform.version().lower(),
+        'installation_id': _get_installation_id()
+    }
+    _save_host_properties(cache_path, {'key': cache_key,
+                                       'timestamp': time.time(),
+                                       'properties': properties})
+    return properties
+
+
+@decorators.suppress_all_exceptions()
+def _save_host_properties(cache_path, content):
+    cache_dir = os.path.dirname(cache_path)
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    with open(cache_path, 'w') as cache_file:
+        json.dump(content, cache_file)
+
+
+@decorators.suppress_all_exceptions(fallback_return=None)
+def _get_boot_id():
+    # Only available on Linux. Elsewhere the host properties cache expires by age alone.
+    with open('/proc/sys/kernel/random/boot_id', 'r') as boot_id_file:
+        return boot_id_file.read().strip()
+
+
 @decorators.suppress_all_exceptions(fallback_return=None)
 def _get_installation_id():
     return _get_profile().get_installation_id()
@@ -6,11 +6,18 @@
 import os
 import sys
 import json
+import time
 import azure.cli.core.decorators as decorators
 
 DIAGNOSTICS_TELEMETRY_ENV_NAME = 'AZURE_CLI_DIAGNOSTICS_TELEMETRY'
 INSTRUMENTATION_KEY = 'c4395b75-49cc-422c-bc95-c7d51aef5d46'
 
+SPOOL_ARG = '--spool'
+SPOOL_FILE_NAME = 'telemetry.spool'
+SPOOL_TIMESTAMP_FILE_NAME = 'telemetry.lastupload'
+DEFAULT_SPOOL_MAX_SIZE = 4 * 1024 * 1024
+DEFAULT_SPOOL_UPLOAD_INTERVAL = 300
+
 
 def in_diagnostic_mode():
     """
@@ -20,8 +27,118 @@ def in_diagnostic_mode():
     return bool(os.environ.get(DIAGNOSTICS_TELEMETRY_ENV_NAME, False))
 
 
+def spool(spool_dir, payload, max_size=DEFAULT_SPOOL_MAX_SIZE):
+    """
+    Append a payload to the local telemetry queue file. The queue file holds one payload per line.
+    When the file grows beyond max_size bytes, the oldest payloads are dropped.
+    """
+    if not os.path.isdir(spool_dir):
+        os.makedirs(spool_dir)
+    spool_path = os.path.join(spool_dir, SPOOL_FILE_NAME)
+    with open(spool_path, 'a') as spool_file:
+        spool_file.write(payload.replace('\n', ' ') + '\n')
+
+    if os.path.getsize(spool_path) > max_size:
+        _trim_spool(spool_path, max_size)
+
+
+def _trim_spool(spool_path, max_size):
+    with open(spool_path, 'r') as spool_file:
+        lines = spool_file.readlines()
+
+    kept = []
+    size = 0
+    for line in reversed(lines):
+        size += len(line)
+        if size > max_size:
+            break
+        kept.append(line)
+
+    temp_path = '{}.{}'.format(spool_path, os.getpid())
+    with open(temp_path, 'w') as temp_file:
+        temp_file.writelines(reversed(kept))
+    _replace(temp_path, spool_path)
+
+
+def _replace(src, dst):
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # Python 2 has no atomic replace
+        if os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+def should_upload_spool(spool_dir, interval=DEFAULT_SPOOL_UPLOAD_INTERVAL):
+    """
+    Return True if no sender has been started for the given interval (in seconds). The decision is
+    recorded so that only one of many concurrent processes starts a sender.
+    """
+    timestamp_path = os.path.join(spool_dir, SPOOL_TIMESTAMP_FILE_NAME)
+    try:
+        if time.time() - os.path.getmtime(timestamp_path) < interval:
+            return False
+    except OSError:
+        pass
+
+    with open(timestamp_path, 'a'):
+        os.utime(timestamp_path, None)
+    return True
+
+
+def drain_spool(spool_dir):
+    """
+    Take ownership of the queued payloads and return their records. The queue file is moved
+    aside first, so processes spooling in the meantime start a new queue. The caller spools the
+    records again if they cannot be uploaded.
+    """
+    spool_path = os.path.join(spool_dir, SPOOL_FILE_NAME)
+    drain_path = '{}.{}.drain'.format(spool_path, os.getpid())
+    try:
+        os.rename(spool_path, drain_path)
+    except OSError:
+        return []
+
+    records = []
+    try:
+        with open(drain_path, 'r') as drain_file:
+            for line in drain_file:
+                try:
+                    records.extend(json.loads(line))
+                except ValueError:
+                    # a partially written payload is dropped rather than failing the whole batch
+                    continue
+    finally:
+        os.remove(drain_path)
+    return records
+
+
 @decorators.suppress_all_exceptions(raise_in_diagnostics=True)
 def upload(data_to_save):
+    try:
+        data_to_save = json.loads(data_to_save.replace("'", '"'))
+    except Exception as err:  # pylint: disable=broad-except
+        if in_diagnostic_mode():
+            sys.stdout.write('{}/n'.format(str(err)))
+            sys.stdout.write('Raw [{}]/n'.format(data_to_save))
+
+    _upload_records(data_to_save)
+
+
+@decorators.suppress_all_exceptions(raise_in_diagnostics=True)
+def upload_spool(spool_dir):
+    records = drain_spool(spool_dir)
+    if records:
+        try:
+            _upload_records(records)
+        except Exception:
+            # the records are queued again, so that the next sender retries them
+            spool(spool_dir, json.dumps(records))
+            raise
+
+
+def _upload_records(records):
     from applicationinsights import TelemetryClient
     from applicationinsights.exceptions import enable
 
@@ -31,20 +148,13 @@ def upload(data_to_save):
     if in_diagnostic_mode():
         sys.stdout.write('Telemetry upload begins\n')
 
-    try:
-        data_to_save = json.loads(data_to_save.replace("'", '"'))
-    except Exception as err:  # pylint: disable=broad-except
-        if in_diagnostic_mode():
-            sys.stdout.write('{}/n'.format(str(err)))
-            sys.stdout.write('Raw [{}]/n'.format(data_to_save))
-
-    for record in data_to_save:
+    for record in records:
         client.track_event(record['name'], record['properties'])
 
     client.flush()
 
     if in_diagnostic_mode():
-        json.dump(data_to_save, sys.stdout, indent=2, sort_keys=True)
+        json.dump(records, sys.stdout, indent=2, sort_keys=True)
         sys.stdout.write('\nTelemetry upload completes\n')
 
 
@@ -52,4 +162,7 @@ if __name__ == '__main__':
     # If user doesn't agree to upload telemetry, this scripts won't be executed. The caller should
     # control.
     decorators.is_diagnostics_mode = in_diagnostic_mode
-    upload(sys.argv[1])
+    if sys.argv[1] == SPOOL_ARG:
+        upload_spool(sys.argv[2])
+    else:
+        upload(sys.argv[1])
@@ -34,6 +34,7 @@ from six import StringIO
 from azure.cli.main import main as cli_main
 
 from azure.cli.core import __version__ as core_version
+from azure.cli.core._config import az_config
 import azure.cli.core._debug as _debug
 from azure.cli.core._profile import Profile
 from azure.cli.core._util import CLIError
@@ -357,7 +358,6 @@ class VCRTestBase(unittest.TestCase):  # pylint: disable=too-many-instance-attri
                 _mock_get_mgmt_service_client)  # pylint: disable=line-too-long
     @mock.patch('msrestazure.azure_operation.AzureOperationPoller._delay', _mock_operation_delay)
     @mock.patch('time.sleep', _mock_operation_delay)
-    @mock.patch('azure.cli.core.commands.LongRunningOperation._delay', _mock_operation_delay)
     @mock.patch('azure.cli.core.commands.validators.generate_deployment_name',
                 _mock_generate_deployment_name)
     def _execute_playback(self):
@@ -426,9 +426,12 @@ class VCRTestBase(unittest.TestCase):  # pylint: disable=too-many-instance-attri
 
     def set_env(self, key, val):  # pylint: disable=no-self-use
         os.environ[key] = val
+        az_config.reload()
 
     def pop_env(self, key):  # pylint: disable=no-self-use
-        return os.environ.pop(key, None)
+        value = os.environ.pop(key, None)
+        az_config.reload()
+        return value
 
     def execute(self):
         ''' Method to actually start execution of the test. Must be called from the test_<name>
@@ -60,6 +60,42 @@ class TestApplication(unittest.TestCase):
 
         app.raise_event('other_handler_called', args='secret sauce')
 
+    def test_application_register_during_event(self):
+        calls = []
+        config = Configuration([])
+        app = Application(config)
+
+        def late_handler(**_):
+            calls.append('late')
+
+        def handler(**_):
+            calls.append('handler')
+            app.register('event', late_handler)
+            app.remove('event', handler)
+
+        app.register('event', handler)
+        app.raise_event('event')
+        self.assertEqual(calls, ['handler'])
+        app.raise_event('event')
+        self.assertEqual(calls, ['handler', 'late'])
+        with self.assertRaises(ValueError):
+            app.remove('event', handler)
+
+    def test_application_event_data_repr_is_bounded(self):
+        from collections import OrderedDict
+        from azure.cli.core.application import _event_data_repr
+
+        class Unprintable(object):  # pylint: disable=too-few-public-methods
+            def __repr__(self):
+                raise AssertionError('repr should not be needed')
+
+        command_table = OrderedDict(('command {}'.format(i), 'value')
+                                    for i in range(1000))
+        command_table['z'] = Unprintable()
+        data = _event_data_repr({'command_table': command_table})
+        self.assertTrue(data.startswith("{'command_table': {'command 0': 'value'"))
+        self.assertLess(len(data), 500)
+
     def test_list_value_parameter(self):
         hellos = []
 
@@ -83,6 +119,133 @@ class TestApplication(unittest.TestCase):
         self.assertEqual(hellos[1]['hello'], 'sir')
         self.assertEqual(hellos[1]['something'], 'else')
 
+    def test_list_value_parameter_parallel(self):
+        import threading
+        import time
+        threads = set()
+
+        def handler(args):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.05)
+            if args['hello'] == 'fail':
+                raise CLIError('failed for {}'.format(args['hello']))
+            return args['hello']
+
+        command = CliCommand('test command', handler)
+        command.add_argument('hello', '--hello', nargs='+', action=IterateAction)
+        command.add_argument('max_parallel', '--max-parallel', dest='_max_parallel', type=int)
+        cmd_table = {'test command': command}
+
+        argv = 'az test command --hello a b c d --max-parallel 4'.split()
+        config = Configuration(argv)
+        config.get_command_table = lambda: cmd_table
+        application = Application(config)
+        result = application.execute(argv[1:])
+
+        self.assertEqual(result.result, ['a', 'b', 'c', 'd'])
+        self.assertEqual(len(threads), 4)
+
+        argv = 'az test command --hello a fail c --max-parallel 2'.split()
+        with self.assertRaises(CLIError) as cm:
+            application.execute(argv[1:])
+        self.assertIn('1 of 3 operations failed', str(cm.exception))
+        self.assertIn('hello=fail: failed for fail', str(cm.exception))
+
+    def test_list_value_parameter_with_confirmation_runs_serially(self):
+        import threading
+        threads = []
+
+        def handler(args):
+            threads.append(threading.current_thread())
+            return args['hello']
+
+        command = CliCommand('test command', handler)
+        command.confirmation = True
+        command.add_argument('hello', '--hello', nargs='+', action=IterateAction)
+        command.add_argument('force', '--force', action='store_true')
+        command.add_argument('max_parallel', '--max-parallel', dest='_max_parallel', type=int)
+        cmd_table = {'test command': command}
+
+        argv = 'az test command --hello a b c --max-parallel 3'.split()
+        config = Configuration(argv)
+        config.get_command_table = lambda: cmd_table
+        application = Application(config)
+        self.assertEqual(application.execute(argv[1:]).result, ['a', 'b', 'c'])
+        self.assertEqual(threads, [threading.current_thread()] * 3)
+        self.assertEqual(application.session['command'], 'test command')
+
+        del threads[:]
+        application.execute('test command --hello a b c --max-parallel 3 --force'.split())
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_show_command_parallelism(self):
+        import mock
+
+        command = CliCommand('test show', lambda args: args['hello'])
+        command.add_argument('hello', '--hello', nargs='+', action=IterateAction)
+        command.add_argument('max_parallel', '--max-parallel', dest='_max_parallel', type=int)
+        cmd_table = {'test show': command}
+
+        config = Configuration([])
+        config.get_command_table = lambda: cmd_table
+        application = Application(config)
+
+        def _max_parallel(argv, values=None):
+            with mock.patch.object(Application, '_execute_all',
+                                   return_value=[(v, None) for v in 'abc']) as execute_all, \
+                    mock.patch('azure.cli.core._config.az_config._values', values or {}):
+                application.execute(argv.split())
+            return execute_all.call_args[0][2]
+
+        # enough requests are sent at once to fill a batch, unless the user limits them
+        self.assertEqual(_max_parallel('test show --hello a b c'), 3)
+        self.assertEqual(_max_parallel('test show --hello a b c --max-parallel 1'), 1)
+        self.assertEqual(_max_parallel('test show --hello a b c',
+                                       {'AZURE_CORE_MAX_PARALLEL': '2'}), 2)
+
+    def test_execute_all(self):
+        import argparse
+
+        def handler(args):
+            if args['hello'] == 'fail':
+                raise CLIError('failed for {}'.format(args['hello']))
+            return {'hello': args['hello']}
+
+        def _namespace(value):
+            return argparse.Namespace(hello=value, command='test command', func=handler)
+
+        application = Application(Configuration([]))
+        for max_parallel in (1, 3):
+            outcomes = application._execute_all(  # pylint: disable=protected-access
+                [_namespace(v) for v in ['a', 'fail', 'c', 'fail']], [], max_parallel)
+            self.assertEqual([result for result, _ in outcomes],
+                             [{'hello': 'a'}, None, {'hello': 'c'}, None])
+            self.assertEqual([str(ex) for _, ex in outcomes if ex],
+                             ['failed for fail', 'failed for fail'])
+
+    def test_list_value_failures_wait_for_the_other_operations(self):
+        import mock
+
+        def handler(args):
+            if args['hello'] == 'fail':
+                raise CLIError('failed for {}'.format(args['hello']))
+            return args['hello']
+
+        command = CliCommand('test command', handler)
+        command.add_argument('hello', '--hello', nargs='+', action=IterateAction)
+        cmd_table = {'test command': command}
+
+        argv = 'az test command --hello a fail c'.split()
+        config = Configuration(argv)
+        config.get_command_table = lambda: cmd_table
+        application = Application(config)
+        with mock.patch('azure.cli.core.commands.lro_scheduler.wait_all',
+                        side_effect=lambda items: [(item, None) for item in items]) as wait_all:
+            with self.assertRaises(CLIError) as cm:
+                application.execute(argv[1:])
+        wait_all.assert_called_once_with(['a', 'c'])
+        self.assertIn('1 of 3 operations failed', str(cm.exception))
+
     def test_expand_file_prefixed_files(self):
         f = tempfile.NamedTemporaryFile(delete=False)
         f.close()
@@ -0,0 +1,124 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint: disable=protected-access
+
+import json
+import threading
+import unittest
+
+import mock
+import requests
+from msrest import Configuration
+from msrest.pipeline import ClientRequest
+from msrest.service_client import ServiceClient
+
+from azure.cli.core.application import APPLICATION
+import azure.cli.core.commands._batch as batch
+
+BASE_URL = 'https://management.azure.com'
+
+
+def _get_request(name):
+    return ClientRequest('GET', '{}/subscriptions/sub/resources/{}?api-version=1'.format(
+        BASE_URL, name))
+
+
+def _response(status_code, content):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(content).encode('utf-8')
+    return response
+
+
+class FakeSend(object):
+
+    def __init__(self, batch_status=200):
+        self.batch_status = batch_status
+        self.requests = []
+
+    def __call__(self, request, headers=None, content=None, **config):
+        self.requests.append((request, content))
+        if request.method == 'POST':
+            results = [{'httpStatusCode': 200, 'headers': {'ETag': str(i)},
+                        'content': {'url': r['url']}}
+                       for i, r in enumerate(content['requests'])]
+            return _response(self.batch_status, {'responses': results})
+        return _response(200, {'url': request.url, 'single': True})
+
+
+class TestBatchCollector(unittest.TestCase):
+
+    def test_concurrent_requests_are_coalesced(self):
+        batches = []
+
+        def _send_batch(items):
+            batches.append(len(items))
+            for item in items:
+                item.response = item.request
+                item.done.set()
+
+        collector = batch.BatchCollector(_send_batch, max_size=4, linger=5)
+        results = [None] * 8
+
+        def _submit(index):
+            results[index] = collector.submit(batch._PendingRequest(index, None, {}))
+
+        threads = [threading.Thread(target=_submit, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(batches, [4, 4])
+        self.assertEqual(results, list(range(8)))
+
+
+class TestSendBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.service_client = ServiceClient(None, Configuration(BASE_URL))
+
+    def test_responses_are_fanned_out(self):
+        send = FakeSend()
+        items = [batch._PendingRequest(_get_request(name), {}, {}) for name in ('a', 'b')]
+        batch._send_batch(self.service_client, send, items)
+
+        (batch_request, body), = send.requests
+        self.assertEqual(batch_request.url, BASE_URL + '/batch?api-version=2015-11-01')
+        self.assertEqual([r['url'] for r in body['requests']],
+                         [item.request.url for item in items])
+        for index, item in enumerate(items):
+            self.assertTrue(item.done.is_set())
+            self.assertEqual(item.response.status_code, 200)
+            self.assertEqual(item.response.headers['etag'], str(index))
+            self.assertEqual(item.response.json(), {'url': item.request.url})
+
+    def test_failed_batch_falls_back_to_single_requests(self):
+        send = FakeSend(batch_status=404)
+        items = [batch._PendingRequest(_get_request(name), {}, {}) for name in ('a', 'b')]
+        batch._send_batch(self.service_client, send, items)
+
+        self.assertEqual(len(send.requests), 3)
+        self.assertTrue(all(item.response.json()['single'] for item in items))
+
+    def test_enable_batching_only_while_batching(self):
+        client = mock.Mock()
+        client._client = mock.Mock()
+        send = client._client.send = FakeSend()
+        batch.enable_batching(client)
+
+        client._client.send(_get_request('a'))
+        self.assertEqual(len(send.requests), 1)
+
+        with mock.patch.dict(APPLICATION.session, {'batch_get_requests': True}):
+            response = client._client.send(_get_request('b'))
+        # a batch of one request is sent on its own
+        self.assertTrue(response.json()['single'])
+        self.assertEqual(len(send.requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
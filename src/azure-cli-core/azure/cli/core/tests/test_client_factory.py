@@ -0,0 +1,88 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint: disable=protected-access,too-few-public-methods
+
+import unittest
+
+import mock
+from msrest import Configuration
+from msrest.service_client import ServiceClient
+
+import azure.cli.core.commands.client_factory as client_factory
+
+
+class FakeMgmtClient(object):
+
+    def __init__(self, credentials, subscription_id, base_url=None, api_version=None):
+        self.subscription_id = subscription_id
+        self.api_version = api_version
+        self.config = Configuration(base_url)
+        self._client = ServiceClient(credentials, self.config)
+
+
+def _account(subscription_id, user='user@example.com'):
+    return {'id': subscription_id, 'user': {'name': user, 'type': 'user'}}
+
+
+@mock.patch('azure.cli.core._profile.Profile.get_login_credentials',
+            lambda self, subscription_id=None: (None, subscription_id, 'tenant'))
+@mock.patch('azure.cli.core._profile.Profile.get_subscription',
+            lambda self, subscription=None: _account(subscription or 'default-sub'))
+class TestMgmtServiceClientCache(unittest.TestCase):
+
+    def setUp(self):
+        client_factory._client_cache.clear()
+
+    def test_clients_are_reused(self):
+        client = client_factory.get_mgmt_service_client(FakeMgmtClient)
+        self.assertIs(client_factory.get_mgmt_service_client(FakeMgmtClient), client)
+        self.assertEqual(client.subscription_id, 'default-sub')
+
+        other = client_factory.get_mgmt_service_client(FakeMgmtClient, subscription_id='other-sub')
+        self.assertIsNot(other, client)
+        self.assertEqual(other.subscription_id, 'other-sub')
+
+        versioned = client_factory.get_mgmt_service_client(FakeMgmtClient, api_version='2017-01-01')
+        self.assertIsNot(versioned, client)
+        self.assertEqual(versioned.api_version, '2017-01-01')
+
+    def test_clients_share_the_connection_pool(self):
+        first = client_factory.get_mgmt_service_client(FakeMgmtClient)
+        second = client_factory.get_mgmt_service_client(FakeMgmtClient, subscription_id='other-sub')
+
+        pool_manager = client_factory._get_shared_adapter().poolmanager
+        self.assertIs(first._client._adapter.poolmanager, pool_manager)
+        self.assertIs(second._client._adapter.poolmanager, pool_manager)
+
+        # closing the session of a request doesn't close the shared connections
+        with mock.patch.object(pool_manager, 'clear') as clear:
+            first._client._adapter.close()
+        self.assertFalse(clear.called)
+
+    def test_session_headers_are_added_to_each_request(self):
+        from azure.cli.core.application import APPLICATION
+
+        request = mock.MagicMock(method='PUT')
+        with mock.patch.object(ServiceClient, 'send') as send, \
+                mock.patch.dict(APPLICATION.session, {'headers': {'x-ms-test': '1'},
+                                                      'command': 'group update'}):
+            client = client_factory.get_mgmt_service_client(FakeMgmtClient)
+            client._client.send(request, {'Accept': 'application/json'})
+
+        send.assert_called_once_with(request, {'x-ms-test': '1', 'CommandName': 'group update',
+                                               'Accept': 'application/json'}, None)
+        # the client shared by the threads of the command isn't changed
+        self.assertEqual(client._client._headers, {})
+
+    def test_retry_policy_of_the_shared_adapter_is_fixed(self):
+        client = client_factory.get_mgmt_service_client(FakeMgmtClient)
+        adapter = client._client._adapter
+        adapter.max_retries = 0
+        self.assertIs(adapter.max_retries, client.config.retry_policy())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -118,6 +118,36 @@ class TestAzConfig(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.az_config.getboolean(section, option)
 
+    @mock.patch.dict(os.environ, {AzConfig.env_var_name('MySection', 'myoption'): 'envvalue'})
+    def test_get_env_overrides_file(self):
+        section = 'MySection'
+        option = 'myoption'
+        self.az_config.config_parser.add_section(section)
+        self.az_config.config_parser.set(section, option, 'filevalue')
+        self.assertEqual(self.az_config.get(section, option), 'envvalue')
+
+    def test_get_uses_snapshot(self):
+        section = 'MySection'
+        option = 'myoption'
+        self.az_config.config_parser.add_section(section)
+        self.az_config.config_parser.set(section, option, 'value1')
+        self.assertEqual(self.az_config.get(section, option), 'value1')
+        self.az_config.config_parser.set(section, option, 'value2')
+        with mock.patch.dict(os.environ, {AzConfig.env_var_name(section, option): 'envvalue'}):
+            self.assertEqual(self.az_config.get(section, option), 'value1')
+            self.az_config.reload()
+            self.assertEqual(self.az_config.get(section, option), 'envvalue')
+        self.az_config.reload()
+        self.assertEqual(self.az_config.get(section, option), 'value2')
+
+    def test_config_files_loaded_lazily(self):
+        loader = mock.MagicMock(return_value=[])
+        az_config = AzConfig(loader)
+        self.assertFalse(loader.called)
+        self.assertEqual(az_config.get('MySection', 'myoption', fallback='fallback'), 'fallback')
+        az_config.get('MySection', 'myoption', fallback='fallback')
+        loader.assert_called_once_with()
+
 
 if __name__ == '__main__':
     unittest.main()
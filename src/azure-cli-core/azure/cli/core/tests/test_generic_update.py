@@ -11,7 +11,8 @@ import shlex
 import sys
 from azure.cli.core.application import APPLICATION, Application, Configuration
 from azure.cli.core.commands import CliArgumentType, register_cli_argument
-from azure.cli.core.commands.arm import cli_generic_update_command
+from azure.cli.core.commands.arm import (cli_generic_update_command, set_properties,
+                                         add_properties, remove_properties, PropertyResolver)
 from azure.cli.core._util import CLIError
 
 
@@ -350,6 +351,159 @@ class GenericUpdateTest(unittest.TestCase):
         self.assertEqual(my_obj['dict3']['g'], 'h', 'verify object added to empty dict')
         self.assertEqual(len(my_obj['dict3']), 1, 'verify only one object added to empty dict')
 
+    def test_generic_update_skips_unchanged_and_uses_etag(self):
+        my_obj = ObjectTestObject('value', 1, True)
+        my_obj.etag = 'etag-1'
+        calls = []
+
+        def my_etag_get():
+            return my_obj
+
+        def my_etag_set(parameters, custom_headers=None):
+            calls.append(custom_headers)
+            return parameters
+
+        config = Configuration([])
+        app = Application(config)
+
+        setattr(sys.modules[__name__], my_etag_get.__name__, my_etag_get)
+        setattr(sys.modules[__name__], my_etag_set.__name__, my_etag_set)
+        cli_generic_update_command(None, 'etagcommand', '{}#{}'.format(
+            __name__, my_etag_get.__name__), '{}#{}'.format(__name__, my_etag_set.__name__))
+
+        app.execute('etagcommand --set myString=value'.split())
+        self.assertEqual(calls, [], 'unchanged instance is not set')
+
+        app.execute('etagcommand'.split())
+        self.assertEqual(calls, [None], 'update without changes still sets the instance')
+
+        app.execute('etagcommand --set myString=new --if-match'.split())
+        self.assertEqual(calls[-1], {'If-Match': 'etag-1'}, 'current etag is used')
+
+        app.execute('etagcommand --set myString=newer --if-match other'.split())
+        self.assertEqual(calls[-1], {'If-Match': 'other'}, 'given etag is used')
+
+    def test_generic_update_if_match_needs_setter_with_headers(self):
+        from azure.cli.core.commands import command_table
+
+        def my_no_etag_get():
+            return ObjectTestObject('value', 1, True)
+
+        def my_no_etag_set(parameters):
+            return parameters
+
+        def my_etag_patch(parameters, custom_headers=None):  # pylint:disable=unused-argument
+            return parameters
+
+        for func in (my_no_etag_get, my_no_etag_set, my_etag_patch):
+            setattr(sys.modules[__name__], func.__name__, func)
+        cli_generic_update_command(None, 'noetagcommand',
+                                   '{}#{}'.format(__name__, my_no_etag_get.__name__),
+                                   '{}#{}'.format(__name__, my_no_etag_set.__name__),
+                                   patcher_op='{}#{}'.format(__name__, my_etag_patch.__name__))
+
+        command = command_table['noetagcommand']
+        command.load_arguments()
+        self.assertNotIn('if_match', command.arguments,
+                         'the setter cannot send the ETag, so --if-match is not offered')
+
+    def test_generic_update_patch(self):
+        my_obj = ObjectTestObject('value', 1, True)
+        my_obj._validation = {'my_bool': {'required': True}}  # pylint: disable=protected-access
+        patches = []
+
+        def my_patch_get():
+            return my_obj
+
+        def my_patch_set(**kwargs):  # pylint:disable=unused-argument
+            raise AssertionError('patch should be used')
+
+        def my_patch(parameters):
+            patches.append(vars(parameters).copy())
+            return parameters
+
+        config = Configuration([])
+        app = Application(config)
+
+        for func in (my_patch_get, my_patch_set, my_patch):
+            setattr(sys.modules[__name__], func.__name__, func)
+        cli_generic_update_command(None, 'patchcommand',
+                                   '{}#{}'.format(__name__, my_patch_get.__name__),
+                                   '{}#{}'.format(__name__, my_patch_set.__name__),
+                                   patcher_op='{}#{}'.format(__name__, my_patch.__name__))
+
+        app.execute('patchcommand --set myInt=2'.split())
+        patch = patches[0]
+        self.assertEqual((patch['my_string'], patch['my_int'], patch['my_bool']), (None, 2, True),
+                         'only changed and required properties are sent')
+
+    def test_generic_update_patch_removing_property(self):
+        my_obj = ObjectTestObject('value', 1, True)
+        my_obj.tags = {'a': '1', 'b': '2'}
+        calls = []
+
+        def my_remove_get():
+            return my_obj
+
+        def my_remove_set(parameters):
+            calls.append(('set', vars(parameters).copy()))
+            return parameters
+
+        def my_remove_patch(parameters):
+            calls.append(('patch', vars(parameters).copy()))
+            return parameters
+
+        config = Configuration([])
+        app = Application(config)
+
+        for func in (my_remove_get, my_remove_set, my_remove_patch):
+            setattr(sys.modules[__name__], func.__name__, func)
+        cli_generic_update_command(None, 'removecommand',
+                                   '{}#{}'.format(__name__, my_remove_get.__name__),
+                                   '{}#{}'.format(__name__, my_remove_set.__name__),
+                                   patcher_op='{}#{}'.format(__name__, my_remove_patch.__name__))
+
+        app.execute('removecommand --remove myString'.split())
+        self.assertEqual(calls[-1][0], 'set', 'a removed property is only sent by the setter')
+        self.assertEqual(calls[-1][1]['my_string'], None)
+        self.assertEqual(calls[-1][1]['my_int'], 1)
+
+        app.execute('removecommand --remove tags.a'.split())
+        self.assertEqual(calls[-1][0], 'set')
+        self.assertEqual(calls[-1][1]['tags'], {'b': '2'})
+
+        app.execute('removecommand --set myInt=2'.split())
+        self.assertEqual(calls[-1][0], 'patch')
+        self.assertEqual(calls[-1][1]['my_int'], 2)
+
+    def test_property_resolver_reused_across_expressions(self):
+        instance = TestObject()
+        resolver = PropertyResolver(instance)
+
+        # paths sharing a prefix, and the same list entry reached by index and by filter
+        set_properties(instance, 'myListOfObjects[0].myInt=1', resolver)
+        set_properties(instance, 'myListOfObjects[myString=myKeyA].myInt=2', resolver)
+        set_properties(instance, 'myListOfObjects[0].myBool=false', resolver)
+        self.assertEqual(instance.my_list_of_objects[0].my_int, 2)
+        self.assertFalse(instance.my_list_of_objects[0].my_bool)
+
+        # changing the filtered key means the filter no longer finds the entry
+        set_properties(instance, 'myListOfObjects[myString=myKeyA].myString=renamed', resolver)
+        with self.assertRaises(CLIError):
+            set_properties(instance, 'myListOfObjects[myString=myKeyA].myInt=3', resolver)
+        set_properties(instance, 'myListOfObjects[myString=renamed].myInt=3', resolver)
+        self.assertEqual(instance.my_list_of_objects[0].my_int, 3)
+
+        # replaced and removed entries aren't found through stale paths
+        set_properties(instance, 'myList[2]={"myKey": "replaced"}', resolver)
+        set_properties(instance, 'myList[2].myKey=changed', resolver)
+        self.assertEqual(instance.my_list[2], {'myKey': 'changed'})
+        add_properties(instance, ['myListOfSnakeDicts', 'my_key=value3'], resolver)
+        remove_properties(instance, ['myListOfSnakeDicts', '0'], resolver)
+        set_properties(instance, 'myListOfSnakeDicts[my_key=value3].my_key=value4', resolver)
+        self.assertEqual([d['my_key'] for d in instance.my_list_of_snake_dicts],
+                         ['value2', 'value4'])
+
 
 if __name__ == '__main__':
     unittest.main()
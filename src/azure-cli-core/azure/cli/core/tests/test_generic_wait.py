@@ -0,0 +1,115 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint:disable=too-few-public-methods
+
+import sys
+import unittest
+
+import mock
+from msrest.exceptions import ClientException
+
+from azure.cli.core.application import IterateValue
+from azure.cli.core.commands import command_table
+from azure.cli.core.commands.arm import cli_generic_wait_command
+from azure.cli.core._util import CLIError
+
+
+class WaitTestObject(object):
+
+    def __init__(self, provisioning_state, etag=None):
+        self.provisioning_state = provisioning_state
+        self.etag = etag
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _not_modified():
+    ex = ClientException('Not modified')
+    ex.status_code = 304
+    return ex
+
+
+class GenericWaitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.states = {}
+        self.calls = []
+        self.clock = FakeClock()
+
+        def wait_obj_get(resource_group_name, name, custom_headers=None):
+            self.calls.append((name, custom_headers))
+            state = self.states[name]
+            if callable(state):
+                state = state()
+            if isinstance(state, Exception):
+                raise state
+            return state
+
+        setattr(sys.modules[__name__], wait_obj_get.__name__, wait_obj_get)
+        cli_generic_wait_command(None, 'wait-obj', '{}#{}'.format(__name__,
+                                                                  wait_obj_get.__name__))
+        patcher = mock.patch.multiple('time', time=self.clock.time, sleep=self.clock.sleep)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _wait(names, **kwargs):
+        args = {'resource_group_name': 'rg', 'name': names, 'timeout': 3600, 'interval': 30,
+                'any': False, 'created': False, 'deleted': False, 'updated': False,
+                'exists': False, 'custom': None}
+        args.update(kwargs)
+        return command_table['wait-obj'].handler(args)
+
+    def test_wait_backs_off_and_raises_on_timeout(self):
+        self.states['a'] = WaitTestObject('Updating')
+        with self.assertRaises(CLIError):
+            self._wait('a', updated=True, timeout=100, interval=20)
+        self.assertEqual(self.clock.sleeps, [2, 4, 8, 16, 20, 20, 20, 10])
+
+    def test_wait_for_all_or_any_of_the_ids(self):
+        self.states['a'] = WaitTestObject('Succeeded')
+        pending = iter([WaitTestObject('Updating')] * 3 + [WaitTestObject('Succeeded')])
+        self.states['b'] = lambda: next(pending)
+
+        self._wait(IterateValue(['a', 'b']), created=True, any=True)
+        self.assertEqual([name for name, _ in self.calls], ['a', 'b'])
+
+        self.calls = []
+        self._wait(IterateValue(['a', 'b']), created=True)
+        # the resource that is done isn't polled again
+        self.assertEqual([name for name, _ in self.calls], ['a', 'b', 'b', 'b'])
+
+    def test_wait_uses_etag_and_compiled_custom_query(self):
+        responses = iter([WaitTestObject('Updating', etag='1'), _not_modified(),
+                          WaitTestObject('Ready', etag='2')])
+        self.states['a'] = lambda: next(responses)
+
+        self._wait('a', custom="provisioningState=='Ready'")
+        self.assertEqual([headers for _, headers in self.calls],
+                         [None, {'If-None-Match': '1'}, {'If-None-Match': '1'}])
+
+    def test_wait_for_deleted(self):
+        not_found = ClientException('Not found')
+        not_found.status_code = 404
+        self.states['a'] = not_found
+        self._wait('a', deleted=True)
+        self.assertEqual(self.clock.sleeps, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -547,7 +547,7 @@ Examples
 
         def _register_global_parser(appl):
             # noqa pylint: disable=protected-access
-            appl._event_handlers[appl.GLOBAL_PARSER_CREATED].append(register_globals)
+            appl._event_handlers[appl.GLOBAL_PARSER_CREATED] += (register_globals,)
 
         mock_register_extensions.side_effect = _register_global_parser
 
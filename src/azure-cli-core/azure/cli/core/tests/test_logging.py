@@ -3,6 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import logging
 import unittest
 import azure.cli.core.azlogging as azlogging
 
@@ -65,6 +66,30 @@ class TestLogging(unittest.TestCase):
         az_module_logger = azlogging.get_az_logger('azure.cli.module')
         self.assertEqual(az_module_logger.name, 'az.azure.cli.module')
 
+    def test_async_file_handler(self):
+        records = []
+        target = logging.Handler()
+        target.emit = records.append
+        handler = azlogging.AsyncFileHandler(target)
+        logger = logging.getLogger('az.test_async_file_handler')
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+        try:
+            args = ['a']
+            logger.debug('message %s', args)
+            args.append('b')
+            try:
+                raise ValueError('boom')
+            except ValueError:
+                logger.exception('failed')
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+        self.assertEqual([r.getMessage() for r in records], ["message ['a']", 'failed'])
+        self.assertIn('ValueError: boom', records[1].exc_text)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,155 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import unittest
+
+import mock
+
+from azure.cli.core._util import CLIError
+from azure.cli.core.commands import (AdaptivePollingDelay, DeferredLongRunningOperation,
+                                     LongRunningOperation, LongRunningOperationScheduler,
+                                     PollRateLimiter)
+
+
+class FakeResponse(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self, headers=None, content=b''):
+        self.headers = headers or {}
+        self._content = content
+
+
+class FakePoller(object):
+
+    def __init__(self, response=None, polls=3, result=None, exception=None):
+        self._response = response
+        self._polls = polls
+        self._result = result or 'result'
+        self._exception = exception
+        self._callbacks = []
+        self._thread = threading.Thread(target=self._run)
+
+    def _delay(self):
+        raise AssertionError('default delay should be replaced')
+
+    def _run(self):
+        for _ in range(self._polls):
+            self._delay()  # pylint: disable=not-callable
+        for callback in self._callbacks:
+            callback(self)
+
+    def add_done_callback(self, func):
+        self._callbacks.append(func)
+
+    def done(self):
+        # start polling once the operation is being waited on
+        if not self._thread.ident:
+            self._thread.start()
+        return not self._thread.is_alive()
+
+    def result(self):
+        self._thread.join()
+        if self._exception:
+            raise self._exception
+        return self._result
+
+
+class TestAdaptivePollingDelay(unittest.TestCase):
+
+    @mock.patch('time.sleep')
+    def test_exponential_backoff_with_cap(self, sleep):
+        delay = AdaptivePollingDelay(FakePoller(FakeResponse()), initial_interval=2,
+                                     max_interval=10)
+        for _ in range(6):
+            delay()
+
+        intervals = [2, 4, 8, 10, 10, 10]
+        self.assertEqual(delay.status_requests, 6)
+        for (args, _), interval in zip(sleep.call_args_list, intervals):
+            self.assertTrue(interval / 2.0 <= args[0] <= interval)
+
+    @mock.patch('time.sleep')
+    def test_retry_after_is_honored(self, sleep):
+        delay = AdaptivePollingDelay(FakePoller(FakeResponse({'retry-after': '17'})))
+        delay()
+        sleep.assert_called_once_with(17.0)
+
+    @mock.patch('time.sleep')
+    def test_no_delay_before_initial_response(self, sleep):
+        delay = AdaptivePollingDelay(FakePoller(None))
+        delay()
+        self.assertFalse(sleep.called)
+        self.assertEqual(delay.status_requests, 0)
+
+
+class TestPollRateLimiter(unittest.TestCase):
+
+    @mock.patch('timeit.default_timer', return_value=100.0)
+    @mock.patch('time.sleep')
+    def test_requests_are_spaced_out(self, sleep, _):
+        limiter = PollRateLimiter(4)
+        for _ in range(3):
+            limiter.acquire()
+        self.assertEqual([args[0] for args, _ in sleep.call_args_list], [0.25, 0.5])
+
+
+@mock.patch.object(LongRunningOperationScheduler, 'rate_limiter', None)
+class TestLongRunningOperation(unittest.TestCase):
+
+    @mock.patch('time.sleep')
+    def test_long_running_operation(self, sleep):
+        poller = FakePoller(FakeResponse({'x-ms-correlation-request-id': 'abc'}), polls=3)
+        self.assertEqual(LongRunningOperation('testing')(poller), 'result')
+        self.assertEqual(sleep.call_count, 3)
+
+    def test_get_correlation_id(self):
+        poller = FakePoller(FakeResponse(content=b'{"properties": {"correlationId": "123"}}'))
+        self.assertEqual(LongRunningOperation._get_correlation_id(poller), '123')  # pylint: disable=protected-access
+        poller = FakePoller(FakeResponse({'x-ms-correlation-request-id': 'abc'}))
+        self.assertEqual(LongRunningOperation._get_correlation_id(poller), 'abc')  # pylint: disable=protected-access
+        self.assertIsNone(LongRunningOperation._get_correlation_id(FakePoller()))  # pylint: disable=protected-access
+
+
+@mock.patch.object(LongRunningOperationScheduler, 'rate_limiter', None)
+@mock.patch('time.sleep')
+class TestLongRunningOperationScheduler(unittest.TestCase):
+
+    def test_wait_without_deferral(self, _):
+        scheduler = LongRunningOperationScheduler()
+        with mock.patch.object(LongRunningOperationScheduler, 'defer_enabled', return_value=False):
+            result = scheduler.wait(LongRunningOperation('testing'), FakePoller(FakeResponse()),
+                                    then=lambda r: r.upper())
+        self.assertEqual(result, 'RESULT')
+
+    def test_wait_all(self, _):
+        scheduler = LongRunningOperationScheduler()
+        with mock.patch.object(LongRunningOperationScheduler, 'defer_enabled', return_value=True):
+            items = [scheduler.wait(LongRunningOperation('testing'),
+                                    FakePoller(FakeResponse(), polls=i, result='op{}'.format(i)),
+                                    then=lambda r: r.upper())
+                     for i in range(20)]
+        self.assertTrue(all(isinstance(i, DeferredLongRunningOperation) for i in items))
+
+        outcomes = scheduler.wait_all(items + ['not deferred'])
+        self.assertEqual([r for r, _ in outcomes],
+                         ['OP{}'.format(i) for i in range(20)] + ['not deferred'])
+        self.assertTrue(all(ex is None for _, ex in outcomes))
+
+    def test_wait_all_reports_failures(self, _):
+        from msrest.exceptions import ClientException
+        scheduler = LongRunningOperationScheduler()
+        with mock.patch.object(LongRunningOperationScheduler, 'defer_enabled', return_value=True):
+            items = [scheduler.wait(LongRunningOperation('testing'),
+                                    FakePoller(FakeResponse(), exception=ex))
+                     for ex in (None, ClientException('failed'))]
+
+        (first, first_error), (second, second_error) = scheduler.wait_all(items)
+        self.assertEqual((first, first_error), ('result', None))
+        self.assertIsNone(second)
+        self.assertIsInstance(second_error, CLIError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+import azure.cli.core.telemetry as telemetry
+from azure.cli.core.decorators import call_once
+
+
+class TestHostPropertiesCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.cache_path = os.path.join(self.cache_dir, 'telemetry',
+                                       telemetry.HOST_PROPERTIES_CACHE_FILE_NAME)
+        self.boot_id = 'boot-1'
+        self.core_version = '2.0.0'
+        self.now = 1000000.0
+        self.mac_address_queries = 0
+
+        def _get_hash_mac_address():
+            self.mac_address_queries += 1
+            return 'mac-hash-{}'.format(self.mac_address_queries)
+
+        for name, replacement in [('_get_boot_id', lambda: self.boot_id),
+                                  ('_get_core_version', lambda: self.core_version),
+                                  ('_get_hash_mac_address', _get_hash_mac_address),
+                                  ('_get_hash_machine_id', lambda: 'machine-hash'),
+                                  ('_get_installation_id', lambda: 'installation')]:
+            patcher = mock.patch.object(telemetry, name, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch('time.time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get(self):
+        return telemetry._get_cached_host_properties(self.cache_path)  # pylint: disable=protected-access
+
+    def test_properties_are_read_from_the_cache(self):
+        properties = self._get()
+        self.assertEqual(properties['mac_address_hash'], 'mac-hash-1')
+        self.assertEqual(properties['installation_id'], 'installation')
+        self.assertTrue(os.path.isfile(self.cache_path))
+
+        self.now += 60
+        self.assertEqual(self._get(), properties)
+        self.assertEqual(self.mac_address_queries, 1)
+
+    def test_cache_expires_after_a_day(self):
+        self._get()
+        self.now += telemetry.HOST_PROPERTIES_CACHE_MAX_AGE - 1
+        self.assertEqual(self._get()['mac_address_hash'], 'mac-hash-1')
+
+        self.now += 1
+        self.assertEqual(self._get()['mac_address_hash'], 'mac-hash-2')
+        # the refreshed properties are cached again
+        self.assertEqual(self._get()['mac_address_hash'], 'mac-hash-2')
+
+    def test_cache_is_invalidated_on_reboot(self):
+        self._get()
+        self.boot_id = 'boot-2'
+        self.assertEqual(self._get()['mac_address_hash'], 'mac-hash-2')
+
+    def test_cache_is_invalidated_on_upgrade(self):
+        self._get()
+        self.core_version = '2.0.1'
+        self.assertEqual(self._get()['mac_address_hash'], 'mac-hash-2')
+
+    def test_corrupt_cache_is_replaced(self):
+        os.makedirs(os.path.dirname(self.cache_path))
+        with open(self.cache_path, 'w') as cache_file:
+            cache_file.write('{"key": ')
+        self.assertEqual(self._get()['mac_address_hash'], 'mac-hash-1')
+        self.assertEqual(self._get()['mac_address_hash'], 'mac-hash-1')
+
+
+class TestCallOnce(unittest.TestCase):
+
+    def test_factory_runs_once(self):
+        calls = []
+
+        @call_once
+        def _factory():
+            calls.append(None)
+            return 'result'
+
+        self.assertEqual(_factory(), 'result')
+        self.assertEqual(_factory(), 'result')
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
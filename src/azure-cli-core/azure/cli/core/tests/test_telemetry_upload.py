@@ -0,0 +1,71 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+import azure.cli.core.telemetry_upload as telemetry_upload
+
+
+def _payload(name):
+    return json.dumps([{'name': name, 'properties': {}}])
+
+
+class TestTelemetrySpool(unittest.TestCase):
+
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.spool_dir)
+
+    def test_spool_and_drain(self):
+        telemetry_upload.spool(self.spool_dir, _payload('first'))
+        telemetry_upload.spool(self.spool_dir, _payload('second'))
+
+        records = telemetry_upload.drain_spool(self.spool_dir)
+        self.assertEqual([r['name'] for r in records], ['first', 'second'])
+        self.assertEqual(telemetry_upload.drain_spool(self.spool_dir), [])
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_spool_drops_oldest(self):
+        max_size = len(_payload('event-0')) * 3 + 3
+        for i in range(10):
+            telemetry_upload.spool(self.spool_dir, _payload('event-{}'.format(i)), max_size)
+
+        records = telemetry_upload.drain_spool(self.spool_dir)
+        self.assertEqual([r['name'] for r in records], ['event-7', 'event-8', 'event-9'])
+
+    def test_drain_skips_partial_payload(self):
+        telemetry_upload.spool(self.spool_dir, _payload('complete'))
+        with open(os.path.join(self.spool_dir, telemetry_upload.SPOOL_FILE_NAME), 'a') as f:
+            f.write('[{"name": "trunc')
+
+        records = telemetry_upload.drain_spool(self.spool_dir)
+        self.assertEqual([r['name'] for r in records], ['complete'])
+
+    def test_failed_upload_keeps_records(self):
+        telemetry_upload.spool(self.spool_dir, _payload('first'))
+        telemetry_upload.spool(self.spool_dir, _payload('second'))
+
+        with mock.patch.object(telemetry_upload, '_upload_records', side_effect=IOError('offline')):
+            telemetry_upload.upload_spool(self.spool_dir)
+
+        records = telemetry_upload.drain_spool(self.spool_dir)
+        self.assertEqual([r['name'] for r in records], ['first', 'second'])
+
+    def test_should_upload_spool_once_per_interval(self):
+        self.assertTrue(telemetry_upload.should_upload_spool(self.spool_dir, 300))
+        self.assertFalse(telemetry_upload.should_upload_spool(self.spool_dir, 300))
+        self.assertTrue(telemetry_upload.should_upload_spool(self.spool_dir, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint: disable=protected-access,too-few-public-methods
+
+import unittest
+
+import mock
+import requests
+
+import azure.cli.core.commands._throttling as throttling
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 100.0
+
+    def timer(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.multiple('timeit', default_timer=self.clock.timer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('time.sleep', side_effect=self.clock.sleep)
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bucket_waits_when_empty(self):
+        bucket = throttling.TokenBucket(rate=2, capacity=2)
+        self.assertEqual([bucket.acquire() for _ in range(4)], [0, 0, 0.5, 0.5])
+
+    def test_bucket_follows_remaining_quota(self):
+        bucket = throttling.TokenBucket(rate=1, capacity=100)
+        bucket.limit(1)
+        self.assertEqual([bucket.acquire() for _ in range(3)], [0, 1.0, 1.0])
+
+
+class TestThrottlingPipeline(unittest.TestCase):
+
+    def setUp(self):
+        throttling._buckets.clear()
+        self.stats = throttling.ThrottlingStats()
+        patcher = mock.patch.object(throttling, 'stats', self.stats)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _request(method, url):
+        return requests.Request(method, url).prepare()
+
+    def test_remaining_quota_limits_the_subscription_bucket(self):
+        request = self._request('GET', 'https://management.azure.com/subscriptions/SUB/resources')
+        response = requests.Response()
+        response.headers[throttling.REMAINING_READS_HEADER] = '7'
+        raw = mock.Mock()
+        raw.retries.history = [mock.Mock(status=429), mock.Mock(status=500)]
+
+        throttling.before_request(None, request)
+        result = throttling.after_response(None, request, raw, result=response)
+
+        self.assertIs(result, response)
+        self.assertEqual(throttling._get_bucket('sub', True)._tokens, 7)
+        self.assertEqual(throttling._get_bucket('sub', False)._tokens,
+                         throttling.ARM_WRITES_PER_HOUR)
+        self.assertEqual(self.stats.requests, 1)
+        self.assertEqual(self.stats.throttled_responses, 1)
+        self.assertEqual(self.stats.lowest_remaining[throttling.REMAINING_READS_HEADER], 7)
+
+    def test_requests_without_subscription_are_not_limited(self):
+        request = self._request('POST', 'https://graph.windows.net/tenant/users')
+        throttling.before_request(None, request)
+        throttling.after_response(None, request, None, result=requests.Response())
+        self.assertEqual(throttling._buckets, {})
+        self.assertEqual(self.stats.requests, 1)
+
+    def test_enable_throttling(self):
+        from msrest import Configuration
+        from msrest.service_client import ServiceClient
+        client = mock.Mock()
+        client.config = Configuration('https://management.azure.com')
+        client._client = ServiceClient(None, client.config)
+
+        throttling.enable_throttling(client)
+        retry = client.config.retry_policy()
+        self.assertIn(429, retry.status_forcelist)
+        self.assertTrue(retry.respect_retry_after_header)
+        hooks = client._client._adapter._client_hooks
+        self.assertIn(throttling.before_request, hooks['request'].precalls)
+        self.assertIn(throttling.after_response, hooks['response'].postcalls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,8 +11,8 @@ from adal.adal_error import AdalError
 
 import azure.cli.core.azlogging as azlogging
 from azure.cli.core._config import (GLOBAL_CONFIG_DIR, GLOBAL_CONFIG_PATH,
-                                    CONTEXT_CONFIG_DIR, ACTIVE_CONTEXT_CONFIG_PATH,
-                                    ENV_VAR_PREFIX)
+                                    CONTEXT_CONFIG_DIR, ENV_VAR_PREFIX,
+                                    get_active_context_config_path)
 from azure.cli.core._util import CLIError
 from azure.cli.core.prompting import (prompt,
                                       prompt_y_n,
@@ -140,12 +140,13 @@ def _create_or_update_env(env_name=None):
 def _handle_global_configuration():
     # print location of global configuration
     print(MSG_GLOBAL_SETTINGS_LOCATION.format(GLOBAL_CONFIG_PATH))
-    if os.path.isfile(ACTIVE_CONTEXT_CONFIG_PATH):
+    active_context_config_path = get_active_context_config_path()
+    if os.path.isfile(active_context_config_path):
         # print location of the active env configuration if it exists
-        print(MSG_ACTIVE_CONTEXT_SETTINGS_LOCATION.format(ACTIVE_CONTEXT_CONFIG_PATH))
+        print(MSG_ACTIVE_CONTEXT_SETTINGS_LOCATION.format(active_context_config_path))
     # set up the config parsers
     file_config = configparser.SafeConfigParser()
-    config_exists = file_config.read([GLOBAL_CONFIG_PATH, ACTIVE_CONTEXT_CONFIG_PATH])
+    config_exists = file_config.read([GLOBAL_CONFIG_PATH, active_context_config_path])
     global_config = configparser.SafeConfigParser()
     global_config.read(GLOBAL_CONFIG_PATH)
     should_modify_global_config = False
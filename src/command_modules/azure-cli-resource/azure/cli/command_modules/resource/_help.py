@@ -129,6 +129,9 @@ helps['resource delete'] = """
         - name: delete a subnet using id
           text: >
             az resource delete --id /subscriptions/0b1f6471-1bf0-4dda-aec3-111111111111/resourceGroups/myGroup/providers/Microsoft.Network/virtualNetworks/myvnet/subnets/mysubnet
+        - name: delete all the resources with a tag, 20 at a time
+          text: >
+            az resource delete --max-parallel 20 --ids $(az resource list --tag env=test --query [].id -o tsv)
 """
 
 helps['resource tag'] = """
@@ -142,6 +145,12 @@ helps['resource tag'] = """
         - name: tag a webapp using resource id
           text: >
             az resource tag --tags vmlist=vm1 --id /subscriptions/0b1f6471-1bf0-4dda-aec3-111111111111/resourceGroups/myGroup/providers/Microsoft.Web/sites/myWebapp
+        - name: tag all the resources of a resource group
+          text: >
+            az resource tag --tags costcenter=1234 --ids $(az resource list -g mygroup --query [].id -o tsv)
+        - name: tag the resources listed in a file, one id per line
+          text: >
+            az resource tag --tags costcenter=1234 --ids @ids.txt
 """
 
 helps['resource update'] = """
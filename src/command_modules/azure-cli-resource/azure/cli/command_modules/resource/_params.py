@@ -34,6 +34,11 @@ register_cli_argument('resource', 'tag', tag_type)
 register_cli_argument('resource', 'tags', tags_type)
 register_cli_argument('resource list', 'name', resource_name_type)
 register_cli_argument('resource move', 'ids', nargs='+')
+for command in ('delete', 'tag'):
+    register_cli_argument('resource {}'.format(command), 'resource_ids', options_list=('--ids',), nargs='+',
+                          help='One or more resource IDs, or @file with one ID per line. The resources are processed in parallel.')
+    register_cli_argument('resource {}'.format(command), 'max_parallel', type=int,
+                          help='Maximum number of resources to process in parallel with --ids. Defaults to the [core] max_parallel configuration or 10.')
 
 register_cli_argument('provider', 'top', ignore_type)
 register_cli_argument('provider', 'resource_provider_namespace', options_list=('--namespace', '-n'), completer=get_providers_completion_list,
@@ -97,7 +97,8 @@ cli_generic_update_command(__name__, 'resource update',
 cli_generic_update_command(__name__, 'group update',
                            'azure.mgmt.resource.resources.operations.resource_groups_operations#ResourceGroupsOperations.get',
                            'azure.mgmt.resource.resources.operations.resource_groups_operations#ResourceGroupsOperations.create_or_update',
-                           lambda: _resource_client_factory().resource_groups)
+                           lambda: _resource_client_factory().resource_groups,
+                           patcher_op='azure.mgmt.resource.resources.operations.resource_groups_operations#ResourceGroupsOperations.patch')
 
 cli_command(__name__, 'policy assignment create', 'azure.cli.command_modules.resource.custom#create_policy_assignment')
 cli_command(__name__, 'policy assignment delete', 'azure.cli.command_modules.resource.custom#delete_policy_assignment')
@@ -26,6 +26,8 @@ from ._client_factory import _resource_client_factory, _resource_policy_client_f
 
 logger = azlogging.get_az_logger(__name__)
 
+DEFAULT_BULK_MAX_PARALLEL = 10
+
 def list_resource_groups(tag=None): # pylint: disable=no-self-use
     ''' List resource groups, optionally filtered by a tag.
     :param str tag:tag to filter by in 'key[=value]' format
@@ -146,7 +148,14 @@ def show_resource(resource_group_name=None, resource_provider_namespace=None,
 
 def delete_resource(resource_group_name=None, resource_provider_namespace=None,
                     parent_resource_path=None, resource_type=None, resource_name=None,
-                    resource_id=None, api_version=None):
+                    resource_id=None, api_version=None, resource_ids=None, max_parallel=None):
+    if resource_ids:
+        _check_no_single_resource_args(resource_group_name, resource_provider_namespace,
+                                       parent_resource_path, resource_type, resource_name,
+                                       resource_id)
+        _for_each_resource(resource_ids, lambda res: res.delete(), 'Deleting',
+                           api_version, max_parallel)
+        return
     res = _ResourceUtils(resource_group_name, resource_provider_namespace,
                          parent_resource_path, resource_type, resource_name,
                          resource_id, api_version)
@@ -154,14 +163,108 @@ def delete_resource(resource_group_name=None, resource_provider_namespace=None,
 
 def tag_resource(tags, resource_group_name=None, resource_provider_namespace=None,
                  parent_resource_path=None, resource_type=None, resource_name=None,
-                 resource_id=None, api_version=None):
+                 resource_id=None, api_version=None, resource_ids=None, max_parallel=None):
     ''' Updates the tags on an existing resource. To clear tags, specify the --tag option
     without anything else. '''
+    if resource_ids:
+        _check_no_single_resource_args(resource_group_name, resource_provider_namespace,
+                                       parent_resource_path, resource_type, resource_name,
+                                       resource_id)
+        return _for_each_resource(resource_ids, lambda res: res.tag(tags), 'Tagging',
+                                  api_version, max_parallel)
     res = _ResourceUtils(resource_group_name, resource_provider_namespace,
                          parent_resource_path, resource_type, resource_name,
                          resource_id, api_version)
     return res.tag(tags)
 
+def _check_no_single_resource_args(*args):
+    if any(args):
+        raise IncorrectUsageError(
+            "(--ids ID [ID ...] | --id ID | --resource-group RG --name NAME --namespace NAMESPACE --resource-type TYPE -n NAME)") #pylint: disable=line-too-long
+
+def _resolve_api_versions(rcf, resource_ids):
+    ''' Resolve the API version of each resource, getting each provider and resolving each
+    resource type once. Resources whose API version can't be resolved map to the error. '''
+    providers = {}
+    type_versions = {}
+    api_versions = {}
+    for resource_id in resource_ids:
+        namespace, parent, resource_type = _ResourceUtils._get_resource_type(resource_id)
+        type_key = (namespace.lower(),
+                    (parent.split('/')[0] if parent else resource_type).lower())
+        if type_key not in type_versions:
+            try:
+                if namespace.lower() not in providers:
+                    providers[namespace.lower()] = rcf.providers.get(namespace)
+                type_versions[type_key] = _ResourceUtils._resolve_api_version(
+                    rcf, namespace, parent, resource_type, providers[namespace.lower()])
+            except Exception as ex: #pylint: disable=broad-except
+                type_versions[type_key] = ex
+        api_versions[resource_id] = type_versions[type_key]
+    return api_versions
+
+def _for_each_resource(resource_ids, operation, operation_name, api_version=None,
+                       max_parallel=None):
+    ''' Run the operation for each of the resources, up to max_parallel at once, and wait for
+    the long running operations it starts together. The requests are throttled by the
+    remaining ARM quota of the subscription. Failures don't stop the other resources; they are
+    reported together once all resources are done.
+
+    :param resource_ids: the resource ids, space or newline separated values are split
+    :param operation: called with the _ResourceUtils of each resource
+    '''
+    from multiprocessing.pool import ThreadPool
+    from msrestazure.azure_operation import AzureOperationPoller
+    from azure.cli.core._config import az_config
+    from azure.cli.core.commands import LongRunningOperation, lro_scheduler
+
+    # ids may come from a file (--ids @ids.txt), one per line
+    resource_ids = [i for value in resource_ids for i in value.split()]
+    invalid_ids = [i for i in resource_ids if not is_valid_resource_id(i)]
+    if invalid_ids:
+        raise CLIError('Invalid resource ids: {}'.format(' '.join(invalid_ids)))
+
+    rcf = _resource_client_factory()
+    api_versions = dict.fromkeys(resource_ids, api_version) if api_version else \
+        _resolve_api_versions(rcf, resource_ids)
+    max_parallel = max_parallel or az_config.getint('core', 'max_parallel',
+                                                    fallback=DEFAULT_BULK_MAX_PARALLEL)
+
+    def _start(resource_id):
+        try:
+            if isinstance(api_versions[resource_id], Exception):
+                raise api_versions[resource_id]
+            res = _ResourceUtils(resource_id=resource_id, api_version=api_versions[resource_id],
+                                 rcf=rcf)
+            result = operation(res)
+            if isinstance(result, AzureOperationPoller):
+                result = lro_scheduler.defer(
+                    LongRunningOperation('{} {}'.format(operation_name, resource_id)), result)
+            return result, None
+        except Exception as ex: #pylint: disable=broad-except
+            return None, ex
+
+    logger.info('%s %d resources with up to %d in parallel', operation_name, len(resource_ids),
+                max_parallel)
+    pool = ThreadPool(max(1, min(max_parallel, len(resource_ids))))
+    try:
+        started = pool.map(_start, resource_ids)
+    finally:
+        pool.close()
+    outcomes = [(None, start_error) if start_error else outcome
+                for (_, start_error), outcome in
+                zip(started, lro_scheduler.wait_all([result for result, _ in started]))]
+
+    failures = [(resource_id, ex) for resource_id, (_, ex) in zip(resource_ids, outcomes)
+                if ex is not None]
+    for resource_id, ex in failures:
+        logger.warning('%s %s failed: %s', operation_name, resource_id, ex)
+    if failures:
+        raise CLIError('{} of {} resources failed:\n{}'.format(
+            len(failures), len(resource_ids),
+            '\n'.join('{}: {}'.format(resource_id, ex) for resource_id, ex in failures)))
+    return [result for result, _ in outcomes]
+
 def get_deployment_operations(client, resource_group_name, deployment_name, operation_ids):
     """get a deployment's operation.
     """
@@ -450,9 +553,9 @@ class _ResourceUtils(object): #pylint: disable=too-many-instance-attributes
 
     def delete(self):
         if self.resource_id:
-            self.rcf.resources.delete_by_id(self.resource_id, self.api_version)
+            return self.rcf.resources.delete_by_id(self.resource_id, self.api_version)
         else:
-            self.rcf.resources.delete(self.resource_group_name,
+            return self.rcf.resources.delete(self.resource_group_name,
                                       self.resource_provider_namespace,
                                       self.parent_resource_path or '',
                                       self.resource_type,
@@ -461,6 +564,9 @@ class _ResourceUtils(object): #pylint: disable=too-many-instance-attributes
 
     def tag(self, tags):
         resource = self.get_resource()
+        if (resource.tags or {}) == (tags or {}): #pylint: disable=no-member
+            # nothing to write; this keeps reruns over many resources cheap
+            return resource
         # pylint: disable=no-member
         parameters = GenericResource(
             location=resource.location,
@@ -486,8 +592,9 @@ class _ResourceUtils(object): #pylint: disable=too-many-instance-attributes
                 parameters)
 
     @staticmethod
-    def _resolve_api_version(rcf, resource_provider_namespace, parent_resource_path, resource_type):
-        provider = rcf.providers.get(resource_provider_namespace)
+    def _resolve_api_version(rcf, resource_provider_namespace, parent_resource_path, resource_type,
+                             provider=None):
+        provider = provider or rcf.providers.get(resource_provider_namespace)
 
         #If available, we will use parent resource's api-version
         resource_type_str = (parent_resource_path.split('/')[0]
@@ -508,6 +615,12 @@ class _ResourceUtils(object): #pylint: disable=too-many-instance-attributes
 
     @staticmethod
     def _resolve_api_version_by_id(rcf, resource_id):
+        namespace, parent, resource_type = _ResourceUtils._get_resource_type(resource_id)
+        return _ResourceUtils._resolve_api_version(rcf, namespace, parent, resource_type)
+
+    @staticmethod
+    def _get_resource_type(resource_id):
+        ''' Return the namespace, parent resource path and type of a resource id. '''
         parts = parse_resource_id(resource_id)
         if parts.get('grandchild_type'):
             parent = (parts['type'] + '/' +  parts['name'] + '/' +
@@ -520,4 +633,4 @@ class _ResourceUtils(object): #pylint: disable=too-many-instance-attributes
             parent = None
             resource_type = parts['type']
 
-        return _ResourceUtils._resolve_api_version(rcf, parts['namespace'], parent, resource_type)
+        return parts['namespace'], parent, resource_type
@@ -0,0 +1,108 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import unittest
+
+import mock
+from msrestazure.azure_exceptions import CloudError
+
+from azure.cli.core._util import CLIError
+from azure.cli.command_modules.resource.custom import tag_resource, delete_resource
+
+ID_TEMPLATE = '/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg/providers/{}'
+
+
+class FakeResourceType(object): #pylint: disable=too-few-public-methods
+    def __init__(self, resource_type, api_versions):
+        self.resource_type = resource_type
+        self.api_versions = api_versions
+
+
+class FakeResource(object): #pylint: disable=too-few-public-methods
+    def __init__(self, tags=None):
+        self.tags = tags
+        self.location = 'westus'
+        self.plan = self.properties = self.kind = self.managed_by = None
+        self.sku = self.identity = None
+
+
+class FakeResourcesOperations(object):
+    def __init__(self):
+        self.tags = {}
+        self.writes = []
+        self.deleted = []
+        self.api_versions = {}
+        self.lock = threading.Lock()
+
+    def get_by_id(self, resource_id, api_version):
+        with self.lock:
+            self.api_versions[resource_id] = api_version
+        if resource_id.endswith('missing'):
+            raise CloudError(mock.MagicMock(status_code=404), 'Resource not found')
+        return FakeResource(self.tags.get(resource_id))
+
+    def create_or_update_by_id(self, resource_id, api_version, parameters): #pylint: disable=unused-argument
+        with self.lock:
+            self.tags[resource_id] = parameters.tags
+            self.writes.append(resource_id)
+        return FakeResource(parameters.tags)
+
+    def delete_by_id(self, resource_id, api_version): #pylint: disable=unused-argument
+        if resource_id.endswith('missing'):
+            raise CloudError(mock.MagicMock(status_code=404), 'Resource not found')
+        with self.lock:
+            self.deleted.append(resource_id)
+
+
+class TestResourceBulkOperations(unittest.TestCase):
+
+    def setUp(self):
+        self.rcf = mock.MagicMock()
+        self.rcf.resources = FakeResourcesOperations()
+        self.rcf.providers.get.return_value = mock.MagicMock(resource_types=[
+            FakeResourceType('virtualMachines', ['2017-03-30-preview', '2016-04-30']),
+            FakeResourceType('availabilitySets', ['2016-03-30'])])
+        patcher = mock.patch('azure.cli.command_modules.resource.custom._resource_client_factory',
+                             return_value=self.rcf)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_tag_many_resources(self):
+        vms = [ID_TEMPLATE.format('Microsoft.Compute/virtualMachines/vm{}'.format(i))
+               for i in range(30)]
+        avset = ID_TEMPLATE.format('Microsoft.Compute/availabilitySets/avset')
+        # values read from a file are split into ids
+        results = tag_resource({'cost': '1'}, resource_ids=vms[:10] + ['\n'.join(vms[10:])] +
+                               [avset], max_parallel=5)
+
+        self.assertEqual(len(results), 31)
+        self.assertTrue(all(r.tags == {'cost': '1'} for r in results))
+        # the provider is read once, and each type's api version is resolved once
+        self.rcf.providers.get.assert_called_once_with('Microsoft.Compute')
+        self.assertEqual(set(self.rcf.resources.api_versions[vm] for vm in vms), {'2016-04-30'})
+        self.assertEqual(self.rcf.resources.api_versions[avset], '2016-03-30')
+
+        # resources which already have the tags are not written again
+        self.rcf.resources.tags[vms[1]] = {'cost': '2'}
+        self.rcf.resources.writes = []
+        tag_resource({'cost': '1'}, resource_ids=vms[:2])
+        self.assertEqual(self.rcf.resources.writes, [vms[1]])
+
+    def test_failures_are_reported_after_all_resources(self):
+        ids = [ID_TEMPLATE.format('Microsoft.Compute/virtualMachines/{}'.format(name))
+               for name in ('vm1', 'missing', 'vm2')]
+        with self.assertRaises(CLIError) as context:
+            delete_resource(resource_ids=ids)
+        self.assertIn('1 of 3 resources failed', str(context.exception))
+        self.assertIn(ids[1], str(context.exception))
+        self.assertEqual(sorted(self.rcf.resources.deleted), sorted([ids[0], ids[2]]))
+
+        with self.assertRaises(CLIError):
+            tag_resource({'cost': '1'}, resource_ids=['not-an-id'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -154,6 +154,26 @@ helps['storage entity query'] = """
     short-summary: List entities which satisfy a given query.
 """
 
+helps['storage entity import'] = """
+    type: command
+    short-summary: Import the entities of a JSON lines or CSV file into a table.
+    long-summary: A property annotated with its type, such as "Count@odata.type":"Edm.Int64", is
+        imported with that type. As the service does, a JSON integer without a type is imported
+        as an Int32 if it fits. The files written by 'az storage entity export' are imported
+        unchanged.
+    examples:
+        - name: Import the entities of a CSV file, replacing the existing ones.
+          text: az storage entity import -t MyTable -f entities.csv --if-exists replace
+"""
+
+helps['storage entity export'] = """
+    type: command
+    short-summary: Export the entities which satisfy a given query to a JSON lines file.
+    long-summary: The properties of the types JSON cannot express, such as DateTime, Binary and
+        Int64, are annotated with their type, such as "Count@odata.type":"Edm.Int64". The Timestamp
+        and ETag of the entities are not exported.
+"""
+
 
 helps['storage file'] = """
     type: group
@@ -208,6 +228,9 @@ helps['storage file upload-batch'] = """
         - name: --max-connections
           type: integer
           short-summary: Maximum number of parallel connections to use. Default value is 1.
+        - name: --max-parallel
+          type: integer
+          short-summary: The maximum number of files to transfer in parallel. Default value is 8.
         - name: --validate-content
           type: bool
           short-summary: If set, calculates an MD5 hash for each range of the file. The storage
@@ -240,6 +263,9 @@ helps['storage file download-batch'] = """
         - name: --max-connections
           type: integer
           short-summary: Maximum number of parallel connections to use. Default value is 1.
+        - name: --max-parallel
+          type: integer
+          short-summary: The maximum number of files to transfer in parallel. Default value is 8.
         - name: --validate-content
           type: bool
           short-summary: If set, calculates an MD5 hash for each range of the file. The storage
@@ -268,6 +294,10 @@ helps['storage file copy start-batch'] = """
           type: bool
           short-summary: Output the list of files or blobs which would be uploaded. No actual data
                          transfer will occur.
+        - name: --max-parallel
+          type: integer
+          short-summary: The maximum number of files or blobs to start copying in parallel. Default
+                         value is 8.
         - name: --source-account
           type: string
           short-summary: The source storage account from which the files or blobs will be copied to
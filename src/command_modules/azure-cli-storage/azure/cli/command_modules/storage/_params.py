@@ -279,6 +279,8 @@ register_cli_argument('storage blob copy', 'source_lease_id', arg_group='Copy So
 register_cli_argument('storage blob copy start-batch', 'prefix', validator=process_blob_copy_batch_namespace)
 # Enable after https://github.com/Azure/azure-cli/issues/1414 is fixed.
 register_cli_argument('storage blob copy start-batch', 'blob_type', ignore_type)
+register_cli_argument('storage blob copy start-batch', 'max_parallel', type=int)
+register_cli_argument('storage blob copy start-batch', 'wait', action='store_true')
 
 register_cli_argument('storage blob delete', 'delete_snapshots', **enum_choice_list(list(delete_snapshot_types.keys())))
 
@@ -297,6 +299,7 @@ for item in ['update', 'upload', 'upload-batch']:
 register_cli_argument('storage blob upload', 'blob_type', help="Defaults to 'page' for *.vhd files, or 'block' otherwise.", options_list=('--type', '-t'), validator=validate_blob_type, **enum_choice_list(blob_types.keys()))
 register_cli_argument('storage blob upload', 'maxsize_condition', help='The max length in bytes permitted for an append blob.')
 register_cli_argument('storage blob upload', 'validate_content', help='Specifies that an MD5 hash shall be calculated for each chunk of the blob and verified by the service when the chunk has arrived.')
+register_cli_argument('storage blob upload', 'resumable', action='store_true', help='Upload a block or page blob in chunks, recording the chunks uploaded in a local checkpoint. If the upload is interrupted, run the command again to upload the remaining chunks only.')
 # TODO: Remove once #807 is complete. Smart Create Generation requires this parameter.
 register_extra_cli_argument('storage blob upload', '_subscription_id', options_list=('--subscription',), help=argparse.SUPPRESS)
 
@@ -306,6 +309,7 @@ register_cli_argument('storage blob download-batch', 'source', options_list=('--
                       validator=process_blob_download_batch_parameters)
 
 register_cli_argument('storage blob download-batch', 'source_container_name', ignore_type)
+register_cli_argument('storage blob download-batch', 'max_parallel', type=int)
 
 # BLOB UPLOAD-BATCH PARAMETERS
 register_cli_argument('storage blob upload-batch', 'destination', options_list=('--destination', '-d'))
@@ -334,6 +338,9 @@ register_cli_argument('storage blob upload-batch', 'content_type', arg_group='Co
 register_cli_argument('storage blob upload-batch', 'content_cache_control', arg_group='Content Control')
 register_cli_argument('storage blob upload-batch', 'content_language', arg_group='Content Control')
 register_cli_argument('storage blob upload-batch', 'max_connections', type=int)
+register_cli_argument('storage blob upload-batch', 'max_parallel', type=int)
+register_cli_argument('storage blob upload-batch', 'sync', action='store_true')
+register_cli_argument('storage blob upload-batch', 'delete_extraneous', action='store_true')
 
 # TODO: Remove workaround when Python storage SDK issue #190 is fixed.
 for item in ['upload', 'upload-batch']:
@@ -347,6 +354,7 @@ with CommandContext('storage file upload-batch') as c:
     with c.arg_group('Download Control') as group:
         group.reg_arg('validate_content')
         group.reg_arg('max_connections')
+        group.reg_arg('max_parallel', type=int)
 
 register_content_settings_argument('storage file upload-batch', FileContentSettings,
                                    update=False, arg_group='Content Settings')
@@ -359,10 +367,12 @@ with CommandContext('storage file download-batch') as c:
     with c.arg_group('Download Control') as group:
         group.reg_arg('validate_content')
         group.reg_arg('max_connections')
+        group.reg_arg('max_parallel', type=int)
 
 # FILE COPY-BATCH PARAMETERS
 with CommandContext('storage file copy start-batch') as c:
     c.reg_arg('source_client', ignore_type, validator=get_source_file_or_blob_service_client)
+    c.reg_arg('max_parallel', type=int)
 
     with c.arg_group('Copy Source Arguments') as group:
         group.reg_extra_arg('source_account')
@@ -469,6 +479,12 @@ register_cli_argument('storage entity', 'select', nargs='+', help='Space separat
 
 register_cli_argument('storage entity insert', 'if_exists', **enum_choice_list(['fail', 'merge', 'replace']))
 
+register_cli_argument('storage entity import', 'source', options_list=('--file', '-f'), type=file_type, completer=FilesCompleter())
+register_cli_argument('storage entity import', 'file_format', options_list=('--format',), **enum_choice_list(['jsonl', 'csv']))
+register_cli_argument('storage entity import', 'if_exists', **enum_choice_list(['fail', 'merge', 'replace']))
+register_cli_argument('storage entity import', 'max_parallel', type=int)
+register_cli_argument('storage entity export', 'destination', options_list=('--file', '-f'), type=file_type, completer=FilesCompleter())
+
 register_cli_argument('storage entity query', 'accept', help='Specifies how much metadata to include in the response payload.', default='minimal', validator=validate_accept, **enum_choice_list(table_payload_formats.keys()))
 
 register_cli_argument('storage queue', 'queue_name', queue_name_type, options_list=('--name', '-n'))
@@ -227,24 +227,25 @@ def validate_entity(namespace):
         raise argparse.ArgumentError(
             None, 'incorrect usage: entity requires: {}'.format(missing_keys))
 
-    def cast_val(key, val):
-        """ Attempts to cast numeric values (except RowKey and PartitionKey) to numbers so they
-        can be queried correctly. """
-        if key in ['PartitionKey', 'RowKey']:
-            return val
-
-        def try_cast(to_type):
-            try:
-                return to_type(val)
-            except ValueError:
-                return None
-        return try_cast(int) or try_cast(float) or val
-
     # ensure numbers are converted from strings so querying will work correctly
-    values = {key: cast_val(key, val) for key, val in values.items()}
+    values = {key: cast_entity_value(key, val) for key, val in values.items()}
     namespace.entity = values
 
 
+def cast_entity_value(key, val):
+    """ Attempts to cast numeric values (except RowKey and PartitionKey) to numbers so they
+    can be queried correctly. """
+    if key in ['PartitionKey', 'RowKey']:
+        return val
+
+    for to_type in (int, float):
+        try:
+            return to_type(val)
+        except ValueError:
+            pass
+    return val
+
+
 def get_file_path_validator(default_file_param=None):
     """ Creates a namespace validator that splits out 'path' into 'directory_name' and 'file_name'.
     Allows another path-type parameter to be named which can supply a default filename. """
@@ -454,6 +455,13 @@ def process_blob_upload_batch_parameters(namespace):
     if not os.path.isdir(namespace.source):
         raise ValueError('incorrect usage: source must be a directory')
 
+    if namespace.delete_extraneous and not namespace.sync:
+        raise ValueError('incorrect usage: --delete-extraneous requires --sync')
+
+    if namespace.sync and namespace.blob_type == 'append':
+        # the files would be appended to the blobs which are out of date
+        raise ValueError('incorrect usage: --sync is not supported for append blobs')
+
     # 2. try to extract account name and container name from destination string
     from .storage_url_helpers import StorageResourceIdentifier
     identifier = StorageResourceIdentifier(namespace.destination)
@@ -14,10 +14,14 @@ from azure.cli.core.azlogging import get_az_logger
 BlobCopyResult = namedtuple('BlobCopyResult', ['name', 'copy_id'])
 
 
+COPY_POLL_INTERVAL_SEC = 5
+COPY_WAIT_TIMEOUT_SEC = 24 * 60 * 60
+
+
 # pylint: disable=too-many-arguments
 def storage_blob_copy_batch(client, source_account, source_container, destination_container,
                             source_sas=None, prefix=None, recursive=False, snapshots=False,
-                            exclude_old=False, exclude_new=False):
+                            exclude_old=False, exclude_new=False, max_parallel=None, wait=False):
     """
     Copy blobs between containers and storage accounts. This is a server-side copy operation
     therefore the command is asynchronous.
@@ -54,17 +58,22 @@ def storage_blob_copy_batch(client, source_account, source_container, destinatio
         Excludes a newer source resource. The resource will not be copied if the last modified time
         of the source is the same or newer than destination.
 
+    :param int max_parallel:
+        The maximum number of copies to start in parallel.
+
+    :param bool wait:
+        Wait until all the copies are complete, and report the copies which failed.
+
     :return: A BlobCopyTicket instance summarize the operations
     """
 
     # TODO:
-    # 1. Page the result list (using num_result and marker)
-    # 2. Support connection string for source
-    # 3. stop using 'baseblobservice.exists' function. it doesn't provide performance gain
-    #    since it invoked the get_blob_properties any way.
+    # 1. Support connection string for source
 
     # Question:
     # 1. Performance of creating a source blob service
+    from .transfer import TransferScheduler, share_connection_pool
+
     src_client = BlockBlobService(account_name=source_account, sas_token=source_sas)
 
     def _get_blob_name(source_blob):
@@ -97,6 +106,22 @@ def storage_blob_copy_batch(client, source_account, source_container, destinatio
 
         return src_url
 
+    # the last modified time of the destination blobs, listed once rather than per blob
+    destination_index = {}
+    if exclude_new or exclude_old:
+        destination_index = dict(
+            (b.name, b.properties.last_modified)
+            for b in client.list_blobs(destination_container, prefix=prefix)
+            if recursive or b.name == prefix)
+
+    def _is_excluded(source_blob):
+        destination_modified = destination_index.get(source_blob.name)
+        if destination_modified is None:
+            return False
+        source_modified = source_blob.properties.last_modified
+        return (exclude_old and source_modified <= destination_modified) or \
+            (exclude_new and source_modified >= destination_modified)
+
     def _copy_single_blob(source_blob):
         kwargs = {
             "container_name": destination_container,
@@ -104,11 +129,10 @@ def storage_blob_copy_batch(client, source_account, source_container, destinatio
             "copy_source": _get_blob_url(source_blob)
         }
 
-        if (exclude_new or exclude_old) and client.exists(destination_container, source_blob.name):
+        if source_blob.name in destination_index:
+            # the conditions still protect against a blob changed since it was listed
             if exclude_old:
-                destination_blob = client.get_blob_properties(destination_container,
-                                                              source_blob.name)
-                kwargs["source_if_modified_since"] = destination_blob.properties.last_modified
+                kwargs["source_if_modified_since"] = destination_index[source_blob.name]
             if exclude_new:
                 kwargs["destination_if_modified_since"] = source_blob.properties.last_modified
 
@@ -124,12 +148,92 @@ def storage_blob_copy_batch(client, source_account, source_container, destinatio
     else:
         source_blobs = []
 
-    return [BlobCopyResult(b.name, _copy_single_blob(b).id) for b in source_blobs]
+    excluded = []
+
+    def _included_blobs():
+        for b in source_blobs:
+            if _is_excluded(b):
+                excluded.append(b.name)
+            else:
+                yield b
+
+    # the copies are started while the source container is listed
+    scheduler = TransferScheduler(max_parallel, operation='copy')
+    share_connection_pool(client, scheduler.max_parallel)
+    copies = scheduler.run(_included_blobs(), lambda b: (b, _copy_single_blob(b)),
+                           describe=lambda b: b.name)
+    if excluded:
+        get_az_logger(__name__).warning('%d blobs are not copied, excluded by their last modified '
+                                        'time', len(excluded))
+
+    if wait:
+        _wait_for_blob_copies(client, destination_container, prefix if recursive else None,
+                              dict((_get_blob_name(b), copy.id) for b, copy in copies
+                                   if copy.status != 'success'))
+    return [BlobCopyResult(b.name, copy.id) for b, copy in copies]
+
+
+def _wait_for_blob_copies(client, container_name, prefix, pending,
+                          timeout=COPY_WAIT_TIMEOUT_SEC):
+    """
+    Wait until the copies to the blobs of the container are complete. Their status is polled by
+    listing the blobs with their copy properties, rather than one blob at a time. A destination
+    blob which is deleted, or which another copy is started to, fails the wait for its copy.
+
+    :param dict pending: the copy ids of the pending copies, by the name of the destination blob
+    :param int timeout: the seconds to wait for the copies before giving up
+    """
+    import time
+    import timeit
+    from azure.common import AzureMissingResourceHttpError
+    from azure.cli.core._util import CLIError
+
+    logger = get_az_logger(__name__)
+    total = len(pending)
+    failures = []
+    start = timeit.default_timer()
+    while pending:
+        time.sleep(COPY_POLL_INTERVAL_SEC)
+        if len(pending) == 1:
+            try:
+                blobs = [client.get_blob_properties(container_name, next(iter(pending)))]
+            except AzureMissingResourceHttpError:
+                blobs = []
+        else:
+            blobs = client.list_blobs(container_name, prefix=prefix, include=Include(copy=True))
+
+        listed = set()
+        for blob in blobs:
+            if blob.name not in pending:
+                continue
+            listed.add(blob.name)
+            copy = blob.properties.copy
+            if copy.id != pending[blob.name]:
+                failures.append('{}: superseded by another copy'.format(blob.name))
+            elif copy.status in ('failed', 'aborted'):
+                failures.append('{}: {}'.format(blob.name,
+                                                copy.status_description or copy.status))
+            elif copy.status != 'success':
+                continue
+            del pending[blob.name]
+        for name in [n for n in pending if n not in listed]:
+            del pending[name]
+            failures.append('{}: the destination blob was deleted'.format(name))
+        logger.warning('%d of %d copies complete', total - len(pending), total)
+
+        if pending and timeit.default_timer() - start >= timeout:
+            failures.extend('{}: still pending after {} seconds'.format(name, timeout)
+                            for name in sorted(pending))
+            break
+
+    if failures:
+        raise CLIError('{} of {} copies failed:\n{}'.format(len(failures), total,
+                                                            '\n'.join(failures)))
 
 
 # pylint: disable=unused-argument
 def storage_blob_download_batch(client, source, destination, source_container_name, pattern=None,
-                                dryrun=False):
+                                dryrun=False, max_parallel=None):
     """
     Download blobs in a container recursively
 
@@ -148,11 +252,15 @@ def storage_blob_download_batch(client, source, destination, source_container_na
     :param str pattern:
         The pattern is used for files globbing. The supported patterns are '*', '?', '[seq]',
         and '[!seq]'.
+
+    :param int max_parallel:
+        The maximum number of blobs to download in parallel.
     """
     from .util import collect_blobs
     source_blobs = collect_blobs(client, source_container_name, pattern)
 
     if dryrun:
+        source_blobs = list(source_blobs)
         logger = get_az_logger(__name__)
         logger.warning('download action: from %s to %s', source, destination)
         logger.warning('    pattern %s', pattern)
@@ -163,8 +271,15 @@ def storage_blob_download_batch(client, source, destination, source_container_na
             logger.warning('  - %s', b)
         return []
     else:
-        return list(_download_blob(client, source_container_name, destination, blob) for blob in
-                    source_blobs)
+        import os.path
+        from .transfer import TransferScheduler, share_connection_pool
+
+        scheduler = TransferScheduler(max_parallel, operation='download')
+        share_connection_pool(client, scheduler.max_parallel)
+        return scheduler.run(
+            source_blobs,
+            lambda blob: _download_blob(client, source_container_name, destination, blob),
+            size=lambda blob, _: os.path.getsize(os.path.join(destination, blob)))
 
 
 def storage_blob_upload_batch(client, source, destination, pattern=None, source_files=None,
@@ -172,7 +287,8 @@ def storage_blob_upload_batch(client, source, destination, pattern=None, source_
                               content_settings=None, metadata=None, validate_content=False,
                               maxsize_condition=None, max_connections=2, lease_id=None,
                               if_modified_since=None, if_unmodified_since=None, if_match=None,
-                              if_none_match=None, timeout=None, dryrun=False):
+                              if_none_match=None, timeout=None, dryrun=False, max_parallel=None,
+                              sync=False, delete_extraneous=False):
     """
     Upload files to storage container as blobs
 
@@ -200,6 +316,18 @@ def storage_blob_upload_batch(client, source, destination, pattern=None, source_
         operation only if the resource's ETag does not match the value specified. Specify the
         wildcard character (*) to perform the operation only if the resource does not exist,
         and fail the operation if it does exist.
+
+    :param int max_parallel:
+        The maximum number of files to upload in parallel. Each file is uploaded with up to
+        max_connections connections.
+
+    :param bool sync:
+        Upload only the files which are new or changed, compared to the blobs in the container by
+        size and MD5 hash, or by last modified time for blobs which have no MD5 hash. Not supported
+        for append blobs.
+
+    :param bool delete_extraneous:
+        With --sync, delete the blobs matching the pattern which have no source file.
     """
     def _append_blob(file_path, blob_name):
         if not client.exists(destination_container_name, blob_name):
@@ -230,7 +358,8 @@ def storage_blob_upload_batch(client, source, destination, pattern=None, source_
             blob_name=blob_name,
             file_path=file_path,
             progress_callback=lambda c, t: None,
-            content_settings=content_settings,
+            content_settings=_with_content_md5(content_settings, file_path) if sync else
+            content_settings,
             metadata=metadata,
             validate_content=validate_content,
             max_connections=max_connections,
@@ -241,7 +370,33 @@ def storage_blob_upload_batch(client, source, destination, pattern=None, source_
             if_none_match=if_none_match,
             timeout=timeout)
 
-    upload_action = _upload_blob if blob_type == 'block' or blob_type == 'page' else _append_blob
+    def _upload_page_blob(file_path, blob_name):
+        from .sparse import upload_page_blob
+        return upload_page_blob(
+            client, destination_container_name, blob_name, file_path,
+            max_connections=max_connections,
+            content_settings=_with_content_md5(content_settings, file_path) if sync else
+            content_settings,
+            metadata=metadata,
+            validate_content=validate_content,
+            lease_id=lease_id,
+            if_modified_since=if_modified_since,
+            if_unmodified_since=if_unmodified_since,
+            if_match=if_match,
+            if_none_match=if_none_match,
+            timeout=timeout)
+
+    upload_action = {'block': _upload_blob, 'page': _upload_page_blob}.get(blob_type, _append_blob)
+
+    import os.path
+    from .transfer import TransferScheduler, share_connection_pool
+
+    extraneous_blobs = []
+    if sync:
+        source_files, extraneous_blobs = _get_sync_operations(
+            client, destination_container_name, source_files or [], pattern, max_parallel)
+        if not delete_extraneous:
+            extraneous_blobs = []
 
     if dryrun:
         logger = get_az_logger(__name__)
@@ -253,10 +408,73 @@ def storage_blob_upload_batch(client, source, destination, pattern=None, source_
         logger.warning(' operations')
         for f in source_files or []:
             logger.warning('  - %s => %s', *f)
+        for blob_name in extraneous_blobs:
+            logger.warning('  - delete %s', blob_name)
     else:
-        for f in source_files or []:
-            print('uploading {}'.format(f[0]))
-            upload_action(*f)
+        scheduler = TransferScheduler(max_parallel, operation='upload')
+        share_connection_pool(client, scheduler.max_parallel * max_connections)
+        scheduler.run(source_files or [], lambda f: upload_action(*f), describe=lambda f: f[0],
+                      size=lambda f, _: os.path.getsize(f[0]))
+        if extraneous_blobs:
+            TransferScheduler(max_parallel, operation='delete').run(
+                extraneous_blobs,
+                lambda blob_name: client.delete_blob(destination_container_name, blob_name))
+
+
+def _get_sync_operations(client, container_name, source_files, pattern, max_parallel=None):
+    """
+    Compare the source files with the blobs of the container, which are listed once. Return the
+    source files which are new or changed, and the names of the blobs matching the pattern which
+    have no source file.
+    """
+    from .transfer import TransferScheduler
+    from .util import list_matching_blobs
+
+    blob_pattern = pattern.lstrip('/') if pattern else None
+    remote_blobs = dict((b.name, b) for b in list_matching_blobs(client, container_name,
+                                                                 blob_pattern))
+    local_names = set(blob_name for _, blob_name in source_files)
+    extraneous_blobs = sorted(name for name in remote_blobs if name not in local_names)
+
+    def _is_changed(source_file):
+        file_path, blob_name = source_file
+        return blob_name not in remote_blobs or \
+            not _is_unchanged(file_path, remote_blobs[blob_name])
+
+    changed = TransferScheduler(max_parallel, retries=0, operation='compare').run(
+        source_files, _is_changed, describe=lambda f: f[0])
+    changed_files = [f for f, is_changed in zip(source_files, changed) if is_changed]
+    get_az_logger(__name__).info('sync: %d of %d files are new or changed, %d blobs have no source '
+                                 'file', len(changed_files), len(source_files),
+                                 len(extraneous_blobs))
+    return changed_files, extraneous_blobs
+
+
+def _is_unchanged(file_path, blob):
+    import calendar
+    import os.path
+    from .util import get_file_md5
+
+    properties = blob.properties
+    if properties.content_length != os.path.getsize(file_path):
+        return False
+    if properties.content_settings.content_md5:
+        return get_file_md5(file_path) == properties.content_settings.content_md5
+    # the service keeps no MD5 hash for blobs uploaded in blocks; such a blob is unchanged
+    # unless the file was modified after it
+    return os.path.getmtime(file_path) <= calendar.timegm(properties.last_modified.utctimetuple())
+
+
+def _with_content_md5(content_settings, file_path):
+    # the MD5 hash lets later syncs compare files with blobs uploaded in blocks
+    import copy
+    from azure.storage.blob.models import ContentSettings
+    from .util import get_file_md5
+
+    content_settings = copy.copy(content_settings) if content_settings else ContentSettings()
+    if not content_settings.content_md5:
+        content_settings.content_md5 = get_file_md5(file_path)
+    return content_settings
 
 
 def _download_blob(blob_service, container, destination_folder, blob_name):
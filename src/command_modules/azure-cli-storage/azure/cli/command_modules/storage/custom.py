@@ -5,9 +5,6 @@
 
 # pylint: disable=no-self-use,too-many-arguments,line-too-long
 
-from __future__ import print_function
-from sys import stderr
-
 from azure.mgmt.storage.models import Kind
 from azure.storage.models import Logging, Metrics, CorsRule, RetentionPolicy
 from azure.storage.blob import BlockBlobService
@@ -24,17 +21,6 @@ from azure.cli.command_modules.storage._factory import \
     (storage_client_factory, generic_data_service_factory)
 
 
-def _update_progress(current, total):
-    if total:
-        message = 'Percent complete: %'
-        percent_done = current * 100 / total
-        message += '{: >5.1f}'.format(percent_done)
-        print('\b' * len(message) + message, end='', file=stderr)
-        stderr.flush()
-        if current == total:
-            print('', file=stderr)
-
-
 # CUSTOM METHODS
 
 @transfer_doc(FileService.list_directories_and_files)
@@ -130,8 +116,11 @@ def upload_blob(  # pylint: disable=too-many-locals
         client, container_name, blob_name, file_path, blob_type=None,
         content_settings=None, metadata=None, validate_content=False, maxsize_condition=None,
         max_connections=2, lease_id=None, if_modified_since=None,
-        if_unmodified_since=None, if_match=None, if_none_match=None, timeout=None):
+        if_unmodified_since=None, if_match=None, if_none_match=None, timeout=None,
+        resumable=False):
     '''Upload a blob to a container.'''
+    from azure.cli.command_modules.storage.transfer import TransferProgress
+
     def upload_append_blob():
         if not client.exists(container_name, blob_name):
             client.create_blob(
@@ -148,7 +137,7 @@ def upload_blob(  # pylint: disable=too-many-locals
             container_name=container_name,
             blob_name=blob_name,
             file_path=file_path,
-            progress_callback=_update_progress,
+            progress_callback=TransferProgress(),
             validate_content=validate_content,
             maxsize_condition=maxsize_condition,
             lease_id=lease_id,
@@ -159,7 +148,7 @@ def upload_blob(  # pylint: disable=too-many-locals
             container_name=container_name,
             blob_name=blob_name,
             file_path=file_path,
-            progress_callback=_update_progress,
+            progress_callback=TransferProgress(),
             content_settings=content_settings,
             metadata=metadata,
             validate_content=validate_content,
@@ -172,10 +161,45 @@ def upload_blob(  # pylint: disable=too-many-locals
             timeout=timeout
         )
 
+    def upload_page_blob():
+        from azure.cli.command_modules.storage.sparse import upload_page_blob as upload_sparse
+        return upload_sparse(
+            client, container_name, blob_name, file_path,
+            max_connections=max_connections,
+            progress_callback=TransferProgress(),
+            content_settings=content_settings,
+            metadata=metadata,
+            validate_content=validate_content,
+            lease_id=lease_id,
+            if_modified_since=if_modified_since,
+            if_unmodified_since=if_unmodified_since,
+            if_match=if_match,
+            if_none_match=if_none_match,
+            timeout=timeout)
+
+    def upload_resumable():
+        from azure.cli.command_modules.storage.resumable import ResumableUpload
+        return ResumableUpload(
+            client, container_name, blob_name, file_path, blob_type,
+            max_connections=max_connections,
+            validate_content=validate_content,
+            lease_id=lease_id,
+            timeout=timeout,
+            progress_callback=TransferProgress()).upload(
+                content_settings=content_settings,
+                metadata=metadata,
+                if_modified_since=if_modified_since,
+                if_unmodified_since=if_unmodified_since,
+                if_match=if_match,
+                if_none_match=if_none_match)
+
+    if resumable:
+        return upload_resumable()
+
     type_func = {
         'append': upload_append_blob,
         'block': upload_block_blob,
-        'page': upload_block_blob  # same implementation
+        'page': upload_page_blob
     }
     return type_func[blob_type]()
 
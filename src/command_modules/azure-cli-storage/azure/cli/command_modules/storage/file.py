@@ -13,12 +13,13 @@ import os.path
 from azure.cli.core.azlogging import get_az_logger
 from azure.cli.core._util import CLIError
 from azure.common import AzureException, AzureHttpError
+from .transfer import is_retriable
 from .util import filter_none, create_blob_service_from_storage_client, collect_blobs, collect_files
 
 
 def storage_file_upload_batch(client, destination, source, pattern=None, dryrun=False,
                               validate_content=False, content_settings=None, max_connections=1,
-                              metadata=None):
+                              metadata=None, max_parallel=None):
     """
     Upload local files to Azure Storage File Share in batch
     """
@@ -38,13 +39,20 @@ def storage_file_upload_batch(client, destination, source, pattern=None, dryrun=
 
         return []
 
-    # TODO: Performance improvement
-    # 1. Upload files in parallel
+    from .transfer import TransferScheduler, share_connection_pool
+
+    scheduler = TransferScheduler(max_parallel, operation='upload')
+    share_connection_pool(client, scheduler.max_parallel * max_connections)
+
+    # create each directory of the destination once, before the files are uploaded
+    _make_directories_in_files_share(client, destination,
+                                     [os.path.dirname(f[1]) for f in source_files],
+                                     max_parallel=scheduler.max_parallel)
+
     def _upload_action(source_pair):
         dir_name = os.path.dirname(source_pair[1])
         file_name = os.path.basename(source_pair[1])
 
-        _make_directory_in_files_share(client, destination, dir_name)
         client.create_file_from_path(share_name=destination,
                                      directory_name=dir_name,
                                      file_name=file_name,
@@ -56,18 +64,22 @@ def storage_file_upload_batch(client, destination, source, pattern=None, dryrun=
 
         return client.make_file_url(destination, dir_name, file_name)
 
-    return list(_upload_action(f) for f in source_files)
+    return scheduler.run(source_files, _upload_action, describe=lambda f: f[0],
+                         size=lambda f, _: os.path.getsize(f[0]))
 
 
 def storage_file_download_batch(client, source, destination, pattern=None, dryrun=False,
-                                validate_content=False, max_connections=1):
+                                validate_content=False, max_connections=1, max_parallel=None):
     """
     Download files from file share to local directory in batch
     """
 
     from .util import glob_files_remotely, mkdir_p
+    from .transfer import TransferScheduler, share_connection_pool
 
-    source_files = glob_files_remotely(client, source, pattern)
+    scheduler = TransferScheduler(max_parallel, operation='download')
+    share_connection_pool(client, scheduler.max_parallel * max_connections)
+    source_files = glob_files_remotely(client, source, pattern, max_parallel=scheduler.max_parallel)
 
     if dryrun:
         source_files_list = list(source_files)
@@ -96,16 +108,23 @@ def storage_file_download_batch(client, source, destination, pattern=None, dryru
                                 max_connections=max_connections)
         return client.make_file_url(source, *pair)
 
-    return list(_download_action(f) for f in source_files)
+    # the files are downloaded while the share is listed
+    return scheduler.run(source_files, _download_action, describe=lambda f: os.path.join(*f),
+                         size=lambda f, _: os.path.getsize(os.path.join(destination, *f)))
 
 
 def storage_file_copy_batch(client, source_client,
                             destination_share=None, destination_path=None,
                             source_container=None, source_share=None, source_sas=None,
-                            pattern=None, dryrun=False, metadata=None, timeout=None):
+                            pattern=None, dryrun=False, metadata=None, timeout=None,
+                            max_parallel=None):
     """
     Copy a group of files asynchronously
     """
+    from .transfer import TransferScheduler, share_connection_pool
+
+    scheduler = TransferScheduler(max_parallel, operation='copy')
+    share_connection_pool(client, scheduler.max_parallel)
     logger = None
     if dryrun:
         logger = get_az_logger(__name__)
@@ -124,21 +143,29 @@ def storage_file_copy_batch(client, source_client,
         # if the source client is None, recreate one from the destination client.
         source_client = source_client or create_blob_service_from_storage_client(client)
 
+        source_blobs = list(collect_blobs(source_client, source_container, pattern))
+
         # the cache of existing directories in the destination file share. the cache helps to avoid
         # repeatedly create existing directory so as to optimize the performance.
         existing_dirs = set([])
+        if not dryrun:
+            _make_directories_in_files_share(
+                client, destination_share,
+                [os.path.dirname(_join_destination_path(destination_path, blob_name))
+                 for blob_name in source_blobs], existing_dirs, scheduler.max_parallel)
 
         def action_blob_copy(blob_name):
             if dryrun:
                 logger.warning('  - copy blob %s', blob_name)
             else:
-                _create_file_and_directory_from_blob(
+                return _create_file_and_directory_from_blob(
                     client, source_client, destination_share, source_container, source_sas,
                     blob_name, destination_dir=destination_path, metadata=metadata, timeout=timeout,
                     existing_dirs=existing_dirs)
 
-        return list(filter_none(action_blob_copy(blob) for blob in
-                                collect_blobs(source_client, source_container, pattern)))
+        if dryrun:
+            return list(filter_none(action_blob_copy(blob) for blob in source_blobs))
+        return scheduler.run(source_blobs, action_blob_copy)
 
     elif source_share:
         # copy files from share to share
@@ -147,27 +174,40 @@ def storage_file_copy_batch(client, source_client,
         # destination, therefore client is reused.
         source_client = source_client or client
 
+        source_files = list(collect_files(source_client, source_share, pattern,
+                                          max_parallel=scheduler.max_parallel))
+
         # the cache of existing directories in the destination file share. the cache helps to avoid
         # repeatedly create existing directory so as to optimize the performance.
         existing_dirs = set([])
+        if not dryrun:
+            _make_directories_in_files_share(
+                client, destination_share,
+                [os.path.dirname(_join_destination_path(destination_path, os.path.join(*f)))
+                 for f in source_files], existing_dirs, scheduler.max_parallel)
 
         def action_file_copy(file_info):
             dir_name, file_name = file_info
             if dryrun:
                 logger.warning('  - copy file %s', os.path.join(dir_name, file_name))
             else:
-                _create_file_and_directory_from_file(
+                return _create_file_and_directory_from_file(
                     client, source_client, destination_share, source_share, source_sas, dir_name,
                     file_name, destination_dir=destination_path, metadata=metadata,
                     timeout=timeout, existing_dirs=existing_dirs)
 
-        return list(filter_none(action_file_copy(file) for file in
-                                collect_files(source_client, source_share, pattern)))
+        if dryrun:
+            return list(filter_none(action_file_copy(file) for file in source_files))
+        return scheduler.run(source_files, action_file_copy, describe=lambda f: os.path.join(*f))
     else:
         # won't happen, the validator should ensure either source_container or source_share is set
         raise ValueError('Fail to find source. Neither blob container or file share is specified.')
 
 
+def _join_destination_path(destination_dir, path):
+    return os.path.join(destination_dir, path) if destination_dir else path
+
+
 def _create_file_and_directory_from_blob(file_service, blob_service, share, container, sas,
                                          blob_name,
                                          destination_dir=None, metadata=None, timeout=None,
@@ -184,7 +224,10 @@ def _create_file_and_directory_from_blob(file_service, blob_service, share, cont
     try:
         file_service.copy_file(share, dir_name, file_name, blob_url, metadata, timeout)
         return file_service.make_file_url(share, dir_name, file_name)
-    except AzureException:
+    except AzureException as ex:
+        if is_retriable(ex):
+            # left for the transfer scheduler to retry
+            raise
         error_template = 'Failed to copy blob {} to file share {}. Please check if you have ' + \
                          'permission to read source or set a correct sas token.'
         raise CLIError(error_template.format(blob_name, share))
@@ -208,7 +251,10 @@ def _create_file_and_directory_from_file(file_service, source_file_service, shar
     try:
         file_service.copy_file(share, dir_name, file_name, file_url, metadata, timeout)
         return file_service.make_file_url(share, dir_name or None, file_name)
-    except AzureException:
+    except AzureException as ex:
+        if is_retriable(ex):
+            # left for the transfer scheduler to retry
+            raise
         error_template = 'Failed to copy file {} from share {} to file share {}. Please check if ' \
                          'you have right permission to read source or set a correct sas token.'
         raise CLIError(error_template.format(file_name, source_share, share))
@@ -223,6 +269,7 @@ def _make_directory_in_files_share(file_service, file_share, directory_path, exi
     which already exists.
     """
 
+    directory_path = _strip_separators(directory_path)
     if not directory_path:
         return
 
@@ -233,15 +280,61 @@ def _make_directory_in_files_share(file_service, file_share, directory_path, exi
         p = os.path.dirname(p)
 
     for dir_name in reversed(parents):
-        if existing_dirs and (dir_name in existing_dirs):
+        if existing_dirs is not None and (dir_name in existing_dirs):
             continue
 
-        try:
-            file_service.create_directory(share_name=file_share,
-                                          directory_name=dir_name,
-                                          fail_on_exist=False)
-        except AzureHttpError:
-            raise CLIError('Failed to create directory {}'.format(dir_name))
+        _create_directory(file_service, file_share, dir_name)
+
+        if existing_dirs is not None:
+            existing_dirs.add(dir_name)
+
+
+def _make_directories_in_files_share(file_service, file_share, directory_paths,
+                                     existing_dirs=None, max_parallel=None):
+    """
+    Create the given directories and their parents, each of them once.
+
+    The directories are created a level of the tree at a time, so the parents are created before
+    their children, while the directories of a level are created in parallel, with the retries of
+    the transfers. The directories in the existing_dirs cache are skipped, and the ones created are
+    added to it.
+    """
+    from .transfer import TransferScheduler
+
+    existing_dirs = set() if existing_dirs is None else existing_dirs
+    levels = {}
+    for path in set(_strip_separators(p) for p in directory_paths):
+        while path and path not in existing_dirs:
+            levels.setdefault(_get_directory_depth(path), set()).add(path)
+            path = os.path.dirname(path)
+
+    for depth in sorted(levels):
+        dir_names = sorted(levels[depth])
+        TransferScheduler(max_parallel, operation='create', unit='directories').run(
+            dir_names, lambda dir_name: _create_directory(file_service, file_share, dir_name))
+        existing_dirs.update(dir_names)
+    return existing_dirs
+
 
-        if existing_dirs:
-            existing_dirs.add(directory_path)
+def _strip_separators(directory_path):
+    # the parent of '/' is '/' itself, so a leading separator would never lead to the root
+    return directory_path.strip('/\\') if directory_path else directory_path
+
+
+def _get_directory_depth(directory_path):
+    depth = 0
+    while directory_path:
+        depth += 1
+        directory_path = os.path.dirname(directory_path)
+    return depth
+
+
+def _create_directory(file_service, file_share, dir_name):
+    try:
+        file_service.create_directory(share_name=file_share,
+                                      directory_name=dir_name,
+                                      fail_on_exist=False)
+    except AzureHttpError as ex:
+        if is_retriable(ex):
+            raise
+        raise CLIError('Failed to create directory {}'.format(dir_name))
@@ -0,0 +1,127 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Persistent cache of the content hashes of local files
+"""
+
+import atexit
+import base64
+import hashlib
+import mmap
+import os
+import threading
+import time
+
+from azure.cli.core.azlogging import get_az_logger
+
+logger = get_az_logger(__name__)
+
+MANIFEST_FILE_NAME = 'storage_file_hashes.json'
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+# entries which haven't been used for this long are dropped
+ENTRY_MAX_AGE_SEC = 30 * 24 * 3600
+# a file modified this recently may be modified again without its size and mtime changing
+RACY_MTIME_SEC = 2
+
+
+def compute_file_md5(path):
+    """Return the base64 encoded MD5 hash of a local file, reading it memory-mapped in chunks"""
+    md5 = hashlib.md5()
+    with open(path, 'rb') as stream:
+        size = os.fstat(stream.fileno()).st_size
+        if size:
+            mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for offset in range(0, size, HASH_CHUNK_SIZE):
+                    md5.update(mapped[offset:offset + HASH_CHUNK_SIZE])
+            finally:
+                mapped.close()
+    return base64.b64encode(md5.digest()).decode('utf-8')
+
+
+def _get_file_state(stat):
+    mtime_ns = getattr(stat, 'st_mtime_ns', None) or int(stat.st_mtime * 1e9)
+    return [stat.st_size, mtime_ns, stat.st_ino]
+
+
+class FileHashManifest(object):
+    """
+    The MD5 hashes of local files, keyed by path and kept with the size, mtime and inode of the
+    file. A hash is reused as long as these are unchanged, so unchanged files aren't read again.
+    The manifest is saved in the configuration directory when the process exits.
+    """
+
+    def __init__(self, filename):
+        from azure.cli.core._session import Session
+
+        self._session = Session(encoding='utf-8')
+        try:
+            self._session.load(filename)
+        except (OSError, IOError, ValueError) as ex:
+            logger.debug('Failed to load the file hash manifest: %s', ex)
+            self._session.filename = filename
+        if self._session.data.get('version') != MANIFEST_VERSION:
+            self._session.data = {'version': MANIFEST_VERSION, 'files': {}}
+        self._files = self._session.data['files']
+        self._lock = threading.Lock()
+        self._modified = False
+        self.hits = 0
+        self.misses = 0
+
+    def get_md5(self, path):
+        path = os.path.abspath(path)
+        state = _get_file_state(os.stat(path))
+        now = time.time()
+        with self._lock:
+            entry = self._files.get(path)
+            if entry and entry[:3] == state:
+                entry[4] = now
+                self._modified = True
+                self.hits += 1
+                return entry[3]
+
+        md5 = compute_file_md5(path)
+        with self._lock:
+            self.misses += 1
+            if state[1] / 1e9 < now - RACY_MTIME_SEC:
+                self._files[path] = state + [md5, now]
+                self._modified = True
+        return md5
+
+    def save(self):
+        if not self._modified:
+            return
+        expired = time.time() - ENTRY_MAX_AGE_SEC
+        with self._lock:
+            for path in [p for p, entry in self._files.items() if entry[4] < expired]:
+                del self._files[path]
+            try:
+                self._session.save_with_retry()
+                self._modified = False
+            except (OSError, IOError) as ex:
+                logger.debug('Failed to save the file hash manifest: %s', ex)
+        logger.debug('File hash manifest: %d hashes reused, %d computed', self.hits, self.misses)
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def get_file_hash_manifest():
+    """Return the manifest of the process, or None if the [storage] hash_manifest configuration
+    is off."""
+    global _manifest  # pylint: disable=global-statement
+    with _manifest_lock:
+        if _manifest is None:
+            from azure.cli.core._config import az_config
+            from azure.cli.core._environment import get_config_dir
+
+            if not az_config.getboolean('storage', 'hash_manifest', fallback=True):
+                return None
+            _manifest = FileHashManifest(os.path.join(get_config_dir(), MANIFEST_FILE_NAME))
+            atexit.register(_manifest.save)
+        return _manifest
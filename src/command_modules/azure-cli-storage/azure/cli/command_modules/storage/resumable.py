@@ -0,0 +1,293 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Resumable uploads of block and page blobs
+
+The file is uploaded in chunks of 4 MiB, the largest block or page write the service accepts. The
+chunks which have been uploaded are recorded in a checkpoint file in the configuration directory.
+When the upload of the same file to the same blob is started again, the chunks recorded in the
+checkpoint which the service still has are skipped.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import timeit
+
+from azure.cli.core.azlogging import get_az_logger
+from azure.cli.core._util import CLIError
+from azure.cli.command_modules.storage.sparse import PAGE_SIZE
+
+logger = get_az_logger(__name__)
+
+CHUNK_SIZE = 4 * 1024 * 1024
+MAX_BLOCKS = 50000
+CHECKPOINT_DIR_NAME = 'storage_upload_checkpoints'
+CHECKPOINT_SAVE_INTERVAL_SEC = 5.0
+
+
+def _get_checkpoint_path(account_name, container_name, blob_name):
+    from azure.cli.core._environment import get_config_dir
+
+    key = '\n'.join([account_name or '', container_name, blob_name]).encode('utf-8')
+    return os.path.join(get_config_dir(), CHECKPOINT_DIR_NAME,
+                        hashlib.sha1(key).hexdigest() + '.json')
+
+
+def _get_file_state(file_path):
+    stat = os.stat(file_path)
+    mtime_ns = getattr(stat, 'st_mtime_ns', None) or int(stat.st_mtime * 1e9)
+    return {'path': os.path.abspath(file_path), 'size': stat.st_size, 'mtime_ns': mtime_ns}
+
+
+class UploadCheckpoint(object):
+    """
+    The chunks of a file uploaded to a blob. A checkpoint is only valid for the file it was
+    created for; it is discarded once the file changes.
+    """
+
+    def __init__(self, path, blob_type, file_state):
+        self.path = path
+        self.blob_type = blob_type
+        self.file_state = file_state
+        self.upload_id = hashlib.md5(json.dumps(
+            [blob_type, file_state], sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        self.done = set()
+        self._lock = threading.Lock()
+        self._last_save = timeit.default_timer()
+
+    @classmethod
+    def load(cls, path, blob_type, file_state):
+        checkpoint = cls(path, blob_type, file_state)
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get('upload_id') == checkpoint.upload_id:
+                checkpoint.done = set(data.get('done', []))
+        except (OSError, IOError, ValueError):
+            pass
+        return checkpoint
+
+    def record(self, chunk):
+        with self._lock:
+            self.done.add(chunk)
+            if timeit.default_timer() - self._last_save >= CHECKPOINT_SAVE_INTERVAL_SEC:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        from .util import mkdir_p
+
+        mkdir_p(os.path.dirname(self.path))
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'upload_id': self.upload_id, 'file': self.file_state,
+                       'done': sorted(self.done)}, f)
+        # replace the checkpoint in one step, so an interrupted save doesn't lose it
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rename(temp_path, self.path)
+        self._last_save = timeit.default_timer()
+
+    def delete(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _read_chunk(file_path, chunk, size):
+    with open(file_path, 'rb') as stream:
+        stream.seek(chunk * CHUNK_SIZE)
+        return stream.read(min(CHUNK_SIZE, size - chunk * CHUNK_SIZE))
+
+
+def _is_zero(data):
+    return not data.strip(b'\0')
+
+
+class ResumableUpload(object):  # pylint: disable=too-many-instance-attributes
+    """
+    Uploads a file to a block or page blob, resuming from the checkpoint of an earlier attempt.
+    The chunks are uploaded on max_connections threads. For page blobs, chunks which only hold
+    zeros are not sent, since the pages of a new page blob read as zeros.
+    """
+
+    def __init__(self, client, container_name, blob_name, file_path, blob_type,
+                 max_connections=2, validate_content=False, lease_id=None, timeout=None,
+                 progress_callback=None):
+        if blob_type not in ('block', 'page'):
+            raise CLIError('Resumable uploads are supported for block and page blobs only.')
+        self.client = client
+        self.container_name = container_name
+        self.blob_name = blob_name
+        self.file_path = file_path
+        self.blob_type = blob_type
+        self.max_connections = max_connections or 1
+        self.validate_content = validate_content
+        self.lease_id = lease_id
+        self.timeout = timeout
+        self.progress_callback = progress_callback
+
+        file_state = _get_file_state(file_path)
+        self.size = file_state['size']
+        self.chunk_count = (self.size + CHUNK_SIZE - 1) // CHUNK_SIZE
+        if blob_type == 'block' and self.chunk_count > MAX_BLOCKS:
+            raise CLIError('The file is too large for a block blob.')
+        if blob_type == 'page' and self.size % PAGE_SIZE:
+            raise CLIError('The size of a page blob must be a multiple of {} bytes.'
+                           .format(PAGE_SIZE))
+        self.checkpoint = UploadCheckpoint.load(
+            _get_checkpoint_path(client.account_name, container_name, blob_name), blob_type,
+            file_state)
+        self._uploaded_bytes = 0
+        self._progress_lock = threading.Lock()
+
+    def _block_id(self, chunk):
+        # block ids must have the same length within a blob
+        raw = 'cli{}{:08d}'.format(self.checkpoint.upload_id, chunk).encode('utf-8')
+        return base64.b64encode(raw).decode('utf-8')
+
+    def _chunk_size(self, chunk):
+        return min(CHUNK_SIZE, self.size - chunk * CHUNK_SIZE)
+
+    def _get_uploaded_blocks(self):
+        from azure.common import AzureMissingResourceHttpError
+        from azure.storage.blob.models import BlockListType
+
+        try:
+            block_list = self.client.get_block_list(self.container_name, self.blob_name,
+                                                    block_list_type=BlockListType.Uncommitted,
+                                                    lease_id=self.lease_id, timeout=self.timeout)
+        except AzureMissingResourceHttpError:
+            return set()
+        return set((block.id, block.size) for block in block_list.uncommitted_blocks)
+
+    def _get_uploaded_pages(self):
+        from azure.common import AzureMissingResourceHttpError
+
+        try:
+            properties = self.client.get_blob_properties(
+                self.container_name, self.blob_name, lease_id=self.lease_id,
+                timeout=self.timeout).properties
+            if properties.content_length != self.size:
+                return None
+            return self.client.get_page_ranges(self.container_name, self.blob_name,
+                                               lease_id=self.lease_id, timeout=self.timeout)
+        except AzureMissingResourceHttpError:
+            return None
+
+    def _get_remaining_chunks(self):
+        """Return the chunks which still have to be uploaded, checking the checkpoint against the
+        blob. For a page blob, also return whether the blob has to be created."""
+        recorded = self.checkpoint.done
+        if self.blob_type == 'block':
+            if not recorded:
+                return list(range(self.chunk_count)), False
+            uploaded = self._get_uploaded_blocks()
+            done = set(c for c in recorded
+                       if (self._block_id(c), self._chunk_size(c)) in uploaded)
+            return [c for c in range(self.chunk_count) if c not in done], False
+
+        page_ranges = self._get_uploaded_pages() if recorded else None
+        if page_ranges is None:
+            self.checkpoint.done = set()
+            return list(range(self.chunk_count)), True
+
+        def _is_written(chunk):
+            start = chunk * CHUNK_SIZE
+            end = start + self._chunk_size(chunk) - 1
+            return any(r.start <= start and end <= r.end for r in page_ranges)
+
+        # chunks of zeros are recorded without being written
+        done = set(c for c in recorded if c < 0 or _is_written(c))
+        return [c for c in range(self.chunk_count) if c not in done and -c - 1 not in done], False
+
+    def _report(self, transferred):
+        if not self.progress_callback:
+            return
+        with self._progress_lock:
+            self._uploaded_bytes += transferred
+            self.progress_callback(self._uploaded_bytes, self.size)
+
+    def _upload_chunk(self, chunk):
+        data = _read_chunk(self.file_path, chunk, self.size)
+        if self.blob_type == 'block':
+            self.client.put_block(self.container_name, self.blob_name, data, self._block_id(chunk),
+                                  validate_content=self.validate_content, lease_id=self.lease_id,
+                                  timeout=self.timeout)
+            self.checkpoint.record(chunk)
+        elif _is_zero(data):
+            # negative numbers record the chunks which were skipped
+            self.checkpoint.record(-chunk - 1)
+        else:
+            start = chunk * CHUNK_SIZE
+            self.client.update_page(self.container_name, self.blob_name, data, start,
+                                    start + len(data) - 1, validate_content=self.validate_content,
+                                    lease_id=self.lease_id, timeout=self.timeout)
+            self.checkpoint.record(chunk)
+        self._report(len(data))
+
+    def upload(self, content_settings=None, metadata=None, if_modified_since=None,
+               if_unmodified_since=None, if_match=None, if_none_match=None):
+        from multiprocessing.pool import ThreadPool
+
+        remaining, create = self._get_remaining_chunks()
+        if len(remaining) < self.chunk_count:
+            logger.warning('Resuming the upload of %s, %d of %d chunks are left', self.blob_name,
+                           len(remaining), self.chunk_count)
+        self._report(self.size - sum(self._chunk_size(c) for c in remaining))
+
+        conditions = dict(if_modified_since=if_modified_since,
+                          if_unmodified_since=if_unmodified_since, if_match=if_match,
+                          if_none_match=if_none_match)
+        if create:
+            self.client.create_blob(self.container_name, self.blob_name, self.size,
+                                    content_settings=content_settings, metadata=metadata,
+                                    lease_id=self.lease_id, timeout=self.timeout, **conditions)
+
+        pool = ThreadPool(self.max_connections)
+        try:
+            pool.map(self._upload_chunk, remaining)
+        except Exception as ex:
+            pool.terminate()
+            self.checkpoint.save()
+            raise CLIError('The upload of {} failed: {}\nRun the command again with --resumable '
+                           'to resume it.'.format(self.blob_name, ex))
+        except KeyboardInterrupt:
+            pool.terminate()
+            self.checkpoint.save()
+            raise
+        finally:
+            pool.close()
+
+        if self.blob_type == 'block':
+            from azure.storage.blob.models import BlobBlock
+
+            result = self.client.put_block_list(
+                self.container_name, self.blob_name,
+                [BlobBlock(self._block_id(c)) for c in range(self.chunk_count)],
+                content_settings=content_settings, metadata=metadata, lease_id=self.lease_id,
+                timeout=self.timeout, **conditions)
+        else:
+            result = self.client.get_blob_properties(self.container_name, self.blob_name,
+                                                     lease_id=self.lease_id, timeout=self.timeout)
+            if not create and (content_settings or metadata):
+                # the blob was created by an earlier attempt
+                if content_settings:
+                    self.client.set_blob_properties(self.container_name, self.blob_name,
+                                                    content_settings=content_settings,
+                                                    lease_id=self.lease_id)
+                if metadata:
+                    self.client.set_blob_metadata(self.container_name, self.blob_name, metadata,
+                                                  lease_id=self.lease_id)
+        self.checkpoint.delete()
+        return result
@@ -0,0 +1,128 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Upload of page blobs which skips the zero-filled regions of the file
+
+The pages of a new page blob read as zeros, so only the ranges of the file holding data have to be
+written. This shrinks the upload of a VHD, most of which is usually empty, to the size of its data.
+"""
+
+import errno
+import mmap
+import os
+
+from azure.cli.core._util import CLIError
+
+PAGE_SIZE = 512
+# the largest range of pages which can be written with one request
+MAX_RANGE_SIZE = 4 * 1024 * 1024
+
+
+def _get_data_extents(stream, size):
+    """
+    Yield the (start, end) extents of the file which may hold data. Where the file system reports
+    holes through SEEK_DATA and SEEK_HOLE, these are skipped without being read.
+    """
+    seek_data = getattr(os, 'SEEK_DATA', None)
+    seek_hole = getattr(os, 'SEEK_HOLE', None)
+    if seek_data is None or seek_hole is None:
+        yield 0, size
+        return
+
+    fd = stream.fileno()
+    offset = 0
+    while offset < size:
+        try:
+            start = os.lseek(fd, offset, seek_data)
+        except OSError as ex:
+            if ex.errno == errno.ENXIO:
+                # no data after offset
+                return
+            if offset == 0:
+                # holes aren't supported by the file system
+                yield 0, size
+                return
+            raise
+        end = min(os.lseek(fd, start, seek_hole), size)
+        yield start, end
+        offset = end
+
+
+def get_data_ranges(stream, size, range_size=MAX_RANGE_SIZE):
+    """
+    Yield the (start, length) page aligned ranges of a file, of up to range_size bytes, which are
+    not all zeros. The file is scanned memory-mapped, a range at a time.
+    """
+    if not size:
+        return
+    zeros = b'\0' * range_size
+    mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        for extent_start, extent_end in _get_data_extents(stream, size):
+            start = extent_start - extent_start % PAGE_SIZE
+            end = min(size, extent_end + (-extent_end % PAGE_SIZE))
+            for offset in range(start, end, range_size):
+                length = min(range_size, end - offset)
+                if mapped[offset:offset + length] != zeros[:length]:
+                    yield offset, length
+    finally:
+        mapped.close()
+
+
+def upload_page_blob(client, container_name, blob_name, file_path, max_connections=2,
+                     progress_callback=None, content_settings=None, metadata=None,
+                     validate_content=False, lease_id=None, if_modified_since=None,
+                     if_unmodified_since=None, if_match=None, if_none_match=None, timeout=None):
+    """
+    Create a page blob of the size of the file and write the ranges of the file which hold data,
+    on up to max_connections threads.
+    """
+    from multiprocessing.pool import ThreadPool
+
+    size = os.path.getsize(file_path)
+    if size % PAGE_SIZE:
+        raise CLIError('The size of a page blob must be a multiple of {} bytes.'.format(PAGE_SIZE))
+
+    result = client.create_blob(container_name, blob_name, size, content_settings=content_settings,
+                                metadata=metadata, lease_id=lease_id,
+                                if_modified_since=if_modified_since,
+                                if_unmodified_since=if_unmodified_since, if_match=if_match,
+                                if_none_match=if_none_match, timeout=timeout)
+    if progress_callback:
+        progress_callback(0, size)
+    end = 0
+
+    with open(file_path, 'rb') as stream:
+        def _write_range(data_range):
+            start, length = data_range
+            with open(file_path, 'rb') as range_stream:
+                range_stream.seek(start)
+                data = range_stream.read(length)
+            return client.update_page(container_name, blob_name, data, start, start + length - 1,
+                                      validate_content=validate_content, lease_id=lease_id,
+                                      timeout=timeout), start + length
+
+        data_ranges = get_data_ranges(stream, size)
+        pool = ThreadPool(max_connections or 1)
+        try:
+            # the ranges are found while the earlier ones are written
+            for range_result, end in pool.imap(_write_range, data_ranges):
+                result = range_result
+                if progress_callback:
+                    progress_callback(end, size)
+            pool.close()
+        except (Exception, KeyboardInterrupt):
+            # the writes which are queued are dropped, so that none lands after the upload failed
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            data_ranges.close()
+
+    if progress_callback and end < size:
+        # the rest of the file is empty
+        progress_callback(size, size)
+    return result
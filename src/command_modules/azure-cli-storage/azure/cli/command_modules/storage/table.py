@@ -0,0 +1,224 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Commands for bulk operations on table entities
+"""
+
+# pylint: disable=too-many-arguments
+
+import json
+import os.path
+import timeit
+from collections import OrderedDict
+
+from azure.cli.core.azlogging import get_az_logger
+from azure.cli.core._util import CLIError
+
+logger = get_az_logger(__name__)
+
+# the most entities an entity group transaction can hold
+MAX_BATCH_SIZE = 100
+# the most entities held while waiting for their partitions to fill a batch
+MAX_BUFFERED_ENTITIES = 10000
+IMPORT_RETRIES = 5
+# the suffix of the property which holds the type of a property, as the service writes it
+ODATA_TYPE_SUFFIX = '@odata.type'
+
+
+def storage_entity_import(client, table_name, source, file_format=None, if_exists='fail',
+                          max_parallel=None, timeout=None):
+    """
+    Import the entities of a JSON lines or CSV file into a table.
+
+    The file is read as a stream. Its entities are grouped by PartitionKey into batch transactions
+    of up to 100 entities, which are committed in parallel. Batches which are throttled are
+    retried.
+
+    :param str source:
+        The file to import. Each line of a JSON lines file holds an entity. The first row of a CSV
+        file holds the names of the properties. A property annotated with its @odata.type, as the
+        export writes it, is imported with that type.
+
+    :param str file_format:
+        The format of the file, by default inferred from its extension.
+
+    :param str if_exists:
+        Specify what should happen if an entity already exists for the specified PartitionKey and
+        RowKey.
+
+    :param int max_parallel:
+        The maximum number of batches to commit in parallel.
+    """
+    from .transfer import TransferScheduler, share_connection_pool
+
+    if file_format is None:
+        file_format = 'csv' if os.path.splitext(source)[1].lower() == '.csv' else 'jsonl'
+
+    def _commit(entities):
+        client.commit_batch(table_name, _create_batch(entities, if_exists), timeout=timeout)
+        return len(entities)
+
+    scheduler = TransferScheduler(max_parallel, retries=IMPORT_RETRIES, operation='import',
+                                  unit='batches')
+    share_connection_pool(client, scheduler.max_parallel)
+    start = timeit.default_timer()
+    with _open_source(source, file_format) as stream:
+        batches = scheduler.run(
+            _group_batches(_read_entities(stream, file_format)), _commit,
+            describe=lambda entities: 'PartitionKey {} RowKey {}'.format(
+                entities[0]['PartitionKey'], entities[0]['RowKey']))
+    elapsed = timeit.default_timer() - start
+
+    count = sum(batches)
+    logger.warning('Imported %d entities in %.1f seconds (%.0f entities/s)', count, elapsed,
+                   count / elapsed if elapsed > 0 else 0)
+    return {'entities': count, 'batches': len(batches), 'seconds': round(elapsed, 3)}
+
+
+def storage_entity_export(client, table_name, destination, filter=None, select=None,
+                          timeout=None):  # pylint: disable=redefined-builtin
+    """
+    Export the entities of a table to a JSON lines file, an entity per line.
+
+    The entities are written as they are queried, page by page, following the continuation
+    tokens of the query. They are written in the format of the service: the properties whose type
+    JSON cannot express, such as DateTime, Binary and Int64, are annotated with their @odata.type,
+    so that the file can be imported again. The Timestamp and ETag are not exported.
+
+    :param str destination:
+        The file to write the entities to.
+
+    :param str filter:
+        Returns only entities that satisfy the specified filter.
+    """
+    # the entities are written as the client sends them, which the import reads back
+    from azure.storage.table._serialization import _convert_entity_to_json
+
+    count = 0
+    with open(destination, 'w') as stream:
+        for entity in client.query_entities(table_name, filter=filter, select=select,
+                                            timeout=timeout):
+            # both are set by the service
+            entity.pop('etag', None)
+            entity.pop('Timestamp', None)
+            stream.write(_convert_entity_to_json(entity))
+            stream.write('\n')
+            count += 1
+    return {'entities': count}
+
+
+def _open_source(source, file_format):
+    if file_format != 'csv':
+        return open(source, 'r')
+    # the csv module reads the line breaks itself, including those of quoted values
+    from six import PY2
+    return open(source, 'rb') if PY2 else open(source, 'r', newline='')
+
+
+def _read_entities(stream, file_format):
+    """Yield the entities of a JSON lines or CSV stream, checking they have their keys."""
+    if file_format == 'csv':
+        import csv
+        from ._validators import cast_entity_value
+
+        rows = (dict((key, cast_entity_value(key, value)) for key, value in row.items()
+                     if value != '') for row in csv.DictReader(stream))
+    else:
+        rows = _read_json_lines(stream)
+
+    for line, entity in enumerate(rows, 1):
+        if not isinstance(entity, dict) or 'PartitionKey' not in entity or \
+                'RowKey' not in entity:
+            raise CLIError('Entity {} of the file has no PartitionKey or RowKey.'.format(line))
+        yield _convert_typed_properties(entity, line)
+
+
+def _convert_typed_properties(entity, line):
+    """Convert the properties annotated with their @odata.type to the values of that type."""
+    from azure.storage.table._deserialization import _EDM_TYPES, _ENTITY_TO_PYTHON_CONVERSIONS
+    from azure.storage.table.models import EntityProperty
+
+    for annotation in [key for key in entity if key.endswith(ODATA_TYPE_SUFFIX)]:
+        edm_type = entity.pop(annotation)
+        name = annotation[:-len(ODATA_TYPE_SUFFIX)]
+        if name not in entity:
+            continue
+        if edm_type not in _EDM_TYPES:
+            raise CLIError('Entity {} of the file has the unknown type {} for {}.'.format(
+                line, edm_type, name))
+        convert = _ENTITY_TO_PYTHON_CONVERSIONS.get(edm_type)
+        try:
+            value = entity[name]
+            entity[name] = convert(value) if convert else EntityProperty(edm_type, value)
+        except (TypeError, ValueError):
+            raise CLIError('Entity {} of the file has an invalid {} value for {}.'.format(
+                line, edm_type, name))
+    return entity
+
+
+def _read_json_lines(stream):
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            entity = json.loads(line)
+        except ValueError:
+            raise CLIError('Line {} of the file is not valid JSON.'.format(number))
+        if isinstance(entity, dict):
+            _type_json_integers(entity)
+        yield entity
+
+
+def _type_json_integers(entity):
+    """
+    An integer without an @odata.type is an Int32 to the service, while the client sends the
+    integers of Python as Int64. The integers which fit are sent as Int32, as they were exported.
+    """
+    from azure.storage.table.models import EntityProperty, EdmType
+
+    for name, value in entity.items():
+        if isinstance(value, int) and not isinstance(value, bool) and \
+                name + ODATA_TYPE_SUFFIX not in entity and -2 ** 31 <= value < 2 ** 31:
+            entity[name] = EntityProperty(EdmType.INT32, value)
+
+
+def _group_batches(entities, batch_size=MAX_BATCH_SIZE, max_buffered=MAX_BUFFERED_ENTITIES):
+    """
+    Group the entities into lists of up to batch_size entities of the same partition. When more
+    than max_buffered entities are waiting for their partitions to fill a batch, the partition
+    waiting the longest is sent as it is.
+    """
+    partitions = OrderedDict()
+    buffered = 0
+    for entity in entities:
+        key = entity['PartitionKey']
+        batch = partitions.setdefault(key, [])
+        batch.append(entity)
+        buffered += 1
+        if len(batch) == batch_size:
+            del partitions[key]
+            buffered -= len(batch)
+            yield batch
+        elif buffered > max_buffered:
+            _, batch = partitions.popitem(last=False)
+            buffered -= len(batch)
+            yield batch
+    for batch in partitions.values():
+        yield batch
+
+
+def _create_batch(entities, if_exists):
+    from azure.storage.table import TableBatch
+
+    batch = TableBatch()
+    add = {
+        'fail': batch.insert_entity,
+        'merge': batch.insert_or_merge_entity,
+        'replace': batch.insert_or_replace_entity
+    }[if_exists]
+    for entity in entities:
+        add(entity)
+    return batch
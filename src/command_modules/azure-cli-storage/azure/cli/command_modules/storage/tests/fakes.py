@@ -0,0 +1,231 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+In-memory fakes of the storage services, for the unit tests of the batch and transfer commands
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+
+from azure.common import AzureHttpError, AzureMissingResourceHttpError
+from azure.storage.blob.models import (Blob, BlobBlock, BlobBlockList, BlobPrefix, CopyProperties,
+                                       PageRange)
+from azure.storage.file.models import Directory, File
+
+
+def make_temp_dir(test_case):
+    """Create a temporary directory which is removed when the test case is cleaned up."""
+    folder = tempfile.mkdtemp()
+    test_case.addCleanup(shutil.rmtree, folder)
+    return folder
+
+
+def write_file(folder, name, content):
+    """Write bytes or text to a file of the folder, creating its directories."""
+    path = os.path.join(folder, name)
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'wb' if isinstance(content, bytes) else 'w') as f:
+        f.write(content)
+    return path
+
+
+def make_blob(name, content_length=0, content_md5=None, last_modified=None, copy_id=None,
+              copy_status=None):
+    blob = Blob(name)
+    blob.properties.content_length = content_length
+    blob.properties.content_settings.content_md5 = content_md5
+    blob.properties.last_modified = last_modified or datetime.utcnow()
+    blob.properties.copy.id = copy_id
+    blob.properties.copy.status = copy_status
+    return blob
+
+
+class FakeStorageService(object):
+    """
+    The attributes of a storage client which the transfer scheduler uses. The state of the fakes
+    is changed from the threads of the scheduler, under the lock.
+    """
+    account_name = 'account'
+    protocol = 'https'
+
+    def __init__(self):
+        self.request_session = None
+        self._lock = threading.Lock()
+
+
+class FakeBlobService(FakeStorageService):  # pylint: disable=too-many-instance-attributes
+    """
+    The blobs of a container. The blocks and pages written are those of a single blob. Once
+    fail_after calls to put_block or update_page have been made, the calls fail.
+    """
+
+    def __init__(self, blobs=None, fail_after=None):
+        super(FakeBlobService, self).__init__()
+        self.blobs = dict((b.name, b) for b in blobs or [])
+        # the (prefix, delimiter) of each listing
+        self.requests = []
+        self.uploaded = []
+        self.deleted = []
+        self.copies = []
+        self.blocks = {}
+        self.committed = None
+        self.pages = {}
+        self.calls = []
+        self.fail_after = fail_after
+
+    def add_blob(self, name, content=b'', content_md5=None, last_modified=None, **kwargs):
+        self.blobs[name] = make_blob(name, len(content), content_md5, last_modified, **kwargs)
+
+    def _call(self, name):
+        with self._lock:
+            self.calls.append(name)
+            if self.fail_after is not None and len(self.calls) > self.fail_after:
+                raise IOError('connection reset')
+
+    def list_blobs(self, container_name, prefix=None, delimiter=None, **_):
+        """Lists the blobs by prefix and delimiter, like the service"""
+        prefix = prefix or ''
+        self.requests.append((prefix, delimiter))
+
+        def _list():
+            prefixes = set()
+            for name, blob in sorted(self.blobs.items()):
+                if not name.startswith(prefix):
+                    continue
+                rest = name[len(prefix):]
+                if delimiter and delimiter in rest:
+                    directory = prefix + rest[:rest.index(delimiter) + 1]
+                    if directory not in prefixes:
+                        prefixes.add(directory)
+                        item = BlobPrefix()
+                        item.name = directory
+                        yield item
+                else:
+                    yield blob
+        return _list()
+
+    def get_blob_properties(self, container_name, blob_name, **_):
+        try:
+            return self.blobs[blob_name]
+        except KeyError:
+            raise AzureMissingResourceHttpError('The specified blob does not exist.', 404)
+
+    def exists(self, container_name, blob_name):
+        return blob_name in self.blobs
+
+    def make_blob_url(self, container_name, blob_name, **_):
+        return 'https://source/{}/{}'.format(container_name, blob_name)
+
+    def copy_blob(self, container_name, blob_name, copy_source, **_):
+        with self._lock:
+            self.copies.append(blob_name)
+            copy = CopyProperties()
+            copy.id = 'copy-' + blob_name
+            copy.status = 'pending'
+            self.add_blob(blob_name, copy_id=copy.id, copy_status='pending')
+            return copy
+
+    def create_blob_from_path(self, container_name, blob_name, file_path, content_settings=None,
+                              **_):
+        with self._lock:
+            self.uploaded.append((blob_name, content_settings.content_md5))
+
+    def delete_blob(self, container_name, blob_name, **_):
+        with self._lock:
+            self.deleted.append(blob_name)
+
+    def put_block(self, container_name, blob_name, block, block_id, **_):
+        self._call('put_block')
+        self.blocks[block_id] = block
+
+    def get_block_list(self, container_name, blob_name, **_):
+        if not self.blocks:
+            raise AzureMissingResourceHttpError('Not Found', 404)
+        block_list = BlobBlockList()
+        block_list.uncommitted_blocks = []
+        for block_id, block in self.blocks.items():
+            block_list.uncommitted_blocks.append(BlobBlock(block_id))
+            block_list.uncommitted_blocks[-1]._set_size(len(block))  # pylint: disable=protected-access
+        return block_list
+
+    def put_block_list(self, container_name, blob_name, block_list, **_):
+        self.committed = b''.join(self.blocks[b.id] for b in block_list)
+        return 'committed'
+
+    def create_blob(self, container_name, blob_name, content_length, **_):
+        """Creates a page blob"""
+        self.blobs[blob_name] = make_blob(blob_name, content_length)
+        self.pages = {}
+
+    def update_page(self, container_name, blob_name, page, start_range, end_range, **_):
+        assert len(page) == end_range - start_range + 1
+        self._call('update_page')
+        with self._lock:
+            self.pages[start_range] = page
+
+    def get_page_ranges(self, container_name, blob_name, **_):
+        return [PageRange(start, start + len(page) - 1) for start, page in self.pages.items()]
+
+
+class FakeFileService(FakeStorageService):
+    """The directories and files of a share"""
+
+    def __init__(self):
+        super(FakeFileService, self).__init__()
+        self.directories = []
+        self.files = []
+
+    def create_directory(self, share_name, directory_name, fail_on_exist=False):
+        with self._lock:
+            parent = os.path.dirname(directory_name)
+            assert not parent or parent in self.directories, 'missing parent ' + parent
+            self.directories.append(directory_name)
+
+    def create_file_from_path(self, share_name, directory_name, file_name, **_):
+        with self._lock:
+            self.files.append(os.path.join(directory_name, file_name))
+
+    def copy_file(self, share_name, directory_name, file_name, copy_source, *_):
+        with self._lock:
+            self.files.append(os.path.join(directory_name, file_name))
+
+    def list_directories_and_files(self, share_name, directory_name):
+        items = []
+        for path in sorted(self.files):
+            if os.path.dirname(path) == directory_name:
+                items.append(File(os.path.basename(path)))
+        for path in sorted(self.directories):
+            if os.path.dirname(path) == directory_name:
+                items.append(Directory(os.path.basename(path)))
+        return items
+
+    def get_file_to_path(self, share_name, directory_name, file_name, file_path, **_):
+        with open(file_path, 'w') as f:
+            f.write(os.path.join(directory_name, file_name))
+
+    def make_file_url(self, share_name, directory_name, file_name, **_):
+        return '/'.join(p for p in [share_name, directory_name, file_name] if p)
+
+
+class FakeTableService(FakeStorageService):
+    """Records the batches committed. The first `throttle` batches are rejected as busy."""
+
+    def __init__(self, throttle=0):
+        super(FakeTableService, self).__init__()
+        self.batches = []
+        self.throttle = throttle
+
+    def commit_batch(self, table_name, batch, timeout=None):
+        with self._lock:
+            if self.throttle:
+                self.throttle -= 1
+                raise AzureHttpError('Server Busy', 503)
+            self.batches.append((batch._partition_key, len(batch._requests)))  # pylint: disable=protected-access
+        return ['etag'] * len(batch._requests)  # pylint: disable=protected-access
@@ -0,0 +1,76 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import base64
+import hashlib
+import os
+import unittest
+from datetime import datetime, timedelta
+
+import mock
+from azure.storage.blob.models import ContentSettings
+
+from azure.cli.command_modules.storage.blob import storage_blob_upload_batch
+from azure.cli.command_modules.storage.util import get_file_md5, glob_files_locally
+from .fakes import FakeBlobService, make_temp_dir, write_file
+
+
+class Test_blob_batch(unittest.TestCase):
+
+    def setUp(self):
+        self.source = make_temp_dir(self)
+        self.client = FakeBlobService()
+        patcher = mock.patch('azure.cli.command_modules.storage.manifest.get_file_hash_manifest',
+                             return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _write(self, name, content):
+        return write_file(self.source, name, content)
+
+    def _upload(self, pattern=None, **kwargs):
+        source_files = list(glob_files_locally(self.source, pattern))
+        storage_blob_upload_batch(self.client, self.source, 'container', pattern=pattern,
+                                  source_files=source_files,
+                                  destination_container_name='container', blob_type='block',
+                                  content_settings=ContentSettings(), max_connections=1,
+                                  **kwargs)
+
+    def test_upload_batch_sync(self):
+        same = self._write('same.txt', b'same')
+        changed = self._write('dir/changed.txt', b'new content')
+        old = self._write('old.txt', b'old')
+        self._write('new.txt', b'new')
+        self.client.add_blob('same.txt', b'same', get_file_md5(same))
+        # same size, different content
+        self.client.add_blob('dir/changed.txt', b'old content',
+                             base64.b64encode(hashlib.md5(b'old content').digest()).decode())
+        # no MD5: compared by last modified time
+        self.client.add_blob('old.txt', b'old', last_modified=datetime.utcfromtimestamp(
+            os.path.getmtime(old)) + timedelta(minutes=1))
+        self.client.add_blob('gone.txt', b'gone')
+        self.client.add_blob('gone.log', b'gone')
+
+        self._upload(pattern='*.txt', sync=True, delete_extraneous=True)
+
+        self.assertEqual(sorted(name for name, _ in self.client.uploaded),
+                         [os.path.join('dir', 'changed.txt'), 'new.txt'])
+        # the MD5 hash is set on the uploaded blobs
+        self.assertIn((os.path.join('dir', 'changed.txt'), get_file_md5(changed)),
+                      self.client.uploaded)
+        # only the blobs matching the pattern are deleted
+        self.assertEqual(self.client.deleted, ['gone.txt'])
+
+    def test_upload_batch_without_sync(self):
+        self._write('a.txt', b'a')
+        self._write('b.txt', b'b')
+        self.client.add_blob('a.txt', b'a')
+        self._upload()
+        self.assertEqual(sorted(name for name, _ in self.client.uploaded), ['a.txt', 'b.txt'])
+        self.assertEqual(self.client.deleted, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+from datetime import datetime, timedelta
+
+import mock
+
+from azure.cli.core._util import CLIError
+from azure.cli.command_modules.storage.blob import (COPY_POLL_INTERVAL_SEC,
+                                                    storage_blob_copy_batch,
+                                                    _wait_for_blob_copies)
+from .fakes import FakeBlobService, make_blob
+
+NOW = datetime(2017, 3, 1)
+
+
+def _blob(name, last_modified=NOW, **kwargs):
+    return make_blob(name, last_modified=last_modified, **kwargs)
+
+
+class Test_blob_copy_batch(unittest.TestCase):
+
+    def setUp(self):
+        self.source = FakeBlobService([_blob('a.txt'), _blob('b.txt'), _blob('c.txt')])
+        patcher = mock.patch('azure.cli.command_modules.storage.blob.BlockBlobService',
+                             return_value=self.source)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _copy(self, client, **kwargs):
+        return storage_blob_copy_batch(client, 'source', 'src', 'dst', recursive=True, **kwargs)
+
+    def test_exclude_old_uses_one_listing_of_the_destination(self):
+        client = FakeBlobService([_blob('a.txt', NOW + timedelta(days=1)),
+                                  _blob('b.txt', NOW - timedelta(days=1))])
+        result = self._copy(client, exclude_old=True, max_parallel=2)
+
+        self.assertEqual(sorted(r.name for r in result), ['b.txt', 'c.txt'])
+        self.assertEqual(sorted(client.copies), ['b.txt', 'c.txt'])
+        self.assertEqual(len(client.requests), 1)
+
+    @mock.patch('time.sleep')
+    def test_wait_polls_until_the_copies_complete(self, sleep):
+        client = FakeBlobService()
+
+        statuses = iter(['success', 'failed', 'success'])
+
+        def _complete(seconds):
+            if seconds != COPY_POLL_INTERVAL_SEC:
+                return
+            # a copy completes on each poll
+            pending = [b for _, b in sorted(client.blobs.items())
+                       if b.properties.copy.status == 'pending']
+            pending[0].properties.copy.status = next(statuses)
+            if pending[0].properties.copy.status == 'failed':
+                pending[0].properties.copy.status_description = 'source not found'
+        sleep.side_effect = _complete
+
+        with self.assertRaises(CLIError) as context:
+            self._copy(client, wait=True)
+        self.assertIn('1 of 3 copies failed', str(context.exception))
+        self.assertIn('source not found', str(context.exception))
+        self.assertEqual(len(client.copies), 3)
+        self.assertEqual(sleep.call_args_list.count(mock.call(COPY_POLL_INTERVAL_SEC)), 3)
+
+    @mock.patch('time.sleep')
+    def test_wait_fails_copies_to_deleted_or_overwritten_blobs(self, sleep):
+        client = FakeBlobService([_blob('a.txt', copy_id='other-copy', copy_status='pending'),
+                                  _blob('b.txt', copy_id='copy-b', copy_status='success')])
+
+        with self.assertRaises(CLIError) as context:
+            _wait_for_blob_copies(client, 'dst', None, {'a.txt': 'copy-a', 'b.txt': 'copy-b',
+                                                        'c.txt': 'copy-c'})
+        message = str(context.exception)
+        self.assertIn('2 of 3 copies failed', message)
+        self.assertIn('a.txt: superseded by another copy', message)
+        self.assertIn('c.txt: the destination blob was deleted', message)
+        self.assertEqual(sleep.call_count, 1)
+
+    @mock.patch('time.sleep')
+    def test_wait_fails_the_copy_to_a_deleted_blob(self, sleep):
+        client = FakeBlobService()
+
+        with self.assertRaises(CLIError) as context:
+            _wait_for_blob_copies(client, 'dst', None, {'a.txt': 'copy-a'})
+        self.assertIn('1 of 1 copies failed', str(context.exception))
+        self.assertIn('a.txt: the destination blob was deleted', str(context.exception))
+        self.assertEqual(sleep.call_count, 1)
+
+    @mock.patch('time.sleep')
+    def test_wait_times_out(self, sleep):
+        client = FakeBlobService([_blob('a.txt', copy_id='copy-a', copy_status='pending'),
+                                  _blob('b.txt', copy_id='copy-b', copy_status='pending')])
+
+        with mock.patch('timeit.default_timer', side_effect=[0, 30, 61]):
+            with self.assertRaises(CLIError) as context:
+                _wait_for_blob_copies(client, 'dst', None, {'a.txt': 'copy-a',
+                                                            'b.txt': 'copy-b'}, timeout=60)
+        self.assertIn('2 of 2 copies failed', str(context.exception))
+        self.assertIn('a.txt: still pending after 60 seconds', str(context.exception))
+        self.assertEqual(sleep.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+from fnmatch import fnmatch
+
+from azure.cli.command_modules.storage.util import collect_blobs, list_matching_blobs
+from .fakes import FakeBlobService, make_blob
+
+BLOB_NAMES = [
+    'data/1/a.csv', 'data/1/b.txt', 'data/10/a.csv', 'data/2/x/a.csv', 'data/3/a.csv',
+    'logs/2016-12-31.log', 'logs/2017-01-01.log', 'logs/2017-01-02.log', 'logs/archive/2017.log',
+    'readme.md', 'x[1].txt'
+]
+
+
+def _blob_service():
+    return FakeBlobService([make_blob(name) for name in BLOB_NAMES])
+
+
+class Test_blob_listing(unittest.TestCase):
+
+    def _collect(self, pattern):
+        service = _blob_service()
+        names = list(collect_blobs(service, 'container', pattern))
+        self.assertEqual(names, [n for n in BLOB_NAMES if fnmatch(n, pattern)])
+        return service.requests
+
+    def test_literal_prefix_is_listed_by_the_service(self):
+        self.assertEqual(self._collect('logs/2017-*'), [('logs/2017-', None)])
+        self.assertEqual(self._collect('*.csv'), [('', None)])
+
+    def test_directories_which_cannot_match_are_skipped(self):
+        requests = self._collect('data/?/a.csv')
+        self.assertEqual(requests, [('data/', '/'), ('data/1/', '/'), ('data/2/', '/'),
+                                    ('data/3/', '/')])
+
+        # '*' matches across directories, so the subtree is listed at once
+        self.assertEqual(self._collect('data/[12]/*.csv'), [('data/', '/'), ('data/1/', None),
+                                                            ('data/2/', None)])
+
+    def test_patterns_matching_any_name(self):
+        self.assertEqual(self._collect('x[[]1].txt'), [('x', '/')])
+        self.assertEqual([b.name for b in list_matching_blobs(_blob_service(), 'c')],
+                         BLOB_NAMES)
+        self.assertEqual(collect_blobs(_blob_service(), 'c', 'readme.md'),
+                         ['readme.md'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import unittest
+
+import mock
+
+from azure.cli.core._util import CLIError
+from azure.cli.command_modules.storage.file import (storage_file_copy_batch,
+                                                    storage_file_download_batch,
+                                                    storage_file_upload_batch,
+                                                    _make_directories_in_files_share,
+                                                    _make_directory_in_files_share)
+from .fakes import FakeFileService, make_temp_dir, write_file
+
+
+class Test_file_batch_directories(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeFileService()
+
+    def test_directories_are_created_once(self):
+        existing_dirs = set()
+        _make_directory_in_files_share(self.client, 'share', os.path.join('a', 'b'), existing_dirs)
+        _make_directory_in_files_share(self.client, 'share', os.path.join('a', 'c'), existing_dirs)
+        self.assertEqual(self.client.directories,
+                         ['a', os.path.join('a', 'b'), os.path.join('a', 'c')])
+
+    def test_leading_and_trailing_separators_are_ignored(self):
+        existing_dirs = _make_directories_in_files_share(self.client, 'share', ['/a/b/', '/'])
+        _make_directory_in_files_share(self.client, 'share', '/a/c/', existing_dirs)
+        self.assertEqual(self.client.directories, ['a', 'a/b', 'a/c'])
+
+    @mock.patch('time.sleep')
+    def test_directory_creation_retries_transient_failures(self, _):
+        from azure.common import AzureHttpError
+        create_directory = self.client.create_directory
+        attempts = []
+
+        def _create_directory(share_name, directory_name, fail_on_exist=False):
+            attempts.append(directory_name)
+            if len(attempts) == 1:
+                raise AzureHttpError('Server Busy', 503)
+            create_directory(share_name, directory_name, fail_on_exist)
+
+        self.client.create_directory = _create_directory
+        _make_directories_in_files_share(self.client, 'share', ['a'])
+        self.assertEqual(attempts, ['a', 'a'])
+        self.assertEqual(self.client.directories, ['a'])
+
+    @mock.patch('time.sleep')
+    def test_directory_creation_failure_is_reported(self, _):
+        from azure.common import AzureHttpError
+
+        def _create_directory(share_name, directory_name, fail_on_exist=False):
+            raise AzureHttpError('Server Busy', 503)
+
+        self.client.create_directory = _create_directory
+        with self.assertRaises(CLIError) as context:
+            _make_directories_in_files_share(self.client, 'share', ['a'])
+        self.assertIn('1 of 1 directories failed to create', str(context.exception))
+
+    def test_upload_batch_creates_each_directory_once(self):
+        source = make_temp_dir(self)
+        names = ['root.txt', os.path.join('a', 'x.txt'), os.path.join('a', 'y.txt'),
+                 os.path.join('a', 'b', 'z.txt'), os.path.join('c', 'd', 'e', 'w.txt')]
+        for name in names:
+            write_file(source, name, name)
+
+        storage_file_upload_batch(self.client, 'share', source)
+
+        self.assertEqual(sorted(self.client.directories),
+                         sorted(['a', os.path.join('a', 'b'), 'c', os.path.join('c', 'd'),
+                                 os.path.join('c', 'd', 'e')]))
+        self.assertEqual(sorted(self.client.files), sorted(names))
+
+    def test_copy_batch_creates_each_directory_once(self):
+        blob_service = mock.MagicMock()
+        blob_service.make_blob_url.return_value = 'https://account/container/blob'
+        blob_names = ['a/1.txt', 'a/2.txt', 'a/b/3.txt', '4.txt']
+        with mock.patch('azure.cli.command_modules.storage.file.collect_blobs',
+                        return_value=iter(blob_names)):
+            result = storage_file_copy_batch(self.client, blob_service, destination_share='share',
+                                             destination_path='dest', source_container='c')
+
+        self.assertEqual(len(result), 4)
+        self.assertEqual(sorted(self.client.directories),
+                         ['dest', os.path.join('dest', 'a'), os.path.join('dest', 'a', 'b')])
+
+    def test_download_batch_lists_and_downloads_in_parallel(self):
+        self.client.directories = ['a', os.path.join('a', 'b'), 'c']
+        self.client.files = ['1.txt', os.path.join('a', '2.txt'), os.path.join('a', 'b', '3.txt'),
+                             os.path.join('a', 'b', '4.log'), os.path.join('c', '5.txt')]
+        destination = make_temp_dir(self)
+
+        result = storage_file_download_batch(self.client, 'share', destination, pattern='*.txt',
+                                             max_parallel=3)
+
+        downloaded = [os.path.relpath(os.path.join(root, f), destination)
+                      for root, _, files in os.walk(destination) for f in files]
+        self.assertEqual(sorted(downloaded), sorted(f for f in self.client.files
+                                                    if f.endswith('.txt')))
+        self.assertEqual(len(result), 4)
+
+    def test_copy_batch_reports_failures_together(self):
+        blob_service = mock.MagicMock()
+
+        def _copy_file(share_name, directory_name, file_name, *_):
+            from azure.common import AzureHttpError
+            if file_name == 'bad.txt':
+                raise AzureHttpError('Forbidden', 403)
+
+        self.client.copy_file = _copy_file
+        with mock.patch('azure.cli.command_modules.storage.file.collect_blobs',
+                        return_value=['good.txt', 'bad.txt', 'other.txt']):
+            with self.assertRaises(CLIError) as context:
+                storage_file_copy_batch(self.client, blob_service, destination_share='share',
+                                        source_container='c')
+        self.assertIn('1 of 3 files failed to copy', str(context.exception))
+        self.assertIn('bad.txt', str(context.exception))
+
+    @mock.patch('time.sleep')
+    def test_copy_batch_retries_transient_failures(self, _):
+        from azure.common import AzureHttpError
+        attempts = []
+
+        def _copy_file(share_name, directory_name, file_name, *_):
+            attempts.append(file_name)
+            if len(attempts) == 1:
+                raise AzureHttpError('Server Busy', 503)
+
+        self.client.copy_file = _copy_file
+        with mock.patch('azure.cli.command_modules.storage.file.collect_blobs',
+                        return_value=['busy.txt']):
+            result = storage_file_copy_batch(self.client, mock.MagicMock(),
+                                             destination_share='share', source_container='c')
+        self.assertEqual(result, ['share/busy.txt'])
+        self.assertEqual(attempts, ['busy.txt', 'busy.txt'])
+
+
+if __name__ == '__main__':
+    unittest.main()
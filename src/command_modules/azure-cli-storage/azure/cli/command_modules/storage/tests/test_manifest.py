@@ -0,0 +1,77 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import base64
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import mock
+
+from azure.cli.command_modules.storage import manifest
+from azure.cli.command_modules.storage.manifest import FileHashManifest, compute_file_md5
+
+
+def _md5(content):
+    return base64.b64encode(hashlib.md5(content).digest()).decode('utf-8')
+
+
+class Test_file_hash_manifest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.manifest_file = os.path.join(self.folder, 'manifest.json')
+
+    def _write(self, name, content, age=60):
+        path = os.path.join(self.folder, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_compute_file_md5(self):
+        content = os.urandom(1000)
+        with mock.patch.object(manifest, 'HASH_CHUNK_SIZE', 64):
+            self.assertEqual(compute_file_md5(self._write('a', content)), _md5(content))
+        self.assertEqual(compute_file_md5(self._write('empty', b'')), _md5(b''))
+
+    def test_hashes_are_reused_until_the_file_changes(self):
+        path = self._write('a', b'content')
+        recent = self._write('recent', b'content', age=0)
+
+        first = FileHashManifest(self.manifest_file)
+        self.assertEqual(first.get_md5(path), _md5(b'content'))
+        first.get_md5(recent)
+        first.save()
+
+        second = FileHashManifest(self.manifest_file)
+        with mock.patch.object(manifest, 'compute_file_md5', return_value='computed') as compute:
+            self.assertEqual(second.get_md5(path), _md5(b'content'))
+            # hashes of files which were just modified are not kept
+            second.get_md5(recent)
+            self.assertEqual(compute.call_count, 1)
+
+            self._write('a', b'changed', age=30)
+            self.assertEqual(second.get_md5(path), 'computed')
+            self.assertEqual(compute.call_count, 2)
+
+    def test_unreadable_manifest_is_replaced(self):
+        with open(self.manifest_file, 'w') as f:
+            f.write('not json')
+        path = self._write('a', b'content')
+        hashes = FileHashManifest(self.manifest_file)
+        self.assertEqual(hashes.get_md5(path), _md5(b'content'))
+        hashes.save()
+        self.assertEqual(FileHashManifest(self.manifest_file).hits, 0)
+        self.assertIn(os.path.abspath(path), FileHashManifest(self.manifest_file)._files)  # pylint: disable=protected-access
+
+
+if __name__ == '__main__':
+    unittest.main()
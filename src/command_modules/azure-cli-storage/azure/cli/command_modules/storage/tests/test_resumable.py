@@ -0,0 +1,114 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import unittest
+
+import mock
+
+from azure.cli.core._util import CLIError
+from azure.cli.command_modules.storage import resumable
+from azure.cli.command_modules.storage.resumable import ResumableUpload
+from azure.cli.command_modules.storage.transfer import TransferProgress
+from .fakes import FakeBlobService, make_temp_dir, write_file
+
+CHUNK_SIZE = 1024
+
+
+@mock.patch.object(resumable, 'CHUNK_SIZE', CHUNK_SIZE)
+class Test_resumable_upload(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = make_temp_dir(self)
+        patcher = mock.patch('azure.cli.core._environment.get_config_dir',
+                             return_value=self.folder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _write(self, content):
+        return write_file(self.folder, 'file', content)
+
+    def _upload(self, client, path, blob_type):
+        return ResumableUpload(client, 'container', 'blob', path, blob_type,
+                               max_connections=1).upload()
+
+    def test_block_upload_resumes_from_checkpoint(self):
+        content = os.urandom(CHUNK_SIZE * 5 + 100)
+        path = self._write(content)
+
+        client = FakeBlobService(fail_after=3)
+        with self.assertRaises(CLIError) as context:
+            self._upload(client, path, 'block')
+        self.assertIn('--resumable', str(context.exception))
+        self.assertEqual(len(client.blocks), 3)
+
+        client.fail_after = None
+        client.calls = []
+        self.assertEqual(self._upload(client, path, 'block'), 'committed')
+        # only the blocks which weren't uploaded are sent again
+        self.assertEqual(client.calls, ['put_block'] * 3)
+        self.assertEqual(client.committed, content)
+        self.assertEqual(os.listdir(os.path.join(self.folder, resumable.CHECKPOINT_DIR_NAME)),
+                         [])
+
+    def test_checkpoint_is_discarded_when_the_file_changes(self):
+        path = self._write(os.urandom(CHUNK_SIZE * 3))
+        client = FakeBlobService(fail_after=2)
+        with self.assertRaises(CLIError):
+            self._upload(client, path, 'block')
+
+        content = os.urandom(CHUNK_SIZE * 3)
+        path = self._write(content)
+        os.utime(path, (0, 0))
+        client.fail_after = None
+        client.calls = []
+        self._upload(client, path, 'block')
+        self.assertEqual(client.calls, ['put_block'] * 3)
+        self.assertEqual(client.committed, content)
+
+    def test_page_upload_skips_zeros_and_resumes(self):
+        content = os.urandom(CHUNK_SIZE) + b'\0' * CHUNK_SIZE * 2 + os.urandom(CHUNK_SIZE * 2)
+        path = self._write(content)
+
+        client = FakeBlobService(fail_after=2)
+        with self.assertRaises(CLIError):
+            self._upload(client, path, 'page')
+        self.assertEqual(client.blobs['blob'].properties.content_length, len(content))
+        self.assertEqual(sorted(client.pages), [0, CHUNK_SIZE * 3])
+
+        client.fail_after = None
+        client.calls = []
+        self._upload(client, path, 'page')
+        self.assertEqual(client.calls, ['update_page'])
+        self.assertEqual(sorted(client.pages), [0, CHUNK_SIZE * 3, CHUNK_SIZE * 4])
+
+    def test_page_blob_size_must_be_aligned(self):
+        with self.assertRaises(CLIError):
+            ResumableUpload(FakeBlobService(), 'container', 'blob', self._write(b'\1' * 100),
+                            'page')
+
+
+class Test_transfer_progress(unittest.TestCase):
+
+    @mock.patch('timeit.default_timer')
+    def test_reports_throughput_and_time_left(self, timer):
+        stream = mock.MagicMock()
+        progress = TransferProgress(stream=stream)
+        timer.return_value = 10.0
+        progress(1024 * 1024, 8 * 1024 * 1024)
+        timer.return_value = 12.0
+        progress(3 * 1024 * 1024, 8 * 1024 * 1024)
+
+        last = stream.write.call_args[0][0]
+        self.assertIn('37.5%', last)
+        self.assertIn('1.00 MiB/s', last)
+        self.assertIn('0:00:05 left', last)
+
+        progress(8 * 1024 * 1024, 8 * 1024 * 1024)
+        stream.write.assert_called_with('\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
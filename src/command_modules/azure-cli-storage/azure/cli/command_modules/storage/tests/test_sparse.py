@@ -0,0 +1,95 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import unittest
+
+import mock
+
+from azure.cli.core._util import CLIError
+from azure.cli.command_modules.storage import sparse
+from azure.cli.command_modules.storage.sparse import get_data_ranges, upload_page_blob
+from .fakes import FakeBlobService, make_temp_dir
+
+MiB = 1024 * 1024
+
+
+class Test_sparse_page_blob_upload(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = make_temp_dir(self)
+
+    def _write_sparse(self, size, data):
+        path = os.path.join(self.folder, 'disk.vhd')
+        with open(path, 'wb') as f:
+            f.truncate(size)
+            for offset, content in data:
+                f.seek(offset)
+                f.write(content)
+        return path
+
+    def _ranges(self, path):
+        with open(path, 'rb') as stream:
+            return list(get_data_ranges(stream, os.path.getsize(path)))
+
+    def test_only_ranges_with_data_are_uploaded(self):
+        path = self._write_sparse(64 * MiB, [(0, b'\1' * 512), (10 * MiB + 1000, b'\2' * 100),
+                                             (63 * MiB, b'\3' * MiB)])
+        client = FakeBlobService()
+        progress = mock.MagicMock()
+        upload_page_blob(client, 'container', 'disk.vhd', path, max_connections=4,
+                         progress_callback=progress)
+
+        self.assertEqual(client.blobs['disk.vhd'].properties.content_length, 64 * MiB)
+        with open(path, 'rb') as f:
+            content = f.read()
+        for start, page in client.pages.items():
+            self.assertEqual(content[start:start + len(page)], page)
+        self.assertIn(0, client.pages)
+        self.assertIn(63 * MiB, client.pages)
+        self.assertTrue(any(s <= 10 * MiB + 1000 < s + len(p) for s, p in client.pages.items()))
+        self.assertLess(sum(len(p) for p in client.pages.values()), 16 * MiB)
+        progress.assert_called_with(64 * MiB, 64 * MiB)
+
+    def test_no_range_is_written_after_a_write_fails(self):
+        import time
+        path = self._write_sparse(160 * MiB, [(i * 4 * MiB, b'\1') for i in range(40)])
+        client = FakeBlobService()
+        update_page = client.update_page
+
+        def _update_page(container_name, blob_name, page, start_range, end_range, **kwargs):
+            if start_range == 0:
+                raise IOError('connection reset')
+            time.sleep(0.01)
+            return update_page(container_name, blob_name, page, start_range, end_range, **kwargs)
+
+        client.update_page = _update_page
+        with mock.patch.object(sparse, '_get_data_extents', return_value=[(0, 160 * MiB)]):
+            with self.assertRaises(IOError):
+                upload_page_blob(client, 'container', 'disk.vhd', path, max_connections=4)
+        written = len(client.pages)
+        time.sleep(0.2)
+        self.assertEqual(len(client.pages), written)
+        self.assertLess(written, 40)
+
+    def test_zero_ranges_are_skipped_without_hole_support(self):
+        path = self._write_sparse(12 * MiB, [(5 * MiB, b'\1')])
+        with mock.patch.object(sparse, '_get_data_extents', return_value=[(0, 12 * MiB)]):
+            self.assertEqual(self._ranges(path), [(4 * MiB, 4 * MiB)])
+
+    def test_ranges_are_page_aligned(self):
+        path = self._write_sparse(8 * MiB, [(MiB + 700, b'\1')])
+        with mock.patch.object(sparse, '_get_data_extents', return_value=[(MiB + 600, MiB + 800)]):
+            self.assertEqual(self._ranges(path), [(MiB + 512, 512)])
+        self.assertEqual(self._ranges(self._write_sparse(4 * MiB, [])), [])
+
+    def test_size_must_be_page_aligned(self):
+        with self.assertRaises(CLIError):
+            upload_page_blob(FakeBlobService(), 'container', 'disk.vhd',
+                             self._write_sparse(1000, []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import unittest
+from datetime import datetime
+
+import mock
+from dateutil.tz import tzutc
+from azure.storage.table._serialization import _convert_entity_to_json
+from azure.storage.table.models import Entity, EntityProperty, EdmType
+
+from azure.cli.core._util import CLIError
+from azure.cli.command_modules.storage.table import (storage_entity_export, storage_entity_import,
+                                                     _group_batches, _open_source,
+                                                     _read_entities)
+from .fakes import FakeTableService, make_temp_dir, write_file
+
+
+class Test_table_entity_import(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = make_temp_dir(self)
+
+    def _write(self, name, content):
+        return write_file(self.folder, name, content)
+
+    def test_group_batches_by_partition(self):
+        entities = [{'PartitionKey': str(i % 3), 'RowKey': str(i)} for i in range(250)]
+        batches = list(_group_batches(iter(entities), batch_size=50, max_buffered=60))
+        self.assertTrue(all(len(set(e['PartitionKey'] for e in b)) == 1 for b in batches))
+        self.assertTrue(all(len(b) <= 50 for b in batches))
+        self.assertEqual(sorted(e['RowKey'] for b in batches for e in b),
+                         sorted(e['RowKey'] for e in entities))
+
+    @mock.patch('time.sleep')
+    def test_import_jsonl_retries_throttled_batches(self, _):
+        lines = [json.dumps({'PartitionKey': 'p{}'.format(i % 2), 'RowKey': str(i), 'Value': i})
+                 for i in range(250)]
+        path = self._write('entities.jsonl', '\n'.join(lines) + '\n')
+        client = FakeTableService(throttle=2)
+
+        result = storage_entity_import(client, 'table', path, max_parallel=4)
+
+        self.assertEqual(result['entities'], 250)
+        self.assertEqual(sorted(client.batches),
+                         [('p0', 25), ('p0', 100), ('p1', 25), ('p1', 100)])
+
+    def test_import_csv(self):
+        path = self._write('entities.csv', 'PartitionKey,RowKey,Count,Name\n'
+                                           'a,1,10,x\n'
+                                           'a,2,,y\n')
+        client = FakeTableService()
+        self.assertEqual(storage_entity_import(client, 'table', path)['entities'], 2)
+        self.assertEqual(client.batches, [('a', 2)])
+
+    def test_csv_numbers_are_cast(self):
+        path = self._write('entities.csv', 'PartitionKey,RowKey,Count,Ratio,Name\n'
+                                           '0,0,0,0.0,x\n'
+                                           '0,1,12,1.5,007x\n')
+        with open(path) as stream:
+            entities = list(_read_entities(stream, 'csv'))
+        self.assertEqual(entities[0], {'PartitionKey': '0', 'RowKey': '0', 'Count': 0,
+                                       'Ratio': 0.0, 'Name': 'x'})
+        self.assertIsInstance(entities[0]['Ratio'], float)
+        self.assertEqual(entities[1], {'PartitionKey': '0', 'RowKey': '1', 'Count': 12,
+                                       'Ratio': 1.5, 'Name': '007x'})
+
+    def test_import_csv_with_line_break_in_value(self):
+        path = self._write('entities.csv', 'PartitionKey,RowKey,Note\n'
+                                           'a,1,"first\r\nsecond"\n')
+        with _open_source(path, 'csv') as stream:
+            entities = list(_read_entities(stream, 'csv'))
+        self.assertEqual(entities, [{'PartitionKey': 'a', 'RowKey': '1', 'Note': 'first\r\nsecond'}])
+
+    def test_invalid_json_line_is_reported(self):
+        path = self._write('entities.jsonl', '{"PartitionKey": "a", "RowKey": "1"}\n'
+                                             '\n'
+                                             '{"PartitionKey": "a", "RowKey": \n')
+        with self.assertRaises(CLIError) as context:
+            storage_entity_import(FakeTableService(), 'table', path)
+        self.assertEqual(str(context.exception), 'Line 3 of the file is not valid JSON.')
+
+    def test_export_writes_an_entity_per_line(self):
+        entity = Entity(PartitionKey='a', RowKey='1', etag='W/"1"',
+                        Timestamp=datetime(2017, 1, 1), Big=EntityProperty(EdmType.INT64, 2 ** 40))
+        client = mock.MagicMock()
+        client.query_entities.return_value = iter([entity, Entity(PartitionKey='a', RowKey='2')])
+        path = os.path.join(self.folder, 'export.jsonl')
+
+        self.assertEqual(storage_entity_export(client, 'table', path), {'entities': 2})
+        with open(path) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(lines[0], {'PartitionKey': 'a', 'RowKey': '1', 'Big': str(2 ** 40),
+                                    'Big@odata.type': 'Edm.Int64'})
+        self.assertEqual(lines[1], {'PartitionKey': 'a', 'RowKey': '2'})
+
+    def test_exported_entities_are_imported_unchanged(self):
+        properties = {
+            'PartitionKey': 'a', 'RowKey': '1', 'Name': 'x', 'Ratio': 1.5, 'Flag': True,
+            'Count': EntityProperty(EdmType.INT32, 7), 'Big': 2 ** 40,
+            'When': datetime(2017, 1, 2, 3, 4, 5, tzinfo=tzutc()),
+            'Data': EntityProperty(EdmType.BINARY, b'\x00\xff'),
+            'Id': EntityProperty(EdmType.GUID, 'c9da6455-213d-42c9-9a79-3e9149a57833')}
+        client = mock.MagicMock()
+        client.query_entities.return_value = iter([
+            Entity(properties, etag='W/"1"', Timestamp=datetime(2017, 1, 1, tzinfo=tzutc()))])
+        path = os.path.join(self.folder, 'export.jsonl')
+        storage_entity_export(client, 'table', path)
+
+        with _open_source(path, 'jsonl') as stream:
+            imported = list(_read_entities(stream, 'jsonl'))
+        self.assertEqual(len(imported), 1)
+        self.assertEqual(json.loads(_convert_entity_to_json(imported[0])),
+                         json.loads(_convert_entity_to_json(properties)),
+                         'the entity is sent as it was queried')
+
+    def test_invalid_typed_property_is_reported(self):
+        path = self._write('entities.jsonl', '{"PartitionKey": "a", "RowKey": "1", '
+                                             '"When": "never", "When@odata.type": "Edm.DateTime"}\n')
+        with self.assertRaises(CLIError) as context:
+            storage_entity_import(FakeTableService(), 'table', path)
+        self.assertEqual(str(context.exception),
+                         'Entity 1 of the file has an invalid Edm.DateTime value for When.')
+
+
+if __name__ == '__main__':
+    unittest.main()
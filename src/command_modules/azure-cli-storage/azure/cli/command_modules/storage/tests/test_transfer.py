@@ -0,0 +1,96 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import time
+import unittest
+
+import mock
+from azure.common import AzureHttpError
+
+from azure.cli.core._util import CLIError
+from azure.cli.command_modules.storage.transfer import (QUEUED_ITEMS_PER_THREAD, TransferScheduler,
+                                                        share_connection_pool)
+
+
+class Test_transfer_scheduler(unittest.TestCase):
+
+    def test_transfers_run_in_parallel_and_keep_order(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def _action(item):
+            with lock:
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return item * 2
+
+        scheduler = TransferScheduler(max_parallel=4)
+        results = scheduler.run(iter(range(40)), _action, size=lambda item, result: result)
+
+        self.assertEqual(results, [i * 2 for i in range(40)])
+        self.assertTrue(1 < running[1] <= 4)
+        self.assertEqual(scheduler.done, 40)
+        self.assertEqual(scheduler.transferred_bytes, sum(i * 2 for i in range(40)))
+
+    def test_items_are_taken_as_the_transfers_proceed(self):
+        lock = threading.Lock()
+        counts = {'taken': 0, 'done': 0, 'ahead': 0}
+
+        def _items():
+            for i in range(200):
+                with lock:
+                    counts['taken'] += 1
+                    counts['ahead'] = max(counts['ahead'], counts['taken'] - counts['done'])
+                yield i
+
+        def _action(item):
+            time.sleep(0.001)
+            with lock:
+                counts['done'] += 1
+            return item
+
+        scheduler = TransferScheduler(max_parallel=4)
+        self.assertEqual(scheduler.run(_items(), _action), list(range(200)))
+        self.assertLessEqual(counts['ahead'], 4 * QUEUED_ITEMS_PER_THREAD)
+
+    @mock.patch('time.sleep')
+    def test_failures_are_retried_and_reported_together(self, _):
+        attempts = {}
+
+        def _action(item):
+            attempts[item] = attempts.get(item, 0) + 1
+            if item == 'flaky' and attempts[item] < 2:
+                raise IOError('connection reset')
+            if item == 'rejected':
+                raise AzureHttpError('Forbidden', 403)
+            if item == 'broken':
+                raise IOError('connection reset')
+            return item
+
+        scheduler = TransferScheduler(max_parallel=2, retries=2, operation='upload')
+        with self.assertRaises(CLIError) as context:
+            scheduler.run(['ok', 'flaky', 'rejected', 'broken'], _action)
+
+        message = str(context.exception)
+        self.assertIn('2 of 4 files failed to upload', message)
+        self.assertIn('rejected: Forbidden', message)
+        self.assertIn('broken: connection reset', message)
+        self.assertEqual(attempts, {'ok': 1, 'flaky': 2, 'rejected': 1, 'broken': 3})
+
+    def test_clients_of_an_account_share_a_connection_pool(self):
+        clients = [mock.MagicMock(account_name='account', protocol='https') for _ in range(2)]
+        share_connection_pool(clients[0], 4)
+        share_connection_pool(clients[1], 16)
+        self.assertIs(clients[0].request_session, clients[1].request_session)
+        adapter = clients[1].request_session.get_adapter('https://account.blob.core.windows.net')
+        self.assertEqual(adapter._pool_maxsize, 16)  # pylint: disable=protected-access
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,7 +10,8 @@ from six import StringIO
 
 from azure.cli.command_modules.storage._validators import (get_permission_validator,
                                                            get_datetime_type, datetime, ipv4_range_type, resource_type_type,
-                                                           services_type)
+                                                           services_type, process_blob_upload_batch_parameters,
+                                                           validate_entity)
 
 
 class Test_storage_validators(unittest.TestCase):
@@ -99,6 +100,26 @@ class Test_storage_validators(unittest.TestCase):
         with self.assertRaises(ValueError):
             actual = services_type(input)
 
+    def test_upload_batch_sync_rejects_append_blobs(self):
+        import tempfile
+        from argparse import Namespace
+
+        ns = Namespace(source=tempfile.gettempdir(), destination='container', pattern=None,
+                       blob_type='append', sync=True, delete_extraneous=False, account_name=None)
+        with self.assertRaises(ValueError) as context:
+            process_blob_upload_batch_parameters(ns)
+        self.assertIn('--sync is not supported for append blobs', str(context.exception))
+
+    def test_entity_zero_values_are_numbers(self):
+        from argparse import Namespace
+
+        ns = Namespace(entity=['PartitionKey=0', 'RowKey=0', 'Count=0', 'Ratio=0.0', 'Name=007x'])
+        validate_entity(ns)
+        self.assertEqual(ns.entity, {'PartitionKey': '0', 'RowKey': '0', 'Count': 0, 'Ratio': 0.0,
+                                     'Name': '007x'})
+        self.assertIsInstance(ns.entity['Count'], int)
+        self.assertIsInstance(ns.entity['Ratio'], float)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,245 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Scheduling of the file transfers of the storage batch commands
+"""
+
+import sys
+import threading
+import time
+import timeit
+
+from azure.cli.core.azlogging import get_az_logger
+from azure.cli.core._util import CLIError
+
+logger = get_az_logger(__name__)
+
+DEFAULT_MAX_PARALLEL = 8
+DEFAULT_RETRIES = 2
+# the items taken from the iterator ahead of the transfers, for each thread
+QUEUED_ITEMS_PER_THREAD = 2
+PROGRESS_INTERVAL_SEC = 1.0
+
+# requests to the same account share one connection pool
+_account_sessions = {}
+_account_sessions_lock = threading.Lock()
+
+
+def share_connection_pool(client, pool_size):
+    """
+    Make the storage client send its requests through the connection pool shared by the clients
+    of its account, keeping up to pool_size connections open.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    key = (client.account_name, client.protocol)
+    with _account_sessions_lock:
+        session, size = _account_sessions.get(key, (None, 0))
+        if session is None:
+            session = requests.Session()
+        if pool_size > size:
+            adapter = HTTPAdapter(pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            size = pool_size
+        _account_sessions[key] = (session, size)
+    client.request_session = session
+    return client
+
+
+def is_retriable(ex):
+    """Return whether a transfer which failed with the exception may succeed if it is retried."""
+    from azure.common import AzureHttpError
+
+    if isinstance(ex, CLIError):
+        return False
+    if isinstance(ex, AzureHttpError):
+        # the request was rejected, sending it again won't help
+        return ex.status_code >= 500 or ex.status_code in (408, 429)
+    return True
+
+
+class TransferScheduler(object):
+    """
+    Runs the transfers of a batch command on a pool of threads, up to max_parallel at once.
+
+    A transfer which fails is retried up to `retries` times. Failures don't stop the other
+    transfers; they are reported together once all transfers are done. While the transfers run,
+    the number of files and bytes transferred and the throughput are reported to stderr.
+
+    Items are taken from an iterator only as the transfers proceed, so that a long stream of items
+    isn't read into memory ahead of them.
+    """
+
+    def __init__(self, max_parallel=None, retries=DEFAULT_RETRIES, operation='transfer',
+                 unit='files'):
+        self.max_parallel = max_parallel or DEFAULT_MAX_PARALLEL
+        self.retries = retries
+        self.operation = operation
+        self.unit = unit
+        self.total = None
+        self.done = 0
+        self.failed = 0
+        self.transferred_bytes = 0
+        self._lock = threading.Lock()
+        self._start_time = None
+        self._last_report = None
+        self._has_size = False
+
+    def run(self, items, action, describe=str, size=None):
+        """
+        Run action for each item. Return the results in the order of the items.
+
+        :param items: the items to transfer. An iterator is consumed as the transfers proceed, at
+            most QUEUED_ITEMS_PER_THREAD items for each thread ahead of them.
+        :param action: called with an item, transfers it and returns the result
+        :param describe: returns the name of an item for the progress and error messages
+        :param size: called with an item and its result, returns the number of bytes transferred
+        """
+        from multiprocessing.pool import ThreadPool
+
+        try:
+            self.total = len(items)
+        except TypeError:
+            self.total = None
+        self._start_time = self._last_report = timeit.default_timer()
+        self._has_size = size is not None
+
+        # the pool takes the items from the iterator as fast as it can, unless it is held back
+        queued = threading.BoundedSemaphore(self.max_parallel * QUEUED_ITEMS_PER_THREAD)
+
+        def _queue(items):
+            items = iter(items)
+            while True:
+                queued.acquire()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                yield item
+
+        def _transfer(item):
+            try:
+                result, ex = self._transfer_with_retry(item, action, describe)
+                transferred = 0
+                if ex is None and size:
+                    try:
+                        transferred = size(item, result) or 0
+                    except (OSError, AttributeError, TypeError):
+                        transferred = 0
+                self._record(ex is None, transferred)
+                # only the name of an item which failed is kept, for the error message
+                return describe(item) if ex is not None else None, result, ex
+            finally:
+                queued.release()
+
+        pool = ThreadPool(self.max_parallel)
+        try:
+            outcomes = list(pool.imap(_transfer, _queue(items)))
+        except KeyboardInterrupt:
+            pool.terminate()
+            raise
+        finally:
+            pool.close()
+            self._clear_progress()
+
+        elapsed = timeit.default_timer() - self._start_time
+        logger.info('%s: %d %s, %d bytes in %.1f seconds (%.2f MiB/s)', self.operation,
+                    self.done, self.unit, self.transferred_bytes, elapsed, self._rate(elapsed))
+
+        failures = [(name, ex) for name, _, ex in outcomes if ex is not None]
+        if failures:
+            raise CLIError('{} of {} {} failed to {}:\n{}'.format(
+                len(failures), len(outcomes), self.unit, self.operation,
+                '\n'.join('{}: {}'.format(name, ex) for name, ex in failures)))
+        return [result for _, result, _ in outcomes]
+
+    def _transfer_with_retry(self, item, action, describe):
+        attempt = 0
+        while True:
+            try:
+                return action(item), None
+            except Exception as ex:  # pylint: disable=broad-except
+                if attempt >= self.retries or not is_retriable(ex):
+                    return None, ex
+                attempt += 1
+                logger.info('Failed to %s %s, retrying (%d of %d): %s', self.operation,
+                            describe(item), attempt, self.retries, ex)
+                time.sleep(2 ** attempt)
+
+    def _record(self, succeeded, transferred_bytes):
+        with self._lock:
+            self.done += 1
+            self.failed += 0 if succeeded else 1
+            self.transferred_bytes += transferred_bytes
+            now = timeit.default_timer()
+            if now - self._last_report >= PROGRESS_INTERVAL_SEC:
+                self._last_report = now
+                self._report_progress(now - self._start_time)
+
+    def _rate(self, elapsed):
+        return self.transferred_bytes / 1024.0 / 1024.0 / elapsed if elapsed > 0 else 0.0
+
+    def _report_progress(self, elapsed):
+        message = '{}: {} of {} {}{}{}'.format(
+            self.operation, self.done, self.total if self.total is not None else '?', self.unit,
+            ', {:.1f} MiB, {:.2f} MiB/s'.format(self.transferred_bytes / 1024.0 / 1024.0,
+                                                self._rate(elapsed)) if self._has_size else '',
+            ', {} failed'.format(self.failed) if self.failed else '')
+        if sys.stderr.isatty():
+            sys.stderr.write('\r' + message)
+            sys.stderr.flush()
+        else:
+            logger.info(message)
+
+    @staticmethod
+    def _clear_progress():
+        if sys.stderr.isatty():
+            sys.stderr.write('\r\033[K')
+            sys.stderr.flush()
+
+
+class TransferProgress(object):
+    """
+    Progress callback of a single file transfer. Reports the percentage done, the throughput and
+    the estimated time left to stderr.
+
+    The bytes reported by the first call, e.g. those uploaded by an interrupted upload which is
+    being resumed, don't count towards the throughput.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+        self._start_time = None
+        self._initial = 0
+        self._last_length = 0
+
+    def __call__(self, current, total):
+        if not total:
+            return
+        now = timeit.default_timer()
+        if self._start_time is None:
+            self._start_time = now
+            self._initial = current
+        elapsed = now - self._start_time
+        rate = (current - self._initial) / elapsed if elapsed > 0 else 0.0
+        message = 'Percent complete: {: >5.1f}%, {:.2f} MiB/s'.format(
+            current * 100.0 / total, rate / 1024.0 / 1024.0)
+        if 0 < rate and current < total:
+            message += ', {} left'.format(_format_duration((total - current) / rate))
+        padding = max(0, self._last_length - len(message))
+        self._last_length = len(message)
+        self.stream.write('\r' + message + ' ' * padding)
+        if current >= total:
+            self.stream.write('\n')
+        self.stream.flush()
+
+
+def _format_duration(seconds):
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '{}:{:02d}:{:02d}'.format(hours, minutes, seconds)
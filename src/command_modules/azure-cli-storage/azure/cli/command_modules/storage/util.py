@@ -11,11 +11,8 @@ from fnmatch import fnmatch
 def collect_blobs(blob_service, container, pattern=None):
     """
     List the blobs in the given blob container, filter the blob by comparing their path to the given
-    pattern.
+    pattern. The names of the blobs are returned as they are listed, page by page.
     """
-    # TODO: deal with container which contains more that 5000 files.
-    #       In that case, the listing operation will page the results.
-
     if not blob_service:
         raise ValueError('missing parameter blob_service')
 
@@ -24,12 +21,101 @@ def collect_blobs(blob_service, container, pattern=None):
 
     if not _pattern_has_wildcards(pattern):
         return [pattern]
-    else:
-        return (blob.name for blob in blob_service.list_blobs(container)
-                if _match_path(pattern, blob.name))
 
+    return (blob.name for blob in list_matching_blobs(blob_service, container, pattern))
+
+
+def list_matching_blobs(blob_service, container, pattern=None):
+    """
+    Yield the blobs of the container whose names match the pattern, in the order of their names.
+
+    Only the blobs starting with the longest literal prefix of the pattern are listed. Below it,
+    the container is listed a virtual directory at a time, skipping the directories in which no
+    blob can match, until the pattern reaches a '*', which can match any number of directories.
+    """
+    from azure.storage.blob.models import BlobPrefix
 
-def collect_files(file_service, share, pattern=None):
+    if not pattern:
+        for blob in blob_service.list_blobs(container):
+            yield blob
+        return
+
+    glob = _BlobNamePattern(pattern)
+
+    def _list(prefix):
+        states = glob.advance(prefix)
+        if glob.matches_any_suffix(states):
+            # no directory below the prefix can be skipped, list them all at once
+            for blob in blob_service.list_blobs(container, prefix=prefix):
+                if _match_path(pattern, blob.name):
+                    yield blob
+            return
+
+        for item in blob_service.list_blobs(container, prefix=prefix, delimiter='/'):
+            if isinstance(item, BlobPrefix):
+                if glob.advance(item.name[len(prefix):], states):
+                    for blob in _list(item.name):
+                        yield blob
+            elif _match_path(pattern, item.name):
+                yield item
+
+    for blob in _list(glob.literal_prefix):
+        yield blob
+
+
+class _BlobNamePattern(object):  # pylint: disable=too-few-public-methods
+    """
+    A glob pattern matched against blob names a character at a time, to find whether any name
+    starting with a given prefix can match it.
+    """
+
+    def __init__(self, pattern):
+        import re
+
+        # the same tokens as fnmatch: '*', '?', '[seq]', '[!seq]' or a literal character
+        self.tokens = re.findall(r'\*|\?|\[!?\]?[^\]]*\]|.', pattern, re.DOTALL)
+        literal = []
+        for token in self.tokens:
+            if len(token) > 1 or token in '*?[':
+                break
+            literal.append(token)
+        self.literal_prefix = ''.join(literal)
+        self._start = self._closure(set([0]))
+
+    def _closure(self, states):
+        # a '*' may match nothing
+        for state in sorted(states):
+            while state < len(self.tokens) and self.tokens[state] == '*':
+                state += 1
+                states.add(state)
+        return states
+
+    def advance(self, text, states=None):
+        """Return the positions in the pattern reached after matching text. None are reached if no
+        name starting with text can match the pattern."""
+        from fnmatch import fnmatchcase
+
+        states = self._start if states is None else states
+        for c in text:
+            if not states:
+                break
+            reached = set()
+            for state in states:
+                if state == len(self.tokens):
+                    continue
+                token = self.tokens[state]
+                if token == '*':
+                    reached.add(state)
+                elif token == '?' or token == c or (len(token) > 1 and fnmatchcase(c, token)):
+                    reached.add(state + 1)
+            states = self._closure(reached)
+        return states
+
+    def matches_any_suffix(self, states):
+        return any(state < len(self.tokens) and self.tokens[state] == '*' for state in states)
+
+
+def collect_files(file_service, share, pattern=None, max_parallel=None):
     """
     Search files in the the given file share recursively. Filter the files by matching their path
     to the given pattern. Returns a iterable of tuple (dir, name).
@@ -41,9 +127,9 @@ def collect_files(file_service, share, pattern=None):
         raise ValueError('missing parameter share')
 
     if not _pattern_has_wildcards(pattern):
-        return [pattern]
+        return [os.path.split(pattern)]
 
-    return glob_files_remotely(file_service, share, pattern)
+    return glob_files_remotely(file_service, share, pattern, max_parallel)
 
 
 def create_blob_service_from_storage_client(client):
@@ -79,21 +165,45 @@ def glob_files_locally(folder_path, pattern):
                 yield (full_path, full_path[len_folder_path:])
 
 
-def glob_files_remotely(client, share_name, pattern):
-    """glob the files in remote file share based on the given pattern"""
+def glob_files_remotely(client, share_name, pattern, max_parallel=None):
+    """
+    glob the files in remote file share based on the given pattern. The directories are listed
+    on up to max_parallel threads, and the files are yielded while the listing continues.
+    """
     from collections import deque
+    from multiprocessing.pool import ThreadPool
     from azure.storage.file.models import Directory, File
+    from .transfer import DEFAULT_MAX_PARALLEL
+
+    def _list(directory):
+        return directory, list(client.list_directories_and_files(share_name, directory))
+
+    pool = ThreadPool(max_parallel or DEFAULT_MAX_PARALLEL)
+    try:
+        queue = deque([pool.apply_async(_list, ("",))])
+        while len(queue) > 0:
+            current_dir, items = queue.popleft().get()
+            for f in items:
+                if isinstance(f, File):
+                    if (pattern and fnmatch(os.path.join(current_dir, f.name), pattern)) or \
+                       (not pattern):
+                        yield current_dir, f.name
+                elif isinstance(f, Directory):
+                    queue.append(pool.apply_async(_list, (os.path.join(current_dir, f.name),)))
+    finally:
+        # the listing is abandoned if the caller stops early
+        pool.terminate()
+
+
+def get_file_md5(path):
+    """
+    Return the base64 encoded MD5 hash of a local file, in the format of the Content-MD5 of a blob.
+    The hash is reused from the file hash manifest if the file is unchanged since it was computed.
+    """
+    from .manifest import compute_file_md5, get_file_hash_manifest
 
-    queue = deque([""])
-    while len(queue) > 0:
-        current_dir = queue.pop()
-        for f in client.list_directories_and_files(share_name, current_dir):
-            if isinstance(f, File):
-                if (pattern and fnmatch(os.path.join(current_dir, f.name), pattern)) or \
-                   (not pattern):
-                    yield current_dir, f.name
-            elif isinstance(f, Directory):
-                queue.appendleft(os.path.join(current_dir, f.name))
+    manifest = get_file_hash_manifest()
+    return manifest.get_md5(path) if manifest else compute_file_md5(path)
 
 
 def mkdir_p(path):